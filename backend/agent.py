@@ -2,36 +2,99 @@
 CS Agent 메인 로직 - 다이어그램 아키텍처 반영
 1. Classification (분류 및 입력 검증)
 2. Intent-based Processing (RAG 또는 DB 트랜잭션 수행)
-3. Validation (최종 출력 검증 가드레일)
+3. Validation (최종 출력 검증 가드레일, VALIDATION_MODE=async면 차단 대상 인텐트만 반환 전 검증)
+
+LangChain 모듈은 import 비용이 크므로 warmup()/호출 시점에 로드합니다.
 """
 
 from services.classification import ClassificationService
 from services.knowledge import KnowledgeService
 from services.transaction import TransactionService
 from services.validation import ValidationAgent
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
+from services.http_client import get_client_factory
+from services.resilience import Deadline, DependencyUnavailable, get_breaker
+from services.response_templates import TEMPLATED_STATUSES, ResponseTemplateEngine
+
+import asyncio
+import logging
+import time
 
 import settings
 
+logger = logging.getLogger("CS_Agent")
+
 class CSAgent:
-    def __init__(self):
-        self.classifier = ClassificationService()
-        self.knowledge = KnowledgeService()
-        self.transaction = TransactionService()
-        self.validator = ValidationAgent()
+    ACCOUNT_FALLBACK_MESSAGE = "계정 관련 안내를 지금 생성할 수 없습니다. 로그인 페이지의 '아이디/비밀번호 찾기'를 이용하시거나 잠시 후 다시 문의해주세요."
+    # 트랜잭션 서비스 메시지를 그대로 쓰는 상태 (승인 대기, 선택지, 취소 철회)
+    SERVICE_MESSAGE_STATUSES = {"pending_approval", "multiple_choice", "cancelled"}
+    # 이미 데이터에 반영된 트랜잭션 결과 (검증에 실패해도 메시지를 바꾸지 않음)
+    COMMITTED_STATUSES = {"success", "cancelled"}
+
+    def __init__(self, warmup: bool = True):
+        """
+        Args:
+            warmup: False면 컴포넌트 로드를 미루고 warmup()을 별도로 호출해야 합니다.
+                    (서버 기동 시 포트를 먼저 열고 백그라운드에서 로드하기 위함)
+        """
+        self.ready = False
+        self.warmup_error = None
+        self.warmup_durations = {} # 컴포넌트별 로드 시간 (초)
+        # 주문/청구 결과 답변 템플릿 (LLM 다듬기는 settings.LLM_REPHRASE_INTENTS만)
+        self.templates = ResponseTemplateEngine()
         
-        self.llm = ChatOpenAI(
-            model=settings.MODEL_NAME,
-            temperature=0.5, # 생성적 답변을 위해 조정
-            api_key=settings.OPENAI_API_KEY
-        )
+        if warmup:
+            self.warmup()
+
+    def warmup(self):
+        """임베딩 모델, FAISS 인덱스, 캐시, LLM 클라이언트를 순서대로 로드합니다."""
+        try:
+            self.classifier = self._load_component("classifier", ClassificationService)
+            self.knowledge = self._load_component("knowledge", KnowledgeService)
+            self.transaction = self._load_component("transaction", TransactionService)
+            # 주제 일관성 검사에 FAQ 검색용 임베딩 모델 재사용
+            self.validator = self._load_component("validator", lambda: ValidationAgent(embedding_model=self.knowledge.model))
+            self.llm = self._load_component("llm", lambda: get_client_factory().chat_model(
+                model=settings.MODEL_NAME,
+                temperature=0.5, # 생성적 답변을 위해 조정
+                api_key=settings.OPENAI_API_KEY
+            ))
+            self.llm_breaker = get_breaker("agent_llm")
+        except Exception as e:
+            self.warmup_error = str(e)
+            logger.error(f"[Warmup 실패]: {e}", exc_info=True)
+            raise
+        
+        self.ready = True
+        logger.info(f"[Warmup 완료]: {self.warmup_durations}")
 
-    async def process_query(self, query: str, conversation_history: list = None, session_id: str = "default_user"):
+    def _load_component(self, name: str, factory):
+        """컴포넌트 하나를 생성하고 소요 시간을 기록합니다."""
+        started = time.perf_counter()
+        component = factory()
+        self.warmup_durations[name] = round(time.perf_counter() - started, 3)
+        logger.info(f"[Warmup] {name}: {self.warmup_durations[name]}s")
+        return component
+
+    async def process_query(self, query: str, conversation_history: list = None, session_id: str = "default_user", deadline: Deadline = None):
+        """
+        Args:
+            deadline: 요청 마감 시간 (기본값: settings.CHAT_DEADLINE_SECONDS).
+                      마감 초과/서킷 오픈 시 LLM 없이 만든 대체 응답을 반환하며,
+                      응답의 degraded / degraded_reasons 필드로 표시합니다.
+        """
+        deadline = deadline or Deadline(settings.CHAT_DEADLINE_SECONDS)
+        degraded_reasons = []
+        # 단계별 소요 시간 (응답의 timings_ms, 부하 테스트 단계별 지연 집계용)
+        timings = {}
+        stage_started = time.perf_counter()
+        
         # ---------------------------------------------------------
         # Step 1: 분류 에이전트 & 입력 검증 (Classification)
         # ---------------------------------------------------------
-        classification = await self.classifier.classify_intent(query)
+        classification = await self.classifier.classify_intent(query, deadline=deadline)
+        timings["classification"] = time.perf_counter() - stage_started
+        if classification.get("degraded"):
+            degraded_reasons.append(f"classification:{classification['degraded']}")
         intent = classification["intent"]
         confidence = classification.get("confidence", 0.0)
         
@@ -46,11 +109,11 @@ class CSAgent:
         has_context = self.transaction.has_active_context(session_id)
         
         if (intent == "OFF_TOPIC" or confidence < 0.5) and not has_context:
-            return {
+            return self._mark_degraded({
                 "message": "해당 문의는 지원 범위를 벗어납니다. 기술, 청구, 주문 문의를 도와드릴 수 있습니다.",
                 "type": "off_topic",
                 "intent": intent
-            }
+            }, degraded_reasons, timings)
             
         # 컨텍스트가 켜져 있으면 OFF_TOPIC이라도 트랜잭션 시도
         if (intent == "OFF_TOPIC" or confidence < 0.5) and has_context:
@@ -60,31 +123,47 @@ class CSAgent:
         # Step 2: 분류된 인텐트에 따른 처리 (Knowledge/Transaction)
         # ---------------------------------------------------------
         final_message = ""
+        stage_started = time.perf_counter()
         
         if intent == "TECH_SUPPORT":
         # B파트의 상세 검색 호출 (세션 ID 전달로 맥락 유지 활성화)
-            knowledge_result = self.knowledge._search_knowledge_internal(
+            # 임베딩 검색/LLM 호출/재시도 대기가 동기 코드라 스레드에서 실행 (다른 요청과 마감 처리가 막히지 않도록)
+            knowledge_result = await asyncio.to_thread(
+                self.knowledge._search_knowledge_internal,
                 query=query, 
              category="tech_support", 
-                session_id=session_id
+                session_id=session_id,
+                deadline=deadline
             )
+            if knowledge_result.get("degraded"):
+                degraded_reasons.append(f"knowledge:{knowledge_result['degraded']}")
         # B파트가 이미 LLM을 썼거나 캐시를 가져왔으므로 그 결과를 그대로 사용
             final_message = knowledge_result.get("answer", "")
             response_data["from_cache"] = knowledge_result.get("from_cache", False) # 캐시 여부 기록
+            if knowledge_result.get("cache_key"):
+                # 대화 기록에 남겨 /feedback → 캐시 승격/거부에 사용
+                response_data["cache_key"] = knowledge_result["cache_key"]
+                response_data["cache_category"] = knowledge_result.get("cache_category")
             response_data["data"] = knowledge_result
 
         elif intent == "ORDER" or intent == "BILLING":
             # [다이어그램 로직] 주문 관리/청구 지원 에이전트 + 유저 계정 정보(Transaction)
             # TransactionService를 통해 DB 조회 로직 실행
-            txn_result = self.transaction.process_transaction("transaction", entity=query, user_id=session_id)
+            # 선택지 확답("예")은 주문 상태 변경의 fsync까지 기다리므로 스레드에서 실행 (이벤트 루프가 막히지 않도록)
+            txn_result = await asyncio.to_thread(
+                self.transaction.process_transaction, "transaction", entity=query, user_id=session_id
+            )
             
             # 1. 메시지 결정 (LLM vs 서비스 메시지)
             # 트랜잭션 서비스가 명확한 메시지를 줬으면(예: 승인 대기, 선택지) 그걸 우선
-            if txn_result.get("status") in ["pending_approval", "multiple_choice", "cancelled"]:
+            if txn_result.get("status") in self.SERVICE_MESSAGE_STATUSES:
                 final_message = txn_result.get("message", "")
             else:
-                # 그 외(단순 조회 결과 등)는 LLM이 자연스럽게 다듬도록 함
-                final_message = await self._generate_llm_response(f"{intent} 담당", query, str(txn_result))
+                # 조회 결과는 템플릿으로 즉시 생성 (opt-in 인텐트만 LLM이 다듬음), 그 외는 LLM 답변
+                final_message = await self._render_transaction_message(
+                    intent, "transaction", f"{intent} 담당", query, txn_result, response_data,
+                    deadline=deadline, degraded_reasons=degraded_reasons
+                )
             
             response_data["data"] = txn_result
             
@@ -97,15 +176,20 @@ class CSAgent:
 
         elif intent == "ORDER_CANCEL":
             # 주문 취소
-            # TransactionService를 통해 취소 로직 실행 ("cancel" 의도 전달)
-            txn_result = self.transaction.process_transaction("cancel", entity=query, user_id=session_id)
+            # TransactionService를 통해 취소 로직 실행 ("cancel" 의도 전달, 승인 시 fsync 대기가 있어 스레드에서 실행)
+            txn_result = await asyncio.to_thread(
+                self.transaction.process_transaction, "cancel", entity=query, user_id=session_id
+            )
             
             # 메시지 결정
-            if txn_result.get("status") in ["pending_approval", "cancelled", "multiple_choice"]:
+            if txn_result.get("status") in self.SERVICE_MESSAGE_STATUSES:
                 final_message = txn_result.get("message", "")
             else:
-                 # 단순 안내나 실패 시 LLM 보정
-                final_message = await self._generate_llm_response("주문 취소 담당", query, str(txn_result))
+                 # 단순 안내나 실패 시 템플릿 안내 (opt-in 시 LLM 보정)
+                final_message = await self._render_transaction_message(
+                    intent, "cancel", "주문 취소 담당", query, txn_result, response_data,
+                    deadline=deadline, degraded_reasons=degraded_reasons
+                )
             
             response_data["data"] = txn_result
             
@@ -118,31 +202,138 @@ class CSAgent:
             
         elif intent == "ACCOUNT_MGMT":
             # [다이어그램 로직] 계정 관리 에이전트
-            final_message = await self._generate_llm_response("계정 관리", query)
+            final_message = await self._generate_or_fallback(
+                "계정 관리", query,
+                fallback=self.ACCOUNT_FALLBACK_MESSAGE, deadline=deadline, degraded_reasons=degraded_reasons
+            )
 
         response_data["message"] = final_message
+        timings["processing"] = time.perf_counter() - stage_started
 
         # ---------------------------------------------------------
         # Step 3: 출력 검증 필터 (Validation)
         # ---------------------------------------------------------
-        validation = self.validator.validate_response(
+        # 검증 판정이 저장된(검증된) 캐시 답변은 다시 검증하지 않음
+        if (response_data.get("data") or {}).get("verdict"):
+            response_data["validation"] = "cached"
+            return self._mark_degraded(response_data, degraded_reasons, timings)
+
+        # async 모드: 차단 대상 인텐트가 아니면 먼저 반환하고 사후 검증 (router → PostValidationWorker)
+        if not self.requires_blocking_validation(intent):
+            response_data["validation"] = "deferred"
+            return self._mark_degraded(response_data, degraded_reasons, timings)
+
+        # 임베딩 계산/LLM Judge가 이벤트 루프를 막지 않도록 스레드에서 실행
+        stage_started = time.perf_counter()
+        validation = await asyncio.to_thread(
+            self.validator.validate_response,
             query=query,
             response=str(response_data.get("message", "")),
-            conversation_history=conversation_history or [] 
+            conversation_history=conversation_history or [],
+            check_topic=self.uses_topic_check(response_data)
         )
         
+        self.store_cached_verdict(query, response_data, validation)
+        timings["validation"] = time.perf_counter() - stage_started
+
         # [다이어그램 로직] 부적절함 판별 시 메시지 차단
-        if not validation["valid"]:
+        # 단, 이미 반영된 트랜잭션(취소 완료/철회)의 결과 안내는 바꾸지 않고 기록만 남김
+        if not validation["valid"] and self._is_committed_transaction(response_data):
+             logger.warning(f"[검증 실패, 반영된 트랜잭션이라 응답 유지] tier={validation.get('tier')}, issues={validation['issues']}")
+             response_data["validation_issues"] = validation["issues"]
+        elif not validation["valid"]:
+             logger.warning(f"[응답 차단] tier={validation.get('tier')}, issues={validation['issues']}")
              response_data["message"] = "도움을 드릴 수 없습니다. (정책 위반 답변 차단)"
              response_data["blocked"] = True
 
+        return self._mark_degraded(response_data, degraded_reasons, timings)
+
+    def requires_blocking_validation(self, intent: str) -> bool:
+        """응답 반환 전에 검증해야 하는지 (blocking 모드이거나 VALIDATION_BLOCKING_INTENTS에 속한 인텐트)"""
+        return settings.VALIDATION_MODE != "async" or intent in settings.VALIDATION_BLOCKING_INTENTS
+
+    def uses_topic_check(self, response_data: dict) -> bool:
+        """
+        질의/응답 주제 일관성 검사 대상인지
+        템플릿 응답과 트랜잭션 서비스 메시지는 질의("예", "ORD-001 취소")와 어휘가 겹치지 않는 고정 안내라 제외합니다.
+        """
+        if response_data.get("templated"):
+            return False
+        status = (response_data.get("data") or {}).get("status")
+        return status not in self.SERVICE_MESSAGE_STATUSES | self.COMMITTED_STATUSES
+
+    def _is_committed_transaction(self, response_data: dict) -> bool:
+        return (response_data.get("data") or {}).get("status") in self.COMMITTED_STATUSES
+
+    def _is_cached_answer(self, response_data: dict) -> bool:
+        """캐시에서 나왔거나 새로 캐시에 추가된 TECH_SUPPORT 답변인지"""
+        data = response_data.get("data") or {}
+        return response_data.get("intent") == "TECH_SUPPORT" and bool(data.get("from_cache") or data.get("pending_verification"))
+
+    def reject_cached_answer(self, query: str, response_data: dict, reason: str) -> bool:
+        """
+        사후 검증에서 실패한 지식 답변을 답변 캐시에서 거부 처리합니다. (처리했으면 True)
+        항목은 응답의 cache_key로 찾습니다. (대화 맥락으로 카테고리가 바뀌어 저장된 항목 포함)
+        """
+        if not self._is_cached_answer(response_data) or not response_data.get("cache_key"):
+            return False
+        return self.knowledge.reject_cached_answer(response_data["cache_key"], reason=f"사후 검증 실패: {reason}")
+
+    def store_cached_verdict(self, query: str, response_data: dict, validation: dict) -> bool:
+        """검증을 통과한 지식 답변의 판정을 캐시 항목(cache_key)에 저장합니다. (검증된 항목이면 다음 히트부터 검증 생략)"""
+        if not validation["valid"] or not self._is_cached_answer(response_data) or not response_data.get("cache_key"):
+            return False
+        return self.knowledge.record_verdict(response_data["cache_key"], verdict=validation)
+
+    def _mark_degraded(self, response_data: dict, degraded_reasons: list, timings: dict = None) -> dict:
+        """대체 경로를 거친 응답에 degraded 표시 (+ 단계별 소요 시간 ms)"""
+        if degraded_reasons:
+            response_data["degraded"] = True
+            response_data["degraded_reasons"] = degraded_reasons
+        if timings is not None:
+            response_data["timings_ms"] = {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()}
         return response_data
 
-    async def _generate_llm_response(self, role: str, query: str, context: str = ""):
+    async def _render_transaction_message(self, intent: str, action: str, role: str, query: str, txn_result: dict,
+                                          response_data: dict, deadline: Deadline = None, degraded_reasons: list = None):
+        """
+        트랜잭션 결과 메시지를 템플릿으로 만듭니다.
+        주문 조회/취소 결과(TEMPLATED_STATUSES)가 아니거나 settings.LLM_REPHRASE_INTENTS에 포함된 인텐트면
+        LLM으로 답변하고, 실패 시 템플릿 메시지를 사용합니다.
+        """
+        templated = self.templates.render_or_default(action, txn_result)
+        if txn_result.get("status") in TEMPLATED_STATUSES and intent not in settings.LLM_REPHRASE_INTENTS:
+            response_data["templated"] = True
+            return templated
+        return await self._generate_or_fallback(
+            role, query, str(txn_result),
+            fallback=templated, deadline=deadline, degraded_reasons=degraded_reasons
+        )
+
+    async def _generate_or_fallback(self, role: str, query: str, context: str = "", fallback: str = "",
+                                    deadline: Deadline = None, degraded_reasons: list = None):
+        """LLM 답변 생성, 마감 초과/서킷 오픈/호출 오류 시 fallback 메시지 반환"""
+        try:
+            return await self._generate_llm_response(role, query, context, deadline=deadline)
+        except DependencyUnavailable as e:
+            logger.warning(f"[생성 대체 응답 사용]: {e}")
+            if degraded_reasons is not None:
+                degraded_reasons.append(f"generation:{e.reason}")
+            return fallback
+        except Exception as e:
+            # API 오류 등 (브레이커에는 실패로 기록됨)
+            logger.error(f"[생성 실패, 대체 응답 사용]: {e}")
+            if degraded_reasons is not None:
+                degraded_reasons.append("generation:error")
+            return fallback
+
+    async def _generate_llm_response(self, role: str, query: str, context: str = "", deadline: Deadline = None):
         """분류된 에이전트 페르소나를 가지고 동적 답변 생성"""
+        from langchain.schema import HumanMessage, SystemMessage
+
         prompt = [
             SystemMessage(content=f"당신은 {role} 전문가입니다. 다음 컨텍스트를 참고하여 사용자에게 친절하고 구체적으로 답하세요: {context}"),
             HumanMessage(content=query)
         ]
-        res = await self.llm.ainvoke(prompt)
+        res = await self.llm_breaker.acall(self.llm.ainvoke, prompt, deadline=deadline)
         return res.content
\ No newline at end of file
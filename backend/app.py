@@ -1,8 +1,44 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from router import router
+from fastapi.responses import JSONResponse
+from router import router, agent, history_service, history_writer, post_validation
+from services.http_client import get_client_factory
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="Smart CS Agent API")
+logger = logging.getLogger("CS_App")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 포트 바인딩을 막지 않도록 무거운 컴포넌트 로드는 백그라운드 스레드에서 수행
+    warmup_task = asyncio.create_task(asyncio.to_thread(agent.warmup))
+    warmup_task.add_done_callback(_log_warmup_result)
+    history_writer.start()
+    post_validation.start()
+    yield
+    # 대기 중인 사후 검증을 마무리 (검증 결과 저장소/LLM 클라이언트를 닫기 전에)
+    await post_validation.stop()
+    # 대기 중인 대화 기록을 모두 저장한 뒤 저장소 종료
+    await history_writer.stop()
+    if not warmup_task.done():
+        warmup_task.cancel()
+    if agent.ready:
+        # 승인 대기 만료 정리 스레드 종료 + 주문 저널 fsync 대기분 반영
+        agent.transaction.close()
+        # 답변 캐시 저널 fsync 대기분 반영
+        agent.knowledge.close()
+    history_service.close()
+    await get_client_factory().aclose()
+
+
+def _log_warmup_result(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        logger.error(f"[Warmup 실패]: {task.exception()}")
+
+
+app = FastAPI(title="Smart CS Agent API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,3 +53,20 @@ app.include_router(router)
 @app.get("/")
 async def root():
     return {"message": "Smart CS Agent Backend is running."}
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: 프로세스가 요청을 받을 수 있는지 확인"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 모델, 인덱스, 캐시 로드가 끝났는지 확인"""
+    body = {
+        "status": "ready" if agent.ready else "warming_up",
+        "components": agent.warmup_durations
+    }
+    if agent.warmup_error:
+        body["status"] = "failed"
+        body["error"] = agent.warmup_error
+    return JSONResponse(status_code=200 if agent.ready else 503, content=body)
@@ -0,0 +1,91 @@
+"""
+답변 캐시 벤치마크 (AnswerCache.add / get / get_stats)
+
+임시 디렉토리의 캐시 파일에 항목을 미리 채운 뒤(기본 1,000 / 10,000 / 100,000건)
+추가(저널 기록 + 통계 갱신, compact_every마다 백그라운드 스냅샷 포함), 조회(히트/미스, 키 정규화 포함),
+통계 조회 지연을 측정합니다. 실제 data/answer_cache.json은 사용하지 않습니다.
+캐시 크기별로 기준값을 따로 저장합니다. (answer_cache_{항목 수})
+
+사용법 (backend 디렉토리에서):
+    python benchmarks/bench_answer_cache.py
+    python benchmarks/bench_answer_cache.py --sizes 1000 100000 --iterations 2000
+    python benchmarks/bench_answer_cache.py --update-baseline
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import finish, time_calls
+
+from services.knowledge import AnswerCache
+
+CATEGORY = "tech_support"
+SYMPTOMS = ["로그인이 안돼요", "앱이 자꾸 꺼져요", "결제 오류가 나요", "와이파이가 안 잡혀요", "화면이 멈춰요"]
+ANSWER = "1. 앱을 최신 버전으로 업데이트해주세요.\n2. 캐시를 삭제한 뒤 다시 시도해주세요.\n3. 문제가 계속되면 고객센터로 문의해주세요."
+
+
+def make_query(i: int) -> str:
+    return f"제품{i}번 {SYMPTOMS[i % len(SYMPTOMS)]}"
+
+
+def run(size: int, iterations: int, seed: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_file = os.path.join(tmp_dir, "answer_cache.json")
+        # 파일이 없으면 AnswerCache가 data/answer_cache.json을 찾아가므로 빈 캐시 파일을 먼저 생성
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            f.write("{}")
+        cache = AnswerCache(cache_file)
+
+        started = time.perf_counter()
+        cache.add_many([{'query': make_query(i), 'answer': ANSWER, 'category': CATEGORY, 'verified': True}
+                        for i in range(size)])
+        results["populate_s"] = time.perf_counter() - started
+
+        rng = random.Random(seed)
+        adds = [(make_query(size + i), ANSWER, CATEGORY) for i in range(iterations)]
+        add = time_calls(cache.add, adds)
+        results["add_p50_ms"] = add["p50_ms"]
+        results["add_p95_ms"] = add["p95_ms"]
+
+        # 히트: 띄어쓰기/문장부호가 다른 표현으로 조회 (정규화 비용 포함)
+        hits = [(make_query(rng.randrange(size)).replace(" ", "  ") + "!!", CATEGORY) for _ in range(iterations)]
+        hit = time_calls(cache.get, hits)
+        assert cache.hits == iterations, f"히트 조회 중 미스 발생: {cache.hits}/{iterations}"
+        results["get_hit_p50_ms"] = hit["p50_ms"]
+        results["get_hit_p95_ms"] = hit["p95_ms"]
+
+        misses = [(f"없는 질문 {i}", CATEGORY) for i in range(iterations)]
+        results["get_miss_p50_ms"] = time_calls(cache.get, misses)["p50_ms"]
+        results["get_stats_p50_ms"] = time_calls(cache.get_stats, [()] * iterations)["p50_ms"]
+        cache.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="답변 캐시 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # 항목별 INFO 로그(캐시 추가/히트)가 측정을 덮지 않도록
+    logging.getLogger("services.knowledge").setLevel(logging.WARNING)
+
+    exit_code = 0
+    for size in args.sizes:
+        print(f"캐시 {size:,}건")
+        results = run(size, args.iterations, args.seed)
+        exit_code |= finish(f"answer_cache_{size}", results, args.update_baseline, args.tolerance, min_delta=0.05)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+/chat 엔드투엔드 부하 테스트
+
+로컬 가짜 LLM 서버(tools/fake_llm_server.py)를 띄우고, backend를 임시 디렉토리에 복사한 샌드박스에서
+uvicorn 서버를 실행한 뒤 실제 인텐트 비율의 질문을 목표 동시성으로 보냅니다.
+- 질문: cases.csv 예문 + history.csv 질문, 인텐트 비율은 history.csv 기준 (+1 보정, --mix uniform 가능)
+- 결과: 지연 p50/p95/p99, 처리량, 상태 코드별 건수, 인텐트별 지연,
+  단계별(분류/처리/검증) 지연 (응답의 timings_ms), 가짜 LLM 서버 요청/오류 수,
+  지식 검색 동시 실행 정도 (knowledge_overlap: 1 이하면 검색이 이벤트 루프를 막아 직렬로 실행된 것)
+- 기준값 이름에 BASELINE_VERSION 포함: 지식 검색을 스레드로 옮기기 전(v1)에 기록한 기준값은 비교하지 않음
+- 샌드박스에서 실행하므로 data/의 대화 기록, 답변 캐시, 주문 파일은 바뀌지 않음
+- 외부 네트워크 없이 실행 (임베딩 모델은 로컬 캐시에 있어야 함)
+
+사용법 (backend 디렉토리에서):
+    python benchmarks/bench_chat_load.py --requests 500 --concurrency 16 --llm-latency-ms 300 --llm-jitter-ms 100
+    python benchmarks/bench_chat_load.py --llm-error-rate 0.05 --env VALIDATION_MODE=async
+    python benchmarks/bench_chat_load.py --update-baseline
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from common import BACKEND_DIR, REGRESSION_EXIT_CODE, find_regressions, load_baseline, save_baseline
+
+from tools.fake_llm_server import start_fake_llm_server
+
+DATA_DIR = BACKEND_DIR / "data"
+# 샌드박스로 복사하지 않을 파일 (로컬 DB/저널, 캐시, 기준값)
+SANDBOX_IGNORE = shutil.ignore_patterns("__pycache__", "*.db", "*.db-wal", "*.db-shm", "*.journal", "*.tmp", "baselines")
+# 지식 검색이 이벤트 루프를 막던 시점(v1)의 기준값은 동시성 수치가 왜곡되어 있으므로 버전을 올려 새로 기록
+BASELINE_VERSION = 2
+
+
+def _read_csv(path) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def build_workload(n_requests: int, n_users: int, mix: str, seed: int) -> List[Tuple[str, str, str]]:
+    """(user_id, 기대 인텐트, 질문) 목록 - cases.csv 인텐트 기준, 비율은 history.csv"""
+    pools = defaultdict(list)
+    for row in _read_csv(DATA_DIR / "cases.csv"):
+        pools[row['intent']].append(row['page_content'])
+    history = [row for row in _read_csv(DATA_DIR / "history.csv") if row.get('intent') in pools]
+    for row in history:
+        pools[row['intent']].append(row['query'])
+
+    intents = sorted(pools)
+    if mix == "history":
+        # 기록에 없는 인텐트도 한 번씩은 나오도록 +1 보정
+        counts = Counter(row['intent'] for row in history)
+        weights = [counts[intent] + 1 for intent in intents]
+    else:
+        weights = [1] * len(intents)
+
+    rng = random.Random(seed)
+    workload = []
+    for i, intent in enumerate(rng.choices(intents, weights=weights, k=n_requests)):
+        workload.append((f"load_{i % n_users:04d}", intent, rng.choice(pools[intent])))
+    return workload
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """nearest-rank 백분위 (samples는 정렬된 상태)"""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, max(0, int(round(pct / 100 * len(samples))) - 1))]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(sandbox_dir: str, port: int, env: Dict[str, str], startup_timeout: float) -> subprocess.Popen:
+    """샌드박스 backend에서 uvicorn을 띄우고 /readyz가 200이 될 때까지 기다립니다."""
+    import httpx
+
+    log = open(os.path.join(sandbox_dir, "server.log"), "w", encoding="utf-8")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=sandbox_dir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    proc.log_file = log
+    started = time.perf_counter()
+    while time.perf_counter() - started < startup_timeout:
+        if proc.poll() is not None:
+            break
+        try:
+            response = httpx.get(f"http://127.0.0.1:{port}/readyz", timeout=2)
+            if response.status_code == 200:
+                print(f"서버 준비 완료: {time.perf_counter() - started:.1f}s {response.json().get('components')}")
+                return proc
+            if response.json().get("status") == "failed":
+                break
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+
+    stop_app(proc)
+    with open(os.path.join(sandbox_dir, "server.log"), encoding="utf-8") as f:
+        tail = f.read()[-3000:]
+    raise RuntimeError(f"서버 기동 실패 (exit={proc.returncode})\n{tail}")
+
+
+def stop_app(proc: subprocess.Popen):
+    """SIGTERM으로 종료 (lifespan 종료 처리: 대기 중인 기록 저장 등)"""
+    if proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+    # 임시 디렉토리 삭제 전에 로그 파일을 닫음 (Windows)
+    proc.log_file.close()
+
+
+async def drive(base_url: str, workload: List[Tuple[str, str, str]], concurrency: int, timeout: float) -> Tuple[List[Dict], float]:
+    """concurrency개의 워커가 workload를 나눠 보냅니다. Returns: (요청별 결과, 총 소요 시간)"""
+    import httpx
+
+    queue = asyncio.Queue()
+    for item in workload:
+        queue.put_nowait(item)
+    samples = []
+
+    async def worker(client):
+        while True:
+            try:
+                user_id, expected, query = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            sample = {"expected_intent": expected}
+            try:
+                response = await client.post("/chat", json={"query": query, "user_id": user_id, "conversation_history": []})
+                sample["status"] = response.status_code
+                if response.status_code == 200:
+                    body = response.json()
+                    sample["intent"] = body.get("intent")
+                    sample["timings_ms"] = body.get("timings_ms") or {}
+                    sample["degraded"] = bool(body.get("degraded"))
+                    sample["from_cache"] = bool(body.get("from_cache"))
+            except httpx.HTTPError as e:
+                sample["status"] = type(e).__name__
+            sample["latency_ms"] = (time.perf_counter() - started) * 1000
+            samples.append(sample)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return samples, elapsed
+
+
+def summarize(samples: List[Dict], elapsed: float) -> Tuple[Dict[str, float], Dict]:
+    """(기준값 비교용 수치, 상세 리포트)"""
+    ok = [s for s in samples if s["status"] == 200]
+    latencies = sorted(s["latency_ms"] for s in ok)
+    results = {
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+        "latency_p99_ms": percentile(latencies, 99),
+        # 처리량의 역수 (작을수록 좋음 → find_regressions로 비교)
+        "ms_per_request": elapsed * 1000 / max(len(samples), 1),
+        "error_rate": 1 - len(ok) / max(len(samples), 1),
+    }
+
+    stage_samples = defaultdict(list)
+    for sample in ok:
+        for stage, ms in sample["timings_ms"].items():
+            stage_samples[stage].append(ms)
+    for stage, values in stage_samples.items():
+        values.sort()
+        results[f"stage_{stage}_p50_ms"] = percentile(values, 50)
+        results[f"stage_{stage}_p95_ms"] = percentile(values, 95)
+
+    by_intent = defaultdict(list)
+    for sample in ok:
+        by_intent[sample["expected_intent"]].append(sample["latency_ms"])
+    # 지식 검색 처리 시간 합 / 총 소요 시간: 검색이 동시에 진행되면 1보다 큼 (루프를 막으면 1 이하)
+    knowledge_ms = sum(s["timings_ms"].get("processing", 0.0) for s in ok if s.get("intent") == "TECH_SUPPORT")
+    report = {
+        "requests": len(samples),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "status": dict(Counter(str(s["status"]) for s in samples)),
+        "degraded": sum(1 for s in ok if s.get("degraded")),
+        "from_cache": sum(1 for s in ok if s.get("from_cache")),
+        "intent_match_rate": round(sum(1 for s in ok if s.get("intent") == s["expected_intent"]) / max(len(ok), 1), 3),
+        "knowledge_overlap": round(knowledge_ms / (elapsed * 1000), 2) if elapsed else 0.0,
+        "by_intent": {
+            intent: {"count": len(values), "p50_ms": round(percentile(sorted(values), 50), 1),
+                     "p95_ms": round(percentile(sorted(values), 95), 1)}
+            for intent, values in sorted(by_intent.items())
+        },
+    }
+    return results, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/chat 엔드투엔드 부하 테스트 (로컬 가짜 LLM 서버)")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=200, help="요청을 나눠 보낼 사용자 수")
+    parser.add_argument("--warmup-requests", type=int, default=20, help="측정 전 예열 요청 수 (집계 제외)")
+    parser.add_argument("--mix", choices=["history", "uniform"], default="history")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--keep-admission-limits", action="store_true",
+                        help="사용자별 속도 제한을 풀지 않음 (기본: 부하 생성기가 막히지 않도록 완화)")
+    parser.add_argument("--env", action="append", default=[], help="서버 환경 변수 KEY=VALUE (여러 번 지정 가능)")
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--report", help="상세 결과 JSON 저장 경로")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    workload = build_workload(args.warmup_requests + args.requests, args.users, args.mix, args.seed)
+    warmup, workload = workload[:args.warmup_requests], workload[args.warmup_requests:]
+    print(f"요청 {len(workload)}건 (예열 {len(warmup)}건), 동시성 {args.concurrency}, "
+          f"인텐트 {dict(Counter(intent for _, intent, _ in workload))}")
+
+    llm_server = start_fake_llm_server(latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms,
+                                       error_rate=args.llm_error_rate, seed=args.seed)
+    llm_base_url = f"http://127.0.0.1:{llm_server.server_port}/v1"
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_BASE_URL": llm_base_url,
+        "OPENAI_API_KEY": "local",
+        "UPSTAGE_BASE_URL": llm_base_url,
+        "UPSTAGE_API_KEY": "local",
+        "HF_HUB_OFFLINE": "1",
+        "TRANSFORMERS_OFFLINE": "1",
+    })
+    if not args.keep_admission_limits:
+        env.update({"CHAT_RATE_PER_USER": "1000", "CHAT_BURST_PER_USER": "1000"})
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sandbox_dir = os.path.join(tmp_dir, "backend")
+        shutil.copytree(BACKEND_DIR, sandbox_dir, ignore=SANDBOX_IGNORE)
+        port = _free_port()
+        proc = start_app(sandbox_dir, port, env, args.startup_timeout)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            if warmup:
+                asyncio.run(drive(base_url, warmup, args.concurrency, args.request_timeout))
+            llm_before = llm_server.stats()
+            samples, elapsed = asyncio.run(drive(base_url, workload, args.concurrency, args.request_timeout))
+            llm_after = llm_server.stats()
+        finally:
+            stop_app(proc)
+            llm_server.shutdown()
+
+    results, report = summarize(samples, elapsed)
+    report["llm"] = {key: llm_after[key] - llm_before[key] for key in ("requests", "completions", "errors")}
+    report["llm"]["calls_per_request"] = round(report["llm"]["requests"] / max(len(samples), 1), 2)
+
+    print(f"\n처리량: {report['throughput_rps']} req/s ({report['elapsed_s']}s), 상태: {report['status']}")
+    for key, value in results.items():
+        print(f"{key:<36} {value:>12.4f}")
+    print(f"인텐트 일치율: {report['intent_match_rate']}, degraded: {report['degraded']}, 캐시 응답: {report['from_cache']}")
+    for intent, stats in report["by_intent"].items():
+        print(f"  {intent:<14} {stats['count']:>5}건  p50 {stats['p50_ms']:>8.1f}ms  p95 {stats['p95_ms']:>8.1f}ms")
+    print(f"가짜 LLM: {report['llm']}")
+    print(f"지식 검색 동시 실행 정도: {report['knowledge_overlap']}")
+    if args.concurrency > 1 and report["knowledge_overlap"] <= 1.0 and report["by_intent"].get("TECH_SUPPORT", {}).get("count", 0) >= args.concurrency:
+        print("[WARN] 지식 검색이 직렬로 실행됨 (이벤트 루프 차단 의심) - 이 결과로 기준값을 기록하지 마세요")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({"results": results, **report}, f, ensure_ascii=False, indent=2)
+
+    baseline_name = f"chat_load_v{BASELINE_VERSION}_c{args.concurrency}_llm{int(args.llm_latency_ms)}ms"
+    if args.update_baseline:
+        save_baseline(baseline_name, results)
+        return
+
+    baseline = load_baseline(baseline_name)
+    # 지연(ms)은 5ms 미만 증가를 노이즈로 보고, 오류율은 2%p 이상 늘어난 경우만 회귀
+    timing = {k: v for k, v in results.items() if k != "error_rate"}
+    regressions = find_regressions(timing, baseline, args.tolerance, min_delta=5.0)
+    regressions += find_regressions({"error_rate": results["error_rate"]}, baseline, args.tolerance, min_delta=0.02)
+    for message in regressions:
+        print(f"[REGRESSION] {message}")
+    sys.exit(REGRESSION_EXIT_CODE if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+분류 규칙 벤치마크 (_get_keyword_intent / _detect_guardrails)
+
+LLM/임베딩 호출 전에 모든 질문이 거치는 규칙 검사의 호출당 시간(µs)을 측정합니다.
+질문은 cases.csv 예문 + history.csv 질문을 사용하고, 길이에 따른 변화를 보기 위해
+질문을 반복해 늘린 긴 입력도 함께 측정합니다.
+(LangChain/임베딩 모델을 로드하지 않도록 서비스 초기화 없이 규칙 메서드만 호출)
+
+사용법 (backend 디렉토리에서):
+    python benchmarks/bench_classification.py
+    python benchmarks/bench_classification.py --update-baseline
+"""
+
+import argparse
+import csv
+import sys
+from typing import List
+
+from common import BACKEND_DIR, finish, time_per_call_us
+
+from services.classification import ClassificationService
+
+BASELINE_NAME = "classification_rules"
+
+
+def load_queries() -> List[str]:
+    queries = []
+    for name, column in (("cases.csv", "page_content"), ("history.csv", "query")):
+        path = BACKEND_DIR / "data" / name
+        if path.exists():
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                queries += [row[column] for row in csv.DictReader(f) if row.get(column)]
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="분류 규칙 벤치마크")
+    parser.add_argument("--repeat", type=int, default=20, help="전체 질문 반복 횟수 (최솟값 사용)")
+    parser.add_argument("--long-factor", type=int, default=20, help="긴 입력: 질문을 이 횟수만큼 이어 붙임")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # 규칙 메서드는 인스턴스 상태를 쓰지 않음 → __init__(모델 로드) 생략
+    service = ClassificationService.__new__(ClassificationService)
+    queries = load_queries()
+    long_queries = [" ".join([query] * args.long_factor) for query in queries]
+    print(f"질문 {len(queries)}건 (평균 {sum(map(len, queries)) / len(queries):.0f}자), 긴 입력 x{args.long_factor}")
+
+    results = {}
+    for label, inputs in (("", queries), ("long_", long_queries)):
+        calls = [(query,) for query in inputs]
+        results[f"{label}keyword_intent_us"] = time_per_call_us(service._get_keyword_intent, calls, args.repeat)
+        results[f"{label}guardrails_us"] = time_per_call_us(service._detect_guardrails, calls, args.repeat)
+
+    sys.exit(finish(BASELINE_NAME, results, args.update_baseline, args.tolerance, min_delta=0.5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+대화 기록 저장소 벤치마크 (get_user_history / get_user_history_page / update_feedback)
+
+합성 대화 기록(기본 10,000 / 100,000건, 사용자당 약 50건)을 임시 디렉토리에 만들고
+CSV 저장소(HistoryService)와 SQLite 저장소(SQLiteHistoryService)의 조회/피드백 갱신 지연을 측정합니다.
+CSV 조회는 첫 호출에서만 파일 전체를 읽어 위치 인덱스를 만들고, 피드백 갱신은 파일을 다시 쓰므로 기록 수에 비례합니다.
+저장소/기록 수별로 기준값을 따로 저장합니다. (history_{backend}_{기록 수})
+
+사용법 (backend 디렉토리에서):
+    python benchmarks/bench_history.py
+    python benchmarks/bench_history.py --records 1000000 --backend sqlite
+    python benchmarks/bench_history.py --update-baseline
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from common import finish, time_calls
+
+from services.history import HISTORY_FIELDS, HistoryService, SQLiteHistoryService
+
+INTENTS = ["TECH_SUPPORT", "ORDER", "ORDER_CANCEL", "BILLING", "ACCOUNT_MGMT", "OFF_TOPIC"]
+
+
+def generate_history_csv(path: str, n_records: int, n_users: int, seed: int = 42):
+    """최근 90일에 걸친 합성 대화 기록을 CSV로 저장합니다."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(HISTORY_FIELDS)
+        for i in range(1, n_records + 1):
+            timestamp = now - timedelta(seconds=rng.randrange(0, 90 * 24 * 3600))
+            writer.writerow([
+                f"{int(timestamp.timestamp() * 1000)}-{i}",
+                f"user_{rng.randrange(1, n_users + 1):06d}",
+                timestamp.strftime("%Y-%m-%d %H:%M"),
+                f"합성 질문 {i}",
+                rng.choice(INTENTS),
+                "합성 응답입니다. 문제가 계속되면 고객센터로 문의해주세요.",
+                "", "", "",
+            ])
+
+
+def run(backend: str, n_records: int, iterations: int, seed: int) -> dict:
+    results = {}
+    n_users = max(1, n_records // 50)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "history.csv")
+        started = time.perf_counter()
+        generate_history_csv(csv_path, n_records, n_users, seed)
+        print(f"[{backend}] 합성 기록 {n_records:,}건 생성: {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        if backend == "sqlite":
+            store = SQLiteHistoryService(os.path.join(tmp_dir, "history.db"), seed_csv_path=csv_path)
+        else:
+            store = HistoryService(csv_path)
+        results["load_s"] = time.perf_counter() - started
+
+        rng = random.Random(seed + 1)
+        users = [(f"user_{rng.randrange(1, n_users + 1):06d}",) for _ in range(iterations)]
+        history = time_calls(store.get_user_history, users)
+        results["get_user_history_p50_ms"] = history["p50_ms"]
+        results["get_user_history_p95_ms"] = history["p95_ms"]
+        # /history 기본 페이지 (CSV도 위치 인덱스로 페이지 행만 읽음)
+        page = time_calls(lambda user_id: store.get_user_history_page(user_id, 20), users)
+        results["get_user_history_page_p50_ms"] = page["p50_ms"]
+        results["get_user_history_page_p95_ms"] = page["p95_ms"]
+
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            ids = [row['id'] for row in csv.DictReader(f)]
+        updates = [(rng.choice(ids), rng.choice(["good", "bad"])) for _ in range(iterations)]
+        feedback = time_calls(store.update_feedback, updates)
+        results["update_feedback_p50_ms"] = feedback["p50_ms"]
+        results["update_feedback_p95_ms"] = feedback["p95_ms"]
+        store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대화 기록 저장소 벤치마크")
+    parser.add_argument("--records", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--backend", choices=["csv", "sqlite", "all"], default="all")
+    parser.add_argument("--iterations", type=int, default=30, help="작업별 호출 횟수 (CSV 피드백 갱신은 호출마다 파일 전체를 다시 씀)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    backends = ["csv", "sqlite"] if args.backend == "all" else [args.backend]
+    exit_code = 0
+    for backend in backends:
+        for n_records in args.records:
+            results = run(backend, n_records, args.iterations, args.seed)
+            exit_code |= finish(f"history_{backend}_{n_records}", results, args.update_baseline,
+                                args.tolerance, min_delta=0.05)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+지식 검색 벤치마크 (_search_faq / 임베딩 encode)
+
+- encode: 배치 크기별 호출 지연과 문장당 지연 (settings.EMBEDDING_MODEL)
+- _search_faq: FAQ 코퍼스 크기별 검색 지연 (질문 임베딩 + FAISS 검색 + 카테고리 필터)와
+  FAISS 검색만의 지연
+  코퍼스는 실제 FAQ 임베딩에 작은 잡음을 더해 늘립니다. (검색 비용은 벡터 수에 비례하고,
+  수만 건을 실제로 임베딩하면 측정보다 준비 시간이 더 길어지므로)
+- 네트워크를 쓰지 않음 (HF_HUB_OFFLINE=1, 임베딩 모델이 로컬 캐시에 있어야 함)
+- faiss / sentence_transformers / 모델 캐시가 없으면 건너뜀 (종료 코드 77)
+
+사용법 (backend 디렉토리에서):
+    python benchmarks/bench_knowledge.py
+    python benchmarks/bench_knowledge.py --corpus-sizes 100 1000 10000 100000 --batch-sizes 1 16 64
+    python benchmarks/bench_knowledge.py --update-baseline
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from typing import Dict, List
+
+from common import BACKEND_DIR, SKIP_EXIT_CODE, finish, time_calls
+
+BASELINE_NAME = "knowledge_search"
+CATEGORY = "tech_support"
+
+
+def load_faqs() -> List[Dict]:
+    with open(BACKEND_DIR / "data" / "faq_database.csv", 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def load_queries(faqs: List[Dict]) -> List[str]:
+    """FAQ 질문 + cases.csv의 TECH_SUPPORT 예문"""
+    queries = [row['question'] for row in faqs if row.get('category') == CATEGORY]
+    with open(BACKEND_DIR / "data" / "cases.csv", 'r', encoding='utf-8', newline='') as f:
+        queries += [row['page_content'] for row in csv.DictReader(f) if row.get('intent') == "TECH_SUPPORT"]
+    return queries
+
+
+def build_service(model, faqs: List[Dict], embeddings, size: int, noise: float, seed: int):
+    """FAQ를 size건으로 늘린 검색 전용 서비스 (LLM 클라이언트/답변 캐시 초기화 없음)"""
+    import faiss
+    import numpy as np
+
+    from services.knowledge import CachedRAGKnowledgeService
+
+    positions = np.arange(size) % len(faqs)
+    vectors = embeddings[positions].copy()
+    # 원본 FAQ(처음 len(faqs)건)는 그대로, 복제본에만 잡음
+    jitter = np.random.default_rng(seed).normal(0, noise, vectors.shape).astype('float32')
+    jitter[:len(faqs)] = 0
+    vectors += jitter
+    faiss.normalize_L2(vectors)
+
+    service = CachedRAGKnowledgeService.__new__(CachedRAGKnowledgeService)
+    service.model = model
+    service.dimension = vectors.shape[1]
+    service.faqs = [dict(faqs[pos], id=f"{faqs[pos]['id']}-{i}") for i, pos in enumerate(positions)]
+    service.index = faiss.IndexFlatIP(service.dimension)
+    service.index.add(vectors)
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="지식 검색 벤치마크")
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 50_000])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--iterations", type=int, default=200, help="코퍼스 크기별 검색 횟수")
+    parser.add_argument("--encode-rounds", type=int, default=10, help="배치 크기별 encode 횟수")
+    parser.add_argument("--noise", type=float, default=0.05, help="복제 FAQ 임베딩에 더할 잡음 표준편차")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    try:
+        import faiss
+        from sentence_transformers import SentenceTransformer
+
+        import settings
+        started = time.perf_counter()
+        model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    except (ImportError, OSError) as e:
+        print(f"건너뜀: {e}")
+        sys.exit(SKIP_EXIT_CODE)
+    print(f"임베딩 모델 로드: {time.perf_counter() - started:.1f}s ({settings.EMBEDDING_MODEL})")
+
+    faqs = load_faqs()
+    queries = load_queries(faqs)
+    texts = [(row.get('question') or "") + (" " + row['keywords'].replace(',', ' ') if row.get('keywords') else "")
+             for row in faqs]
+    embeddings = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+    # 첫 호출 지연(스레드 풀 초기화 등) 제외
+    model.encode(queries[:8], convert_to_numpy=True, show_progress_bar=False)
+
+    results = {}
+    for batch_size in args.batch_sizes:
+        batches = [([queries[(r * batch_size + i) % len(queries)] for i in range(batch_size)],)
+                   for r in range(args.encode_rounds)]
+        encode = time_calls(lambda batch: model.encode(batch, convert_to_numpy=True, show_progress_bar=False), batches)
+        results[f"encode_b{batch_size}_p50_ms"] = encode["p50_ms"]
+        results[f"encode_b{batch_size}_per_text_ms"] = encode["p50_ms"] / batch_size
+
+    calls = [(queries[i % len(queries)],) for i in range(args.iterations)]
+    query_vectors = model.encode([query for (query,) in calls], convert_to_numpy=True, show_progress_bar=False)
+    faiss.normalize_L2(query_vectors)
+    for size in args.corpus_sizes:
+        service = build_service(model, faqs, embeddings, size, args.noise, args.seed)
+        search = time_calls(lambda query: service._search_faq(query, CATEGORY, top_k=3, strict_category=True), calls)
+        results[f"search_faq_n{size}_p50_ms"] = search["p50_ms"]
+        results[f"search_faq_n{size}_p95_ms"] = search["p95_ms"]
+        # encode를 뺀 FAISS 검색만 (search_k = top_k * 5)
+        index_only = time_calls(lambda i: service.index.search(query_vectors[i:i + 1], 15),
+                                [(i,) for i in range(len(calls))])
+        results[f"faiss_search_n{size}_p50_ms"] = index_only["p50_ms"]
+
+    sys.exit(finish(BASELINE_NAME, results, args.update_baseline, args.tolerance, min_delta=0.2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+주문 조회/변경 벤치마크 (_find_recent_orders / process_transaction / update_status)
+
+합성 orders.csv(기본 10,000 / 100,000 / 1,000,000건)를 임시 디렉토리에 만들고,
+고객별 정렬 인덱스 기반 조회와 기존 방식(전체 주문 선형 스캔)을 비교합니다.
+주문 수별로 기준값을 따로 저장합니다. (orders_{backend}_{주문 수})
+
+사용법 (backend 디렉토리에서):
+    python benchmarks/bench_orders.py                       # 10k/100k/1M건, 기준값과 비교
+    python benchmarks/bench_orders.py --orders 100000 --backend sqlite
+    python benchmarks/bench_orders.py --update-baseline
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from common import REGRESSION_EXIT_CODE, find_regressions, load_baseline, save_baseline, time_calls
+
+from services.order_store import ORDER_FIELDS, IndexedCSVOrderRepository, SQLiteOrderRepository
+from services.transaction import TransactionService
+
+STATUSES = ["상품준비중", "배송중", "배송완료", "주문취소"]
+ITEMS = ["게이밍 노트북", "무선 마우스", "27인치 모니터", "기계식 키보드", "태블릿 PC", "블루투스 이어폰", "커피머신"]
+
+
+def generate_orders_csv(path: str, n_orders: int, n_customers: int, seed: int = 42):
+    """최근 1년에 걸친 합성 주문을 CSV로 저장합니다."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(ORDER_FIELDS)
+        for i in range(1, n_orders + 1):
+            customer = rng.randrange(1, n_customers + 1)
+            order_date = now - timedelta(seconds=rng.randrange(0, 365 * 24 * 3600))
+            writer.writerow([
+                f"ORD-{i:07d}",
+                rng.choice(ITEMS),
+                rng.choice(STATUSES),
+                f"고객{customer}",
+                f"user_{customer:06d}",
+                order_date.isoformat(timespec='seconds'),
+            ])
+
+
+def legacy_find_recent_orders(orders: Dict[str, Dict], user_id: str, status_filter: List[str], days_limit: int = 30):
+    """인덱스 도입 전 구현: 전체 주문 스캔 + 매번 날짜 파싱 + 정렬"""
+    user_orders = [o for o in orders.values() if o.get('customer_id') == user_id]
+    cutoff_date = datetime.now() - timedelta(days=days_limit)
+    recent_orders = []
+    for o in user_orders:
+        try:
+            if datetime.fromisoformat(o['order_date']) >= cutoff_date:
+                recent_orders.append(o)
+        except ValueError:
+            continue
+    if status_filter:
+        recent_orders = [o for o in recent_orders if o['status'] in status_filter]
+    recent_orders.sort(key=lambda x: x['order_date'], reverse=True)
+    return recent_orders
+
+
+def run(n_orders: int, n_customers: int, backend: str, iterations: int, legacy_iterations: int) -> Dict[str, float]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "orders.csv")
+        started = time.perf_counter()
+        generate_orders_csv(csv_path, n_orders, n_customers)
+        print(f"합성 주문 {n_orders:,}건 생성: {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        if backend == "sqlite":
+            store = SQLiteOrderRepository(os.path.join(tmp_dir, "orders.db"), seed_csv_path=csv_path)
+        else:
+            store = IndexedCSVOrderRepository(csv_path)
+        results["load_s"] = time.perf_counter() - started
+
+        service = TransactionService(order_store=store)
+        rng = random.Random(7)
+        users = [f"user_{rng.randrange(1, n_customers + 1):06d}" for _ in range(iterations)]
+        status_filter = ["배송중", "상품준비중", "배송완료"]
+
+        recent = time_calls(lambda u: service._find_recent_orders(u, status_filter=status_filter), [(u,) for u in users])
+        results["find_recent_orders_p50_ms"] = recent["p50_ms"]
+        results["find_recent_orders_p95_ms"] = recent["p95_ms"]
+
+        # 세션 상태가 누적되지 않도록 주문번호를 명시한 조회 메시지 사용
+        order_ids = [f"ORD-{rng.randrange(1, n_orders + 1):07d}" for _ in range(iterations)]
+        lookups = [(service.orders.get(oid)['customer_id'], oid) for oid in order_ids]
+        status_check = time_calls(
+            lambda u, oid: service.process_transaction("transaction", entity=f"{oid} 배송 조회", user_id=u),
+            lookups
+        )
+        results["process_transaction_p50_ms"] = status_check["p50_ms"]
+        results["process_transaction_p95_ms"] = status_check["p95_ms"]
+
+        # 주문 취소 1건 반영 비용 (저널 추가 / SQLite UPDATE)
+        cancel_ids = [f"ORD-{rng.randrange(1, n_orders + 1):07d}" for _ in range(iterations)]
+        cancel = time_calls(lambda oid: store.update_status(oid, "주문취소"), [(oid,) for oid in cancel_ids])
+        results["update_status_p50_ms"] = cancel["p50_ms"]
+        results["update_status_p95_ms"] = cancel["p95_ms"]
+        store.close()
+
+        if legacy_iterations and backend == "csv":
+            orders = {oid: store.get(oid) for oid in store._orders}
+            legacy = time_calls(
+                lambda u: legacy_find_recent_orders(orders, u, status_filter),
+                [(u,) for u in users[:legacy_iterations]]
+            )
+            results["legacy_find_recent_orders_p50_ms"] = legacy["p50_ms"]
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주문 조회 벤치마크")
+    parser.add_argument("--orders", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--customers", type=int, default=50_000, help="고객 수 (주문 수보다 크면 주문 수/20)")
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--legacy-iterations", type=int, default=5, help="기존 선형 스캔 비교 횟수 (0이면 생략)")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    regressions = []
+    for n_orders in args.orders:
+        # 고객당 주문 수가 주문 규모와 무관하게 비슷하도록 작은 규모에서는 고객 수를 줄임
+        n_customers = min(args.customers, max(1, n_orders // 20))
+        results = run(n_orders, n_customers, args.backend, args.iterations, args.legacy_iterations)
+        for key, value in results.items():
+            print(f"{key:<36} {value:>12.4f}")
+
+        baseline_name = f"orders_{args.backend}_{n_orders}"
+        if args.update_baseline:
+            save_baseline(baseline_name, results)
+            continue
+
+        # 비교 대상 구현(legacy)은 회귀 판정에서 제외
+        measured = {k: v for k, v in results.items() if not k.startswith("legacy_")}
+        regressions += [f"{baseline_name} {message}" for message in
+                        find_regressions(measured, load_baseline(baseline_name), args.tolerance, min_delta=0.05)]
+    for message in regressions:
+        print(f"[REGRESSION] {message}")
+    sys.exit(REGRESSION_EXIT_CODE if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
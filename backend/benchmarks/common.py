@@ -0,0 +1,129 @@
+"""
+벤치마크 공용 유틸리티
+- 기준값(baseline) JSON 저장/로드
+- 기준값 대비 회귀(regression) 판정
+- 호출 시간 측정 (호출별 p50/p95, 짧은 함수의 호출당 평균)
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# 선택 의존성(faiss 등)이 없어 측정을 건너뛴 경우의 종료 코드 (run_suite.py가 구분)
+SKIP_EXIT_CODE = 77
+# 기준값 대비 회귀 시 종료 코드 (처리되지 않은 예외의 종료 코드 1과 구분)
+REGRESSION_EXIT_CODE = 3
+# 저장된 기준값이 없어 비교하지 못한 경우의 종료 코드 (회귀 검사가 조용히 통과하지 않도록 실패로 취급)
+MISSING_BASELINE_EXIT_CODE = 4
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+# 벤치마크 스크립트를 어느 경로에서 실행해도 services/* 를 import 할 수 있도록 설정
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def load_baseline(name: str) -> Dict:
+    """저장된 기준값을 로드합니다. 없으면 빈 dict."""
+    path = BASELINE_DIR / f"{name}.json"
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(name: str, results: Dict):
+    """측정 결과를 기준값으로 저장합니다."""
+    BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+    path = BASELINE_DIR / f"{name}.json"
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    print(f"기준값 저장: {path}")
+
+
+def unchecked_keys(current: Dict[str, float], baseline: Dict[str, float]) -> List[str]:
+    """기준값에 없어 비교하지 못한 항목 (새로 추가한 측정 항목 등)"""
+    return sorted(key for key in current if key not in baseline)
+
+
+def find_regressions(current: Dict[str, float], baseline: Dict[str, float],
+                     tolerance: float = 0.2, min_delta: float = 0.0) -> List[str]:
+    """
+    기준값보다 tolerance 비율 이상 느려진 항목을 반환합니다.
+
+    Args:
+        current: 측정값 (작을수록 좋음)
+        baseline: 기준값
+        tolerance: 허용 증가율 (0.2 = 20%)
+        min_delta: 측정 노이즈를 흡수하기 위한 최소 절대 증가량
+    """
+    regressions = []
+    for key, value in current.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        limit = max(base * (1 + tolerance), base + min_delta)
+        if value > limit:
+            regressions.append(f"{key}: {value:.4g} > 허용치 {limit:.4g} (기준 {base:.4g})")
+    return regressions
+
+
+def time_calls(func: Callable, args_list: List[tuple]) -> Dict[str, float]:
+    """호출별 소요 시간(ms)의 중앙값/p95"""
+    samples = []
+    for args in args_list:
+        started = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def time_per_call_us(func: Callable, args_list: List[tuple], repeat: int = 5) -> float:
+    """
+    args_list 전체 호출을 repeat번 반복하고 호출당 평균 시간(µs)의 최솟값을 반환합니다.
+    (µs 단위의 짧은 함수는 호출마다 재면 타이머 오차가 더 커서 묶어서 측정)
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for args in args_list:
+            func(*args)
+        best = min(best, (time.perf_counter() - started) / len(args_list))
+    return best * 1_000_000
+
+
+def finish(baseline_name: str, results: Dict[str, float], update_baseline: bool,
+           tolerance: float, min_delta: float = 0.0) -> int:
+    """
+    결과 출력 후 기준값 저장(update_baseline) 또는 비교.
+    Returns: 종료 코드 (회귀 시 REGRESSION_EXIT_CODE, 기준값이 없으면 MISSING_BASELINE_EXIT_CODE)
+    """
+    for key, value in results.items():
+        print(f"{key:<40} {value:>12.4f}")
+    if update_baseline:
+        save_baseline(baseline_name, results)
+        return 0
+
+    baseline = load_baseline(baseline_name)
+    if not baseline:
+        print(f"[NO BASELINE] {baseline_name}: 저장된 기준값이 없어 회귀를 검사할 수 없습니다. "
+              f"(--update-baseline으로 먼저 기록)", file=sys.stderr)
+        return MISSING_BASELINE_EXIT_CODE
+    unchecked = unchecked_keys(results, baseline)
+    if unchecked:
+        print(f"[WARN] {baseline_name} 기준값에 없는 항목 (비교하지 않음): {', '.join(unchecked)}")
+    regressions = find_regressions(results, baseline, tolerance, min_delta)
+    for message in regressions:
+        print(f"[REGRESSION] {baseline_name} {message}")
+    return REGRESSION_EXIT_CODE if regressions else 0
@@ -0,0 +1,147 @@
+"""
+Import 시간 벤치마크 (python -X importtime 기반)
+
+각 모듈을 새 인터프리터에서 import 하여 누적 import 시간을 측정하고,
+1. 무거운 의존성(torch, faiss, pandas, LangChain 등)이 import 시점에 로드되면 실패
+2. 저장된 기준값보다 허용치 이상 느려지면 실패 (기준값이 없으면 비교할 수 없으므로 실패)
+
+사용법 (backend 디렉토리에서):
+    python benchmarks/import_time.py                    # 기준값과 비교
+    python benchmarks/import_time.py --update-baseline  # 기준값 갱신
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from common import (BACKEND_DIR, MISSING_BASELINE_EXIT_CODE, find_regressions, load_baseline, save_baseline,
+                    unchecked_keys)
+
+BASELINE_NAME = "import_time"
+
+TARGET_MODULES = [
+    "services.transaction",
+    "services.history",
+    "services.knowledge",
+    "services.classification",
+    "services.validation",
+    "agent",
+    "app",
+]
+
+# 첫 사용 시점까지 로드가 미뤄져야 하는 무거운 패키지
+HEAVY_PACKAGES = [
+    "torch",
+    "sentence_transformers",
+    "transformers",
+    "faiss",
+    "pandas",
+    "numpy",
+    "openai",
+    "langchain",
+    "langchain_core",
+    "langchain_community",
+    "langchain_openai",
+]
+
+
+def measure_import(module: str) -> Tuple[float, List[str]]:
+    """
+    새 프로세스에서 module을 import 하고 (누적 시간(ms), import된 최상위 패키지 목록)을 반환합니다.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(BACKEND_DIR),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        raise RuntimeError(f"{module} import 실패: {last_line}")
+
+    cumulative_us = None
+    imported = []
+    for line in proc.stderr.splitlines():
+        # 형식: "import time:      self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        imported.append(name.split(".")[0])
+        if name == module:
+            cumulative_us = int(parts[1])
+
+    if cumulative_us is None:
+        raise RuntimeError(f"{module}의 import 시간을 찾을 수 없습니다.")
+    return cumulative_us / 1000.0, imported
+
+
+def run(repeat: int) -> Tuple[Dict[str, float], Dict[str, List[str]], Dict[str, str]]:
+    results, heavy, errors = {}, {}, {}
+    for module in TARGET_MODULES:
+        samples = []
+        try:
+            for _ in range(repeat):
+                elapsed_ms, imported = measure_import(module)
+                samples.append(elapsed_ms)
+        except RuntimeError as e:
+            errors[module] = str(e)
+            continue
+        # 캐시/디스크 영향을 줄이기 위해 중앙값 사용
+        results[module] = round(statistics.median(samples), 2)
+        loaded = sorted(set(imported) & set(HEAVY_PACKAGES))
+        if loaded:
+            heavy[module] = loaded
+    return results, heavy, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend import 시간 벤치마크")
+    parser.add_argument("--repeat", type=int, default=5, help="모듈별 측정 반복 횟수")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="기준값 대비 허용 증가율")
+    parser.add_argument("--min-delta-ms", type=float, default=20.0, help="노이즈 흡수용 최소 허용 증가량(ms)")
+    parser.add_argument("--update-baseline", action="store_true", help="측정값을 기준값으로 저장")
+    args = parser.parse_args()
+
+    results, heavy, errors = run(args.repeat)
+
+    print(f"{'module':<28} {'import(ms)':>12}")
+    for module, elapsed in results.items():
+        print(f"{module:<28} {elapsed:>12.2f}")
+
+    failed = False
+    for module, message in errors.items():
+        print(f"[ERROR] {message}")
+        failed = True
+    for module, packages in heavy.items():
+        print(f"[FAIL] {module} import 시 무거운 의존성 로드: {', '.join(packages)}")
+        failed = True
+
+    if args.update_baseline:
+        if failed:
+            print("오류가 있어 기준값을 저장하지 않습니다.")
+            sys.exit(1)
+        save_baseline(BASELINE_NAME, results)
+        return
+
+    baseline = load_baseline(BASELINE_NAME)
+    if not baseline:
+        print(f"[NO BASELINE] {BASELINE_NAME}: 저장된 기준값이 없어 회귀를 검사할 수 없습니다. "
+              f"(--update-baseline 으로 먼저 기록)", file=sys.stderr)
+        sys.exit(1 if failed else MISSING_BASELINE_EXIT_CODE)
+    unchecked = unchecked_keys(results, baseline)
+    if unchecked:
+        print(f"[WARN] 기준값에 없는 모듈 (비교하지 않음): {', '.join(unchecked)}")
+    for message in find_regressions(results, baseline, args.tolerance, args.min_delta_ms):
+        print(f"[REGRESSION] {message}")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
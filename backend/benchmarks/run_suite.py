@@ -0,0 +1,69 @@
+"""
+핫패스 마이크로 벤치마크 일괄 실행
+
+각 벤치마크를 별도 프로세스로 실행하고(네트워크 불필요) 기준값 비교 결과를 모아 종료 코드로 반환합니다.
+- 0: 모두 통과, 1: 회귀 또는 실행 실패
+- 벤치마크별 상태는 종료 코드로 구분: 0 ok, REGRESSION_EXIT_CODE(3) regression,
+  MISSING_BASELINE_EXIT_CODE(4) no baseline (비교하지 못함, 실패로 봄),
+  SKIP_EXIT_CODE(77) skipped (선택 의존성이 없어 건너뜀, 실패로 보지 않음), 그 외(예외 등) error
+--quick은 작은 규모만 측정합니다. (기준값 이름에 규모가 들어가므로 기본 실행과 기준값이 섞이지 않음)
+
+사용법 (backend 디렉토리에서):
+    python benchmarks/run_suite.py --update-baseline     # 기준값 기록
+    python benchmarks/run_suite.py                       # 기준값 대비 30% 이상 느려지면 실패
+    python benchmarks/run_suite.py --tolerance 0.5 --only orders history
+    python benchmarks/run_suite.py --quick
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from common import BACKEND_DIR, MISSING_BASELINE_EXIT_CODE, REGRESSION_EXIT_CODE, SKIP_EXIT_CODE
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+
+# 이름: (스크립트, 기본 인자, --quick 인자)
+SUITE = {
+    "classification": ("bench_classification.py", [], ["--repeat", "5"]),
+    "knowledge": ("bench_knowledge.py", [], ["--corpus-sizes", "100", "1000", "--batch-sizes", "1", "32"]),
+    "orders": ("bench_orders.py", [], ["--orders", "10000", "--iterations", "100"]),
+    "history": ("bench_history.py", [], ["--records", "10000", "--iterations", "10"]),
+    "answer_cache": ("bench_answer_cache.py", [], ["--sizes", "1000", "--iterations", "300"]),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="핫패스 마이크로 벤치마크 일괄 실행")
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITE), help="실행할 벤치마크")
+    parser.add_argument("--quick", action="store_true", help="작은 규모만 측정")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="허용 증가율 (0.3 = 30%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    outcomes = {}
+    for name in args.only or SUITE:
+        script, default_args, quick_args = SUITE[name]
+        command = [sys.executable, str(BENCHMARK_DIR / script), *(quick_args if args.quick else default_args),
+                   "--tolerance", str(args.tolerance)]
+        if args.update_baseline:
+            command.append("--update-baseline")
+
+        print(f"\n===== {name} =====", flush=True)
+        started = time.perf_counter()
+        returncode = subprocess.run(command, cwd=str(BACKEND_DIR)).returncode
+        status = {0: "ok", REGRESSION_EXIT_CODE: "regression", MISSING_BASELINE_EXIT_CODE: "no baseline",
+                  SKIP_EXIT_CODE: "skipped"}.get(returncode, f"error (exit {returncode})")
+        outcomes[name] = (status, time.perf_counter() - started)
+
+    print("\n===== 요약 =====")
+    for name, (status, elapsed) in outcomes.items():
+        print(f"{name:<16} {status:<20} {elapsed:>8.1f}s")
+    failed = [name for name, (status, _) in outcomes.items() if status not in ("ok", "skipped")]
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
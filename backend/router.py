@@ -1,11 +1,24 @@
 from typing import List, Dict, Optional, Any
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from agent import CSAgent
-from services.history import HistoryService
+from services.history import HISTORY_FIELDS, create_history_service, make_history_cursor, parse_history_cursor
+from services.history_writer import HistoryWriter
+from services.post_validation import PostValidationWorker
+from services.http_client import get_client_factory
+from services.resilience import breaker_stats
+from services.admission import AdmissionController, AdmissionRejected
+import asyncio
+import json
 import logging
+import secrets
+import settings
 
-history_service = HistoryService()
+# 대화 기록 저장소 (settings.HISTORY_STORE_BACKEND: csv | sqlite)
+history_service = create_history_service()
+# 요청 경로 밖에서 일괄 저장 (워커 시작/종료는 app.py lifespan)
+history_writer = HistoryWriter(history_service)
 
 
 # 로깅 설정
@@ -13,7 +26,28 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 logger = logging.getLogger("CS_Router")
 
 router = APIRouter()
-agent = CSAgent()
+# 모델/인덱스 로드는 app.py의 lifespan에서 백그라운드로 수행 (포트를 먼저 바인딩)
+agent = CSAgent(warmup=False)
+# 유저별 속도 제한 + 전체 동시성 제한 (CSAgent.process_query 호출 전에 적용)
+admission = AdmissionController()
+# VALIDATION_MODE=async에서 반환 후 검증할 응답 처리 (워커 시작/종료는 app.py lifespan)
+post_validation = PostValidationWorker(agent, history_service)
+
+def _require_ready():
+    """에이전트 워밍업이 끝나지 않았으면 503을 반환합니다."""
+    if not agent.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="서버가 초기화 중입니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": "5"}
+        )
+
+def _require_admin(x_admin_token: Optional[str] = Header(None)):
+    """관리 API 인증: settings.ADMIN_API_TOKEN이 없으면 비활성(403), 헤더 X-Admin-Token이 다르면 401"""
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="관리 API가 비활성화되어 있습니다. (ADMIN_API_TOKEN 미설정)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="관리 API 토큰이 올바르지 않습니다.")
 
 class FeedbackRequest(BaseModel):
     interaction_id: str
@@ -28,8 +62,25 @@ class TransactionApprovalRequest(BaseModel):
     transaction_id: str
     approved: bool
 
+class BatchApprovalRequest(BaseModel):
+    transaction_ids: List[str]
+    approved: bool
+
 @router.post("/chat")
 async def chat_endpoint(request: ChatRequest):
+    _require_ready()
+    try:
+        async with admission.admit(request.user_id):
+            return await _process_chat(request)
+    except AdmissionRejected as e:
+        logger.warning(f"[채팅 요청 거절]: user={request.user_id}, reason={e.reason}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.message,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+async def _process_chat(request: ChatRequest):
     try:
         logger.info(f"[채팅 요청 수신]: {request.query}")
         
@@ -40,10 +91,10 @@ async def chat_endpoint(request: ChatRequest):
             session_id=request.user_id
         )
         
-        # [NEW] Log History
+        # [NEW] Log History (대기열에 넣고 ID만 즉시 받음, 대기열이 가득 차 저장하지 못하면 None)
         if request.user_id:
             try:
-                history_service.log_interaction(
+                response["interaction_id"] = history_writer.submit(
                     user_id=request.user_id,
                     query=request.query,
                     intent=response.get("intent", "unknown"),
@@ -51,6 +102,15 @@ async def chat_endpoint(request: ChatRequest):
                 )
             except Exception as e:
                 logger.error(f"[히스토리 저장 실패]: {str(e)}")
+
+        # 반환 전 검증을 건너뛴 응답은 백그라운드 사후 검증 (결과는 interaction_id로 조회)
+        if response.get("validation") == "deferred":
+            post_validation.submit(
+                response.get("interaction_id"),
+                query=request.query,
+                response=response,
+                conversation_history=request.conversation_history
+            )
         
         logger.info(f"[Agent 응답]: {response}")
         return response
@@ -60,22 +120,144 @@ async def chat_endpoint(request: ChatRequest):
 
 @router.post("/approve")
 async def approve_transaction(request: TransactionApprovalRequest):
+    _require_ready()
     if request.approved:
-        # Commit transaction
-        result = agent.transaction.execute_transaction(request.transaction_id)
+        # Commit transaction (주문 저널 fsync를 기다리므로 이벤트 루프 밖에서 실행)
+        result = await asyncio.to_thread(agent.transaction.execute_transaction, request.transaction_id)
         return result
     else:
         result = agent.transaction.reject_transaction(request.transaction_id)
         return result
 
+@router.post("/approve/batch")
+async def approve_transactions_batch(request: BatchApprovalRequest):
+    """여러 대기 트랜잭션을 한 번에 승인/거절합니다. (트랜잭션별 결과 포함)"""
+    _require_ready()
+    if len(request.transaction_ids) > settings.APPROVE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"한 번에 최대 {settings.APPROVE_BATCH_MAX}건까지 처리할 수 있습니다.")
+    if request.approved:
+        return await asyncio.to_thread(agent.transaction.execute_transactions, request.transaction_ids)
+    return agent.transaction.reject_transactions(request.transaction_ids)
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """fields=id,timestamp,query 형태의 필드 선택 (없으면 전체)"""
+    if not fields:
+        return None
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in HISTORY_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 필드: {', '.join(unknown)}")
+    return selected
+
+def _project(row: Dict, fields: Optional[List[str]]) -> Dict:
+    return row if fields is None else {f: row.get(f) for f in fields}
+
+async def _stream_history(user_id: str, limit: Optional[int], before, fields: Optional[List[str]]):
+    """NDJSON 스트리밍: 저장소에서 HISTORY_STREAM_CHUNK건씩 (스레드에서) 읽어 한 줄씩 전송"""
+    chunk_size = settings.HISTORY_STREAM_CHUNK if limit is None else min(limit, settings.HISTORY_STREAM_CHUNK)
+    async for row in history_writer.stream_user_history(user_id, chunk_size, before, limit):
+        yield json.dumps(_project(row, fields), ensure_ascii=False) + "\n"
+
 @router.get("/history/{user_id}")
-async def get_history(user_id: str):
-    return history_service.get_user_history(user_id)
+async def get_history(
+    user_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=settings.HISTORY_PAGE_MAX),
+    before: Optional[str] = Query(None, description="이전 응답의 next_before 또는 timestamp"),
+    fields: Optional[str] = Query(None, description="쉼표로 구분한 반환 필드 (예: id,timestamp,query,feedback)"),
+    output_format: str = Query("json", alias="format", pattern="^(json|ndjson)$")
+):
+    """
+    대화 기록 조회
+    - 파라미터 없음: 전체 기록 배열 (기존 형식)
+    - limit/before: {"items": [...], "next_before": 다음 페이지 커서 또는 null}
+    - format=ndjson: 한 줄에 기록 하나씩 스트리밍 (limit이 없으면 전체)
+    """
+    selected = _parse_fields(fields)
+    cursor = parse_history_cursor(before)
+
+    if output_format == "ndjson":
+        return StreamingResponse(_stream_history(user_id, limit, cursor, selected), media_type="application/x-ndjson")
+
+    if limit is None and cursor is None:
+        return [_project(row, selected) for row in await history_writer.get_user_history(user_id)]
+
+    limit = limit or settings.HISTORY_PAGE_DEFAULT
+    page = await history_writer.get_user_history_page(user_id, limit, cursor)
+    return {
+        "items": [_project(row, selected) for row in page],
+        "next_before": make_history_cursor(page[-1]) if len(page) == limit else None
+    }
 
 @router.post("/feedback")
 async def save_feedback(request: FeedbackRequest):
-    success = history_service.update_feedback(request.interaction_id, request.feedback)
+    # 워밍업 전에는 캐시 투표를 반영할 수 없으므로 피드백도 받지 않음 (표가 조용히 빠지지 않도록)
+    _require_ready()
+
+    def vote(interaction: Dict):
+        # 캐시 투표는 갱신 전 피드백과 비교 (같은 대화의 피드백끼리는 HistoryWriter가 직렬화, 스레드에서 실행)
+        if interaction.get("cache_key"):
+            # good N건 → 캐시 항목 검증(승격), bad → 거부 (settings.CACHE_PROMOTE_MIN_POSITIVE 등)
+            change = agent.knowledge.apply_history_feedback(interaction, request.feedback)
+            if change:
+                logger.info(f"[캐시 피드백 반영]: interaction={request.interaction_id}, {change}")
+
+    success = await history_writer.record_feedback(request.interaction_id, request.feedback, on_recorded=vote)
     if success:
         return {"status": "success", "message": "피드백이 반영되었습니다."}
     else:
-        raise HTTPException(status_code=404, detail=f"Interaction ID {request.interaction_id} not found.")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=f"Interaction ID {request.interaction_id} not found.")
+
+@router.get("/validation/{interaction_id}")
+async def get_validation(interaction_id: str):
+    """사후 검증 결과 조회 (VALIDATION_MODE=async)"""
+    result = await asyncio.to_thread(history_service.get_validation, interaction_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Interaction ID {interaction_id}의 검증 결과가 없습니다.")
+    return result
+
+@router.get("/admin/cache/stats", dependencies=[Depends(_require_admin)])
+async def get_cache_stats():
+    """답변 캐시 통계 (항목 수, 히트/미스, 무효화 건수, 크기, 저널 상태)"""
+    _require_ready()
+    return agent.knowledge.get_cache_stats()
+
+async def _invalidate_cache(**condition) -> Dict:
+    removed = await asyncio.to_thread(agent.knowledge.invalidate_cache, **condition)
+    logger.info(f"[캐시 무효화]: {condition}, {len(removed)}건")
+    return {"removed": len(removed), "keys": removed}
+
+@router.delete("/admin/cache/entries/{cache_key}", dependencies=[Depends(_require_admin)])
+async def invalidate_cache_entry(cache_key: str):
+    """캐시 키(응답/대화 기록의 cache_key)로 항목 하나를 삭제합니다."""
+    _require_ready()
+    result = await _invalidate_cache(keys=[cache_key])
+    if not result["removed"]:
+        raise HTTPException(status_code=404, detail=f"캐시 키 {cache_key}를 찾을 수 없습니다.")
+    return result
+
+@router.delete("/admin/cache/categories/{category}", dependencies=[Depends(_require_admin)])
+async def invalidate_cache_category(category: str):
+    """카테고리의 캐시 항목을 모두 삭제합니다."""
+    _require_ready()
+    return await _invalidate_cache(category=category)
+
+@router.delete("/admin/cache/faqs/{faq_id}", dependencies=[Depends(_require_admin)])
+async def invalidate_cache_faq(faq_id: str):
+    """해당 FAQ로 생성된 캐시 답변을 모두 삭제합니다. (FAQ 원문 수정 후)"""
+    _require_ready()
+    return await _invalidate_cache(faq_id=faq_id)
+
+@router.get("/metrics")
+async def get_metrics():
+    """운영 메트릭 (LLM HTTP 커넥션 풀, 서킷 브레이커 등)"""
+    return {
+        "http_pool": get_client_factory().pool_stats(),
+        "circuit_breakers": breaker_stats(),
+        "admission": admission.stats(),
+        "orders": agent.transaction.orders.status_counts() if agent.ready else {},
+        "pending_transactions": agent.transaction.pending_transactions.stats() if agent.ready else {},
+        "history_writer": history_writer.stats(),
+        "answer_cache": agent.knowledge.get_cache_stats() if agent.ready else {},
+        "validation": agent.validator.stats() if agent.ready else {},
+        "post_validation": post_validation.stats()
+    }
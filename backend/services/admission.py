@@ -0,0 +1,175 @@
+"""
+/chat 요청 입장 제어 (Admission Control)
+- 유저별 토큰 버킷 속도 제한 → 429
+- 유저별 동시 처리 수 제한 → 429
+- 전체 동시 처리 수 제한 + 제한된 대기열 (대기열 초과/대기 시간 초과) → 503
+거절 시 Retry-After 값을 함께 반환하고, 거절 사유별 카운터를 유지합니다.
+"""
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+import settings
+
+
+class AdmissionRejected(Exception):
+    """입장 거절 (status_code, retry_after 초, 사유)"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+        self.message = message
+
+
+class TokenBucket:
+    """rate개/초로 채워지고 최대 capacity개까지 쌓이는 토큰 버킷"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self) -> float:
+        """토큰을 하나 소비합니다. 성공하면 0, 실패하면 다음 토큰까지 남은 시간(초)"""
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        """소비한 토큰을 되돌립니다. (입장 후 대기열에서 거절된 요청)"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class AdmissionController:
+    """user_id 기준 속도/동시성 제한과 전체 동시성 제한을 한 번에 적용합니다."""
+
+    # 버킷 dict가 무한히 커지지 않도록 가득 찬(유휴) 버킷을 정리하는 기준
+    MAX_TRACKED_USERS = 10000
+
+    def __init__(self,
+                 max_concurrent: int = settings.CHAT_MAX_CONCURRENT,
+                 max_queue: int = settings.CHAT_MAX_QUEUE,
+                 queue_timeout: float = settings.CHAT_QUEUE_TIMEOUT,
+                 max_concurrent_per_user: int = settings.CHAT_MAX_CONCURRENT_PER_USER,
+                 rate_per_user: float = settings.CHAT_RATE_PER_USER,
+                 burst_per_user: float = settings.CHAT_BURST_PER_USER):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_concurrent_per_user = max_concurrent_per_user
+        self.rate_per_user = rate_per_user
+        self.burst_per_user = burst_per_user
+
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._user_active: Dict[str, int] = {}
+        self.active = 0
+        self.waiting = 0
+        # 평균 처리 시간(EWMA) - Retry-After 추정용
+        self._avg_service_time = 1.0
+
+        self.admitted = 0
+        self.rejections = {"rate_limited": 0, "user_concurrency": 0, "queue_full": 0, "queue_timeout": 0}
+
+    def _reject(self, status_code: int, reason: str, retry_after: float, message: str):
+        self.rejections[reason] += 1
+        raise AdmissionRejected(status_code, reason, retry_after, message)
+
+    def _check_rate(self, user_id: str):
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_TRACKED_USERS:
+                self._buckets = {uid: b for uid, b in self._buckets.items() if not b.is_full()}
+            bucket = self._buckets[user_id] = TokenBucket(self.rate_per_user, self.burst_per_user)
+
+        wait = bucket.try_acquire()
+        if wait > 0:
+            self._reject(429, "rate_limited", wait, "요청이 너무 많습니다. 잠시 후 다시 시도해주세요.")
+
+    def _estimate_wait(self) -> float:
+        return self._avg_service_time * (self.waiting + 1) / max(self.max_concurrent, 1)
+
+    @asynccontextmanager
+    async def admit(self, user_id: str):
+        """
+        요청 처리 슬롯을 확보합니다.
+
+        Raises:
+            AdmissionRejected: 속도/동시성 제한 또는 대기열 초과
+        """
+        user_id = user_id or "anonymous"
+        # 동시성/대기열 검사를 먼저 해서, 처리되지 않은 요청이 유저의 속도 제한 토큰을 소비하지 않도록
+        if self._user_active.get(user_id, 0) >= self.max_concurrent_per_user:
+            self._reject(429, "user_concurrency", self._avg_service_time,
+                         "이전 요청을 처리 중입니다. 잠시 후 다시 시도해주세요.")
+
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self._reject(503, "queue_full", self._estimate_wait(),
+                         "현재 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.")
+
+        self._check_rate(user_id)
+
+        # 대기 중에도 유저별 동시성에 포함 (같은 유저의 대기열 점유 방지)
+        self._user_active[user_id] = self._user_active.get(user_id, 0) + 1
+        try:
+            if self._semaphore.locked():
+                self.waiting += 1
+                try:
+                    await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+                except asyncio.TimeoutError:
+                    bucket = self._buckets.get(user_id)
+                    if bucket is not None:
+                        bucket.refund()
+                    self._reject(503, "queue_timeout", self._estimate_wait(),
+                                 "현재 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.")
+                finally:
+                    self.waiting -= 1
+            else:
+                # 빈 슬롯이 있으면 대기 없이 즉시 확보
+                await self._semaphore.acquire()
+
+            self.active += 1
+            self.admitted += 1
+            started = time.monotonic()
+            try:
+                yield
+            finally:
+                self.active -= 1
+                self._semaphore.release()
+                elapsed = time.monotonic() - started
+                self._avg_service_time = 0.9 * self._avg_service_time + 0.1 * elapsed
+        finally:
+            remaining = self._user_active.get(user_id, 1) - 1
+            if remaining > 0:
+                self._user_active[user_id] = remaining
+            else:
+                self._user_active.pop(user_id, None)
+
+    def stats(self) -> Dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejections),
+            "rejected_total": sum(self.rejections.values()),
+            "avg_service_time": round(self._avg_service_time, 3),
+        }
@@ -0,0 +1,133 @@
+"""
+선택지(candidates) 응답 매칭
+- 한글 음절을 자모로 분해한 뒤 3-gram 역색인을 만들어, 오타/띄어쓰기/부분 일치에도
+  후보 상품명을 한 번에 순위화 (예: "싸운드바" → "사운드바", "노트북 보여줘" → "게이밍 노트북")
+- "첫번째", "2번", "마지막" 같은 순서 응답 지원
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# 한글 음절 → 자모 분해용 (유니코드 조합 규칙)
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+              "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+
+_NON_WORD = re.compile(r"[^0-9a-zㄱ-ㆎ가-힣]+")
+
+_ORDINAL_WORDS = {"첫": 1, "두": 2, "세": 3, "네": 4, "다섯": 5, "여섯": 6, "일곱": 7, "여덟": 8, "아홉": 9, "열": 10}
+_ORDINAL_WORD_RE = re.compile(r"(다섯|여섯|일곱|여덟|아홉|첫|두|세|네|열)\s*(?:번\s*째|째)")
+_ORDINAL_NUMBER_RE = re.compile(r"(?<!\d)(\d{1,2})\s*(?:번\s*째|번|째)")
+_ORDINAL_LAST_RE = re.compile(r"마지막|맨\s*끝|맨\s*아래")
+
+
+def decompose_jamo(text: str) -> str:
+    """한글 음절을 초성/중성/종성 자모로 분해합니다. (그 외 문자는 그대로)"""
+    chars = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            offset = code - _HANGUL_BASE
+            chars.append(_CHOSEONG[offset // 588])
+            chars.append(_JUNGSEONG[(offset % 588) // 28])
+            chars.append(_JONGSEONG[offset % 28])
+        else:
+            chars.append(ch)
+    return "".join(chars)
+
+
+def normalize_for_match(text: str) -> str:
+    """NFC 정규화 → 소문자 → 공백/기호 제거 → 자모 분해"""
+    text = unicodedata.normalize("NFC", text or "").lower()
+    return decompose_jamo(_NON_WORD.sub("", text))
+
+
+def trigrams(text: str) -> set:
+    normalized = normalize_for_match(text)
+    if len(normalized) < 3:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+
+
+def parse_ordinal(text: str, count: int) -> Optional[int]:
+    """순서 응답을 0부터 시작하는 인덱스로 변환합니다. (범위를 벗어나면 None)"""
+    text = text or ""
+    if _ORDINAL_LAST_RE.search(text):
+        return count - 1 if count else None
+
+    match = _ORDINAL_WORD_RE.search(text)
+    position = _ORDINAL_WORDS[match.group(1)] if match else None
+    if position is None:
+        match = _ORDINAL_NUMBER_RE.search(text)
+        position = int(match.group(1)) if match else None
+
+    if position is None or not 1 <= position <= count:
+        return None
+    return position - 1
+
+
+class CandidateIndex:
+    """
+    한 세션의 선택지 주문 목록에 대한 3-gram 역색인
+
+    점수는 두 값 중 큰 값입니다.
+    - 후보 상품명 3-gram 중 응답에 포함된 비율 (응답에 "보여줘" 같은 다른 말이 섞여도 유지)
+    - 응답의 단어 하나가 상품명에 포함된 비율 (상품명 일부만 말한 경우, 예: "노트북")
+    """
+
+    # 단어 단위 부분 일치에 쓰는 최소 3-gram 수 (자모 5자 ≒ 2음절 이상)
+    MIN_TOKEN_GRAMS = 3
+
+    def __init__(self, candidates: List[Dict], threshold: float = 0.6):
+        self.order_ids = [c["order_id"] for c in candidates]
+        self.threshold = threshold
+        self._gram_counts = []
+        self._postings = defaultdict(list)
+        for position, candidate in enumerate(candidates):
+            grams = trigrams(candidate.get("item", ""))
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(position)
+
+    def _hits(self, grams: set) -> Dict[int, int]:
+        hits = defaultdict(int)
+        for gram in grams:
+            for position in self._postings.get(gram, ()):
+                hits[position] += 1
+        return hits
+
+    def rank(self, text: str) -> List[Tuple[str, float]]:
+        """후보별 (order_id, 점수)를 점수 내림차순으로 반환합니다. (threshold 미만 제외)"""
+        scores = {}
+        for position, hit_count in self._hits(trigrams(text)).items():
+            scores[position] = hit_count / self._gram_counts[position]
+        name_scores = dict(scores)
+
+        for token in (text or "").split():
+            token_grams = trigrams(token)
+            if len(token_grams) < self.MIN_TOKEN_GRAMS:
+                continue
+            for position, hit_count in self._hits(token_grams).items():
+                scores[position] = max(scores.get(position, 0.0), hit_count / len(token_grams))
+
+        ranked = [(position, score) for position, score in scores.items() if score >= self.threshold]
+        # 동점이면 응답 전체와 더 많이 겹치는 주문, 그다음 목록에 먼저 나온(최신) 주문 우선
+        # (예: "무선 마우스"는 단어 "무선"만 겹치는 "무선 키보드"보다 앞)
+        ranked.sort(key=lambda x: (-x[1], -name_scores.get(x[0], 0.0), x[0]))
+        return [(self.order_ids[position], round(score, 3)) for position, score in ranked]
+
+    def match(self, text: str) -> Optional[str]:
+        """순서 응답("첫번째", "마지막") 또는 상품명 유사도로 선택된 order_id"""
+        position = parse_ordinal(text, len(self.order_ids))
+        if position is not None:
+            return self.order_ids[position]
+        ranked = self.rank(text)
+        return ranked[0][0] if ranked else None
+
+    def __len__(self) -> int:
+        return len(self.order_ids)
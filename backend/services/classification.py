@@ -2,18 +2,16 @@
 A파트: 분류용 RAG
 부적절한 질문(욕설, 주제 이탈)을 걸러내는 가드레일 로직을 구현
 사용자 질문을 과거 질문 cvs(cases.csv)와 대조하여 의도를 파악
+LangChain/임베딩 관련 모듈은 import 비용이 크므로 서비스 생성 시점에 로드
 """
 
+import asyncio
+import csv
 import os
-import pandas as pd
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_core.documents import Document
+from services.http_client import get_client_factory
+from services.resilience import Deadline, DeadlineExceeded, DependencyUnavailable, get_breaker
 
 load_dotenv()
 
@@ -24,7 +22,12 @@ class ClassificationResult(BaseModel):
 
 class ClassificationService:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o", temperature=0)
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import PydanticOutputParser
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        self.llm = get_client_factory().chat_model(model="gpt-4o", temperature=0)
+        self.llm_breaker = get_breaker("classification_llm")
         self.parser = PydanticOutputParser(pydantic_object=ClassificationResult)
         
         # Initialize RAG for classification using historical cases from csv
@@ -50,6 +53,9 @@ class ClassificationService:
 
     def _initialize_rag(self):
         """Loads historical cases from CSV and initializes FAISS."""
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.documents import Document
+
         try:
             # Assuming the script runs from project root or backend directory
             csv_path = os.path.join(os.getcwd(), "backend", "data", "cases.csv")
@@ -58,9 +64,10 @@ class ClassificationService:
                 csv_path = os.path.join(os.getcwd(), "data", "cases.csv")
             
             if os.path.exists(csv_path):
-                df = pd.read_csv(csv_path)
                 documents = []
-                for _, row in df.iterrows():
+                with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+                    rows = list(csv.DictReader(f))
+                for row in rows:
                     documents.append(Document(
                         page_content=row['page_content'],
                         metadata={"intent": row['intent']}
@@ -100,7 +107,37 @@ class ClassificationService:
                 return intent
         return None
 
-    async def classify_intent(self, query: str) -> dict:
+    def _keyword_fallback(self, kw_intent: str, reasoning: str) -> dict:
+        """LLM 없이 키워드 규칙만으로 분류한 결과"""
+        intent = kw_intent or "OFF_TOPIC"
+        return {
+            "intent": intent,
+            "confidence": 0.9 if kw_intent else 0.4,
+            "reasoning": f"{reasoning}: {intent}"
+        }
+
+    async def _search_similar_cases(self, query: str, deadline: Deadline = None) -> list:
+        """
+        과거 사례 유사도 검색 (임베딩/FAISS 호출이 동기 코드라 스레드에서 실행, 남은 마감 시간 이내로 제한)
+
+        Raises:
+            DeadlineExceeded: 검색 전 마감이 지났거나 검색이 마감 내에 끝나지 않음
+        """
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded("classification_search")
+        search = asyncio.to_thread(self.db.similarity_search, query, k=3)
+        try:
+            return await asyncio.wait_for(search, deadline.remaining() if deadline is not None else None)
+        except asyncio.TimeoutError:
+            # 스레드의 검색은 끝까지 돌지만 결과는 버리고 키워드 분류로 대체
+            raise DeadlineExceeded("classification_search")
+
+    async def classify_intent(self, query: str, deadline: Deadline = None) -> dict:
+        """
+        Args:
+            deadline: 요청 마감 시간. LLM 호출이 마감을 넘기거나 브레이커가 열려 있으면
+                      키워드 분류로 대체하고 결과에 degraded 사유를 기록합니다.
+        """
         try:
             # Step 1: Guardrail Check
             if self._detect_guardrails(query):
@@ -116,7 +153,12 @@ class ClassificationService:
             # Step 3: Retrieve similar cases
             historical_context = "No historical context available."
             if self.db:
-                docs = self.db.similarity_search(query, k=3)
+                try:
+                    docs = await self._search_similar_cases(query, deadline)
+                except DeadlineExceeded as e:
+                    fallback = self._keyword_fallback(kw_intent, f"Keyword fallback ({e.reason})")
+                    fallback["degraded"] = e.reason
+                    return fallback
                 historical_context = "\n".join([f"- Case: {d.page_content} => Intent: {d.metadata['intent']}" for d in docs])
 
             # Step 4: LLM Classification
@@ -124,15 +166,21 @@ class ClassificationService:
             
             if not os.getenv("OPENAI_API_KEY"):
                 # Mock response if no API key
-                intent = kw_intent or "OFF_TOPIC"
-                return {
-                    "intent": intent, 
-                    "confidence": 0.9 if kw_intent else 0.4, 
-                    "reasoning": f"Keyword/Mock Result: {intent}"
-                }
+                return self._keyword_fallback(kw_intent, "Keyword/Mock Result")
             
-            result = await self.llm.ainvoke(input_msg)
-            parsed = self.parser.parse(result.content)
+            try:
+                result = await self.llm_breaker.acall(self.llm.ainvoke, input_msg, deadline=deadline)
+                parsed = self.parser.parse(result.content)
+            except DependencyUnavailable as e:
+                fallback = self._keyword_fallback(kw_intent, f"Keyword fallback ({e.reason})")
+                fallback["degraded"] = e.reason
+                return fallback
+            except Exception as e:
+                # API 오류(재시도 후 5xx 등)나 출력 파싱 실패도 키워드 분류로 대체
+                print(f"Classification LLM Error: {e}")
+                fallback = self._keyword_fallback(kw_intent, "Keyword fallback (error)")
+                fallback["degraded"] = "error"
+                return fallback
             
             # Hybrid: Trust keyword if confidence is low
             if parsed.confidence < 0.6 and kw_intent:
@@ -142,9 +190,8 @@ class ClassificationService:
 
             return parsed.dict()
         except Exception as e:
+            # 유사 사례 검색 등 LLM 외 단계 실패도 키워드 분류로 대체
             print(f"Classification Error: {e}")
-            return {
-                "intent": "OFF_TOPIC", 
-                "confidence": 0.0, 
-                "reasoning": f"Error: {str(e)}"
-            }
+            fallback = self._keyword_fallback(self._get_keyword_intent(query), f"Keyword fallback (Error: {e})")
+            fallback["degraded"] = "error"
+            return fallback
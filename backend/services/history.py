@@ -1,70 +1,569 @@
+"""
+대화 기록 저장소
+- HistoryService: history.csv (기본), 유저별 (timestamp, id) → 파일 위치 인덱스로 페이지 조회 시
+  해당 페이지의 행만 읽음 (인덱스는 첫 조회 때 파일을 한 번 읽어 만들고, 추가/피드백 갱신 시 함께 갱신)
+- SQLiteHistoryService: history.db, (user_id, timestamp) / id 인덱스로 유저별 조회와
+  피드백 갱신이 전체 기록 크기와 무관하게 동작
+- settings.HISTORY_STORE_BACKEND("csv" | "sqlite")로 선택 (create_history_service)
+- 사후 검증 결과는 기록 id별로 별도 보관 (history_validation.csv / history_validation 테이블)
+"""
+
 import csv
+import io
+import itertools
 import os
+import sqlite3
+import threading
+import time
 import uuid
+from bisect import bisect_left
 from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import settings
+
+# cache_key / cache_category: 답변 캐시에서 나왔거나 캐시에 추가된 응답의 캐시 항목 (피드백 → 캐시 승격/거부)
+HISTORY_FIELDS = ['id', 'user_id', 'timestamp', 'query', 'intent', 'response', 'feedback', 'cache_key', 'cache_category']
+VALIDATION_FIELDS = ['interaction_id', 'validated_at', 'valid', 'tier', 'issues']
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CSV_PATH = os.path.join(_BASE_DIR, 'data', 'history.csv')
+DEFAULT_DB_PATH = os.path.join(_BASE_DIR, 'data', 'history.db')
+
+
+_id_sequence = itertools.count(1)
+
+
+def new_interaction_id() -> str:
+    """
+    {밀리초 시각}-{9자리 일련번호}-{무작위 12자리}
+    - 일련번호를 0으로 채워 한 프로세스 안에서는 문자열 비교 순서가 생성 순서와 같도록 함 (SQLite id 정렬과 동일)
+    - 일련번호는 프로세스마다 1부터 시작하므로, 여러 워커/migrate_history/같은 밀리초의 재시작에서도
+      겹치지 않도록 uuid4 무작위 값을 붙임 (피드백과 사후 검증 결과가 이 ID로 연결됨)
+    """
+    return f"{int(time.time() * 1000)}-{next(_id_sequence):09d}-{uuid.uuid4().hex[:12]}"
+
+
+def history_sort_key(row: Dict) -> Tuple[str, str]:
+    """
+    기록 정렬 키 (timestamp, id) - 내림차순이 최신순
+    전체 조회/페이지/스트리밍 모두 이 순서를 사용 (SQLite: ORDER BY timestamp DESC, id DESC)
+    """
+    return (row['timestamp'], row['id'])
+
+
+def parse_history_cursor(cursor: Optional[str]) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    before 커서 파싱: "{timestamp}|{id}" 또는 "{timestamp}"
+    id가 없으면 해당 timestamp보다 이전 기록만 조회합니다.
+    """
+    if not cursor:
+        return None
+    timestamp, _, interaction_id = cursor.partition("|")
+    return (timestamp, interaction_id or None)
+
+
+def make_history_cursor(row: Dict) -> str:
+    return f"{row['timestamp']}|{row['id']}"
+
+
+def is_before(row: Dict, before: Optional[Tuple[str, Optional[str]]]) -> bool:
+    """row가 커서보다 이전(오래된) 기록인지"""
+    if before is None:
+        return True
+    timestamp, interaction_id = before
+    if interaction_id is None:
+        return row['timestamp'] < timestamp
+    return history_sort_key(row) < (timestamp, interaction_id)
+
+
+def build_interaction(user_id, query, intent, response) -> Dict:
+    """저장할 대화 기록 한 건 (id/timestamp 포함)"""
+    # response가 객체일 수 있으므로 문자열 변환 (간단히 메시지만 저장)
+    response_text = response.get('message', '') if isinstance(response, dict) else str(response)
+    cache_ref = response if isinstance(response, dict) else {}
+    return {
+        "id": new_interaction_id(),
+        "user_id": user_id,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "query": query,
+        "intent": intent,
+        "response": response_text,
+        "feedback": "",
+        "cache_key": cache_ref.get('cache_key') or "",
+        "cache_category": cache_ref.get('cache_category') or "",
+    }
+
+
+def build_validation_record(interaction_id, result: Dict) -> Dict:
+    """ValidationAgent.validate_response 결과 → 저장할 검증 기록 한 건"""
+    return {
+        "interaction_id": str(interaction_id),
+        "validated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "valid": "1" if result.get("valid", True) else "0",
+        "tier": result.get("tier", ""),
+        "issues": " | ".join(result.get("issues", [])),
+    }
+
+
+def parse_validation_record(row: Dict) -> Dict:
+    return {
+        "interaction_id": row["interaction_id"],
+        "validated_at": row["validated_at"],
+        "valid": str(row["valid"]) == "1",
+        "tier": row["tier"],
+        "issues": row["issues"].split(" | ") if row["issues"] else [],
+    }
+
+
+def _complete_row(row: Dict) -> Dict:
+    """이전 형식(컬럼 부족) 파일에서 읽은 행도 HISTORY_FIELDS를 모두 갖도록 (없는 값은 빈 문자열)"""
+    return {k: row.get(k) or '' for k in HISTORY_FIELDS}
+
+
+def _encode_csv_row(values: List) -> bytes:
+    """CSV 한 행을 바이트로 (텍스트 모드 csv.writer와 같은 CRLF 줄바꿈)"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue().encode('utf-8')
+
+
+class _OffsetLines:
+    """바이너리 파일을 한 줄씩 디코딩해 돌려주며 다음 줄의 시작 위치를 기록합니다. (csv.reader 입력용)"""
+
+    def __init__(self, f):
+        self.f = f
+        self.position = f.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        self.position += len(line)
+        return line.decode('utf-8')
+
+
+class _UserOffsetIndex:
+    """
+    유저별 기록 위치 인덱스: (timestamp, id) 오름차순 키 리스트와 같은 순서의 파일 위치(byte offset)
+    signature(파일 크기, mtime)가 다르면 다른 프로세스가 파일을 바꾼 것이므로 다시 만듭니다.
+    """
+
+    def __init__(self, signature):
+        self.signature = signature
+        self.keys: Dict[str, List[Tuple[str, str]]] = {}
+        self.offsets: Dict[str, List[int]] = {}
+
+    def add(self, row: Dict, offset: int):
+        keys = self.keys.setdefault(row['user_id'], [])
+        offsets = self.offsets.setdefault(row['user_id'], [])
+        key = history_sort_key(row)
+        if not keys or keys[-1] <= key:
+            # 새 기록은 대부분 가장 최신이라 끝에 추가
+            keys.append(key)
+            offsets.append(offset)
+            return
+        pos = bisect_left(keys, key)
+        keys.insert(pos, key)
+        offsets.insert(pos, offset)
+
+    def page_offsets(self, user_id, limit: Optional[int], before=None) -> List[int]:
+        """커서(before) 이전 기록 limit건(None이면 전체)의 위치를 최신순으로 반환"""
+        keys = self.keys.get(user_id)
+        if not keys:
+            return []
+        if before is None:
+            end = len(keys)
+        else:
+            timestamp, interaction_id = before
+            # (timestamp,) < (timestamp, 어떤 id): id가 없으면 해당 timestamp의 기록 전부 제외
+            end = bisect_left(keys, (timestamp,) if interaction_id is None else (timestamp, interaction_id))
+        start = 0 if limit is None else max(0, end - limit)
+        return self.offsets[user_id][start:end][::-1]
+
 
 class HistoryService:
-    def __init__(self):
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.csv_file_path = os.path.join(base_dir, 'data', 'history.csv')
+    def __init__(self, csv_file_path: str = None):
+        self.csv_file_path = csv_file_path or DEFAULT_CSV_PATH
+        # 사후 검증 결과: history.csv 옆의 history_validation.csv (추가 전용)
+        self.validation_csv_path = os.path.splitext(self.csv_file_path)[0] + '_validation.csv'
+        # history.csv 추가/다시 쓰기 직렬화 (HistoryWriter 스레드의 추가와 /feedback 갱신이 겹치면 추가분 유실)
+        # 다시 쓰기는 임시 파일 + rename이라 읽기는 잠금 없이 이전/새 파일 중 하나를 온전히 읽음
+        self._lock = threading.Lock()
+        self._validation_lock = threading.Lock()
+        # 유저별 기록 위치 인덱스 (첫 페이지 조회 시 생성, self._lock으로 보호)
+        self._index: Optional[_UserOffsetIndex] = None
         self._ensure_file_exists()
 
     def _ensure_file_exists(self):
         if not os.path.exists(self.csv_file_path):
             with open(self.csv_file_path, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
-                writer.writerow(['id', 'user_id', 'timestamp', 'query', 'intent', 'response', 'feedback'])
+                writer.writerow(HISTORY_FIELDS)
+
+    def _upgrade_header_locked(self) -> bool:
+        """
+        이전 형식(컬럼 부족)의 history.csv를 현재 HISTORY_FIELDS 헤더로 다시 씁니다. (self._lock 안에서 호출)
+        읽기는 헤더가 달라도 동작하므로 생성 시가 아니라 첫 추가 직전에만 수행합니다. (다시 썼으면 True)
+        """
+        with open(self.csv_file_path, 'r', encoding='utf-8', newline='') as f:
+            header = next(csv.reader(f), None)
+        if header == HISTORY_FIELDS:
+            return False
+        tmp_path = self.csv_file_path + '.tmp'
+        with open(self.csv_file_path, 'r', encoding='utf-8', newline='') as src, \
+                open(tmp_path, 'w', newline='', encoding='utf-8') as dst:
+            writer = csv.DictWriter(dst, fieldnames=HISTORY_FIELDS, extrasaction='ignore', restval='')
+            writer.writeheader()
+            writer.writerows(csv.DictReader(src))
+        os.replace(tmp_path, self.csv_file_path)
+        # 행 위치가 바뀌었으므로 위치 인덱스는 다음 조회 때 다시 만듦
+        self._index = None
+        return True
 
     def log_interaction(self, user_id, query, intent, response):
         """대화 내용을 기록합니다."""
-        interaction_id = str(int(datetime.now().timestamp() * 1000)) # Simple unique ID based on timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-        
-        # response가 객체일 수 있으므로 문자열 변환 (간단히 메시지만 저장)
-        response_text = response.get('message', '') if isinstance(response, dict) else str(response)
-
-        with open(self.csv_file_path, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow([interaction_id, user_id, timestamp, query, intent, response_text, ''])
-            
-        return interaction_id
-
-    def get_user_history(self, user_id):
-        """특정 사용자의 대화 기록을 최신순으로 반환합니다."""
-        history = []
+        interaction = build_interaction(user_id, query, intent, response)
+        self.append_interactions([interaction])
+        return interaction["id"]
+
+    def append_interactions(self, interactions: List[Dict]):
+        """여러 기록을 파일을 한 번 열어 추가합니다. (HistoryWriter 일괄 저장, 위치 인덱스도 함께 갱신)"""
+        with self._lock:
+            self._ensure_file_exists()
+            self._upgrade_header_locked()
+            index = self._current_index()
+            with open(self.csv_file_path, 'ab') as f:
+                for row in interactions:
+                    offset = f.tell()
+                    f.write(_encode_csv_row([row.get(k, '') for k in HISTORY_FIELDS]))
+                    if index is not None:
+                        index.add({k: row.get(k, '') for k in ('user_id', 'timestamp', 'id')}, offset)
+            if index is not None:
+                index.signature = self._file_signature()
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.csv_file_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _current_index(self) -> Optional[_UserOffsetIndex]:
+        """만들어져 있고 파일과 맞는 인덱스 (없거나 파일이 밖에서 바뀌었으면 None, self._lock 안에서 호출)"""
+        if self._index is not None and self._index.signature != self._file_signature():
+            self._index = None
+        return self._index
+
+    def _build_index(self) -> _UserOffsetIndex:
+        """파일을 한 번 읽어 유저별 위치 인덱스를 만듭니다. (self._lock 안에서 호출)"""
+        index = _UserOffsetIndex(self._file_signature())
+        with open(self.csv_file_path, 'rb') as f:
+            lines = _OffsetLines(f)
+            reader = csv.reader(lines)
+            header = next(reader, None) or HISTORY_FIELDS
+            while True:
+                offset = lines.position
+                values = next(reader, None)
+                if values is None:
+                    break
+                if values:
+                    index.add(dict(zip(header, values)), offset)
+        self._index = index
+        return index
+
+    def _read_rows_at(self, offsets: List[int]) -> List[Dict]:
+        """위치 인덱스의 행들을 읽습니다. (self._lock 안에서 호출, 읽는 양은 행 수에 비례)"""
+        rows = []
+        with open(self.csv_file_path, 'rb') as f:
+            header = next(csv.reader(_OffsetLines(f)))
+            for offset in offsets:
+                f.seek(offset)
+                values = next(csv.reader(_OffsetLines(f)))
+                rows.append(_complete_row(dict(zip(header, values))))
+        return rows
+
+    def get_user_history(self, user_id, before=None):
+        """특정 사용자의 대화 기록(커서 before 이전)을 최신순 (timestamp, id 내림차순)으로 반환합니다."""
+        return self._get_page(user_id, None, before)
+
+    def get_user_history_page(self, user_id, limit: int, before=None) -> List[Dict]:
+        """
+        커서(before) 이전 기록 limit건을 (timestamp, id) 내림차순으로 반환합니다.
+        위치 인덱스에서 해당 행만 찾아 읽으므로 페이지 크기만큼만 읽습니다. (인덱스를 처음 만들 때만 전체 파일)
+        """
+        return self._get_page(user_id, limit, before)
+
+    def _get_page(self, user_id, limit: Optional[int], before=None) -> List[Dict]:
         if not os.path.exists(self.csv_file_path):
-            return history
+            return []
+        with self._lock:
+            index = self._current_index() or self._build_index()
+            return self._read_rows_at(index.page_offsets(user_id, limit, before))
 
-        with open(self.csv_file_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['user_id'] == user_id:
-                    history.append(row)
-        
-        # 최신순 정렬 (timestamp 기준 내림차순, 단순 문자열 비교도 YYYY-MM-DD 형식이면 가능)
-        return sorted(history, key=lambda x: x['timestamp'], reverse=True)
+    def iter_user_history(self, user_id, chunk_size: int, before=None) -> Iterator[List[Dict]]:
+        """커서(before) 이전 기록을 최신순으로 chunk_size건씩 반환합니다. (NDJSON 스트리밍, 페이지마다 인덱스 조회)"""
+        while True:
+            page = self.get_user_history_page(user_id, chunk_size, before)
+            if page:
+                yield page
+            if len(page) < chunk_size:
+                return
+            before = (page[-1]['timestamp'], page[-1]['id'])
+
+    def iter_interactions(self, chunk_size: int = 1000, skip: int = 0) -> Iterator[List[Dict]]:
+        """전체 기록을 저장 순서대로 chunk_size건씩 스트리밍합니다. (앞의 skip건 제외, 일괄 검증용)"""
+        if not os.path.exists(self.csv_file_path):
+            return
+        with open(self.csv_file_path, 'r', encoding='utf-8', newline='') as f:
+            rows = itertools.islice(csv.DictReader(f), skip, None)
+            while True:
+                chunk = [_complete_row(row) for row in itertools.islice(rows, chunk_size)]
+                if not chunk:
+                    return
+                yield chunk
+
+    def get_interaction(self, interaction_id) -> Optional[Dict]:
+        """id로 대화 기록 한 건 조회 (없으면 None)"""
+        if not os.path.exists(self.csv_file_path):
+            return None
+        with open(self.csv_file_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                if row['id'] == str(interaction_id):
+                    return _complete_row(row)
+        return None
 
     def update_feedback(self, interaction_id, feedback_type):
-        """특정 대화의 피드백을 업데이트합니다."""
+        """특정 대화의 피드백을 업데이트합니다. (읽기~다시 쓰기 동안 추가를 막음)"""
         rows = []
         updated = False
         
         if not os.path.exists(self.csv_file_path):
             return False
 
-        with open(self.csv_file_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames
-            for row in reader:
-                if row['id'] == str(interaction_id):
-                    row['feedback'] = feedback_type
-                    updated = True
-                rows.append(row)
+        with self._lock:
+            with open(self.csv_file_path, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    if row['id'] == str(interaction_id):
+                        row['feedback'] = feedback_type
+                        updated = True
+                    rows.append(row)
 
-        if updated:
-            with open(self.csv_file_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(rows)
+            if updated:
+                # 다시 쓰면서 위치 인덱스도 새 파일 기준으로 다시 만듦 (행 위치가 바뀌므로)
+                # 이전 형식 파일은 이때 현재 헤더로 바뀜
+                index = _UserOffsetIndex(None)
+                tmp_path = self.csv_file_path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(_encode_csv_row(HISTORY_FIELDS))
+                    for row in rows:
+                        index.add(row, f.tell())
+                        f.write(_encode_csv_row([row.get(k) or '' for k in HISTORY_FIELDS]))
+                os.replace(tmp_path, self.csv_file_path)
+                index.signature = self._file_signature()
+                self._index = index
                 
         return updated
+
+    def record_validation(self, interaction_id, result: Dict):
+        """사후 검증 결과를 기록합니다. (같은 id를 다시 검증하면 마지막 결과가 유효)"""
+        record = build_validation_record(interaction_id, result)
+        with self._validation_lock:
+            is_new = not os.path.exists(self.validation_csv_path)
+            with open(self.validation_csv_path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=VALIDATION_FIELDS)
+                if is_new:
+                    writer.writeheader()
+                writer.writerow(record)
+
+    def get_validation(self, interaction_id) -> Optional[Dict]:
+        """특정 대화의 사후 검증 결과 (없으면 None)"""
+        if not os.path.exists(self.validation_csv_path):
+            return None
+        latest = None
+        with open(self.validation_csv_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                if row['interaction_id'] == str(interaction_id):
+                    latest = row
+        return parse_validation_record(latest) if latest else None
+
+    def close(self):
+        """저장소 자원 정리 (서버 종료 시)"""
+
+
+class SQLiteHistoryService:
+    """
+    SQLite 기반 대화 기록 (HistoryService와 같은 메서드/반환 형식)
+
+    - get_user_history / get_user_history_page: (user_id, timestamp, id) 인덱스 범위 조회
+    - update_feedback: id 기본 키로 한 행만 UPDATE
+    DB가 비어 있으면 seed_csv_path의 기록을 한 번 가져옵니다. (tools/migrate_history.py로도 가능)
+    """
+
+    def __init__(self, db_path: str = None, seed_csv_path: str = None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+        if seed_csv_path and len(self) == 0:
+            self.import_csv(seed_csv_path)
+
+    def _create_schema(self):
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                " id TEXT PRIMARY KEY, user_id TEXT NOT NULL, timestamp TEXT NOT NULL,"
+                " query TEXT, intent TEXT, response TEXT, feedback TEXT NOT NULL DEFAULT '',"
+                " cache_key TEXT NOT NULL DEFAULT '', cache_category TEXT NOT NULL DEFAULT '')"
+            )
+            # 이전 스키마 DB에 추가된 컬럼 반영
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(history)")}
+            for column in HISTORY_FIELDS:
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE history ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+            # 커서 페이지 조회용 (user_id, timestamp, id) - 이전 (user_id, timestamp) 인덱스를 대체
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_user_ts_id ON history(user_id, timestamp, id)")
+            self._conn.execute("DROP INDEX IF EXISTS idx_history_user_ts")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS history_validation ("
+                " interaction_id TEXT PRIMARY KEY, validated_at TEXT NOT NULL,"
+                " valid TEXT NOT NULL, tier TEXT, issues TEXT NOT NULL DEFAULT '')"
+            )
+
+    def import_rows(self, rows: Iterable[Dict]) -> int:
+        """기록을 일괄 추가합니다. 이미 있는 id는 건너뜁니다. 추가된 행 수를 반환합니다."""
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO history ({', '.join(HISTORY_FIELDS)}) VALUES ({', '.join('?' * len(HISTORY_FIELDS))})",
+                (tuple(row.get(k) or "" for k in HISTORY_FIELDS) for row in rows)
+            )
+            return self._conn.total_changes - before
+
+    def import_csv(self, csv_path: str) -> int:
+        """history.csv를 스트리밍으로 가져옵니다."""
+        if not os.path.exists(csv_path):
+            return 0
+        with open(csv_path, mode='r', encoding='utf-8', newline='') as f:
+            return self.import_rows(csv.DictReader(f))
+
+    def log_interaction(self, user_id, query, intent, response):
+        """대화 내용을 기록합니다."""
+        interaction = build_interaction(user_id, query, intent, response)
+        self.append_interactions([interaction])
+        return interaction["id"]
+
+    def append_interactions(self, interactions: List[Dict]):
+        """여러 기록을 트랜잭션 하나로 추가합니다."""
+        self.import_rows(interactions)
+
+    def get_user_history(self, user_id, before=None) -> List[Dict]:
+        """특정 사용자의 대화 기록(커서 before 이전)을 최신순으로 반환합니다."""
+        return self.get_user_history_page(user_id, -1, before)
+
+    def get_user_history_page(self, user_id, limit: int, before=None) -> List[Dict]:
+        """커서(before) 이전 기록 limit건(-1이면 전체) - 인덱스 범위 조회라 페이지 크기만큼만 읽습니다."""
+        sql = f"SELECT {', '.join(HISTORY_FIELDS)} FROM history WHERE user_id = ?"
+        params = [user_id]
+        if before is not None:
+            timestamp, interaction_id = before
+            if interaction_id is None:
+                sql += " AND timestamp < ?"
+                params.append(timestamp)
+            else:
+                sql += " AND (timestamp, id) < (?, ?)"
+                params.extend([timestamp, interaction_id])
+        sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def iter_user_history(self, user_id, chunk_size: int, before=None) -> Iterator[List[Dict]]:
+        """커서(before) 이전 기록을 최신순으로 chunk_size건씩 반환합니다. (페이지마다 인덱스 범위 조회)"""
+        while True:
+            page = self.get_user_history_page(user_id, chunk_size, before)
+            if page:
+                yield page
+            if len(page) < chunk_size:
+                return
+            before = (page[-1]['timestamp'], page[-1]['id'])
+
+    def iter_interactions(self, chunk_size: int = 1000, skip: int = 0) -> Iterator[List[Dict]]:
+        """전체 기록을 저장 순서(rowid)대로 chunk_size건씩 스트리밍합니다. (앞의 skip건 제외, 일괄 검증용)"""
+        last_rowid = 0
+        if skip:
+            with self._lock:
+                row = self._conn.execute("SELECT rowid FROM history ORDER BY rowid LIMIT 1 OFFSET ?", (skip - 1,)).fetchone()
+            if row is None:
+                return
+            last_rowid = row[0]
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT rowid, {', '.join(HISTORY_FIELDS)} FROM history WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1]['rowid']
+            yield [{k: row[k] for k in HISTORY_FIELDS} for row in rows]
+
+    def get_interaction(self, interaction_id) -> Optional[Dict]:
+        """id로 대화 기록 한 건 조회 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(HISTORY_FIELDS)} FROM history WHERE id = ?", (str(interaction_id),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def update_feedback(self, interaction_id, feedback_type):
+        """특정 대화의 피드백을 업데이트합니다."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE history SET feedback = ? WHERE id = ?", (feedback_type, str(interaction_id))
+            )
+            return cursor.rowcount > 0
+
+    def record_validation(self, interaction_id, result: Dict):
+        """사후 검증 결과를 기록합니다. (같은 id를 다시 검증하면 덮어씀)"""
+        record = build_validation_record(interaction_id, result)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO history_validation ({', '.join(VALIDATION_FIELDS)})"
+                f" VALUES ({', '.join('?' * len(VALIDATION_FIELDS))})",
+                tuple(record[k] for k in VALIDATION_FIELDS)
+            )
+
+    def get_validation(self, interaction_id) -> Optional[Dict]:
+        """특정 대화의 사후 검증 결과 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(VALIDATION_FIELDS)} FROM history_validation WHERE interaction_id = ?",
+                (str(interaction_id),)
+            ).fetchone()
+        return parse_validation_record(dict(row)) if row else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+
+def create_history_service(backend: str = None):
+    """settings.HISTORY_STORE_BACKEND("csv" | "sqlite")에 맞는 기록 저장소를 생성합니다."""
+    backend = (backend or settings.HISTORY_STORE_BACKEND).lower()
+    if backend == "sqlite":
+        return SQLiteHistoryService(DEFAULT_DB_PATH, seed_csv_path=DEFAULT_CSV_PATH)
+    if backend == "csv":
+        return HistoryService(DEFAULT_CSV_PATH)
+    raise ValueError(f"지원하지 않는 HISTORY_STORE_BACKEND: {backend}")
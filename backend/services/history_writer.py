@@ -0,0 +1,263 @@
+"""
+대화 기록 비동기 일괄 저장 (요청 경로에서 파일/DB 쓰기 제거)
+- submit(): 기록을 제한된 큐에 넣고 interaction_id를 즉시 반환 (큐가 가득 차면 버리고 카운트, None 반환)
+- 백그라운드 태스크가 batch_size건이 모이거나 flush_interval초가 지나면 한 번에 저장
+- stop(): 서버 종료 시 남은 기록을 모두 저장
+- 아직 저장 전인 기록도 get_user_history / update_feedback에서 보이도록 처리
+- get_interaction / update_feedback은 저장소 접근을 스레드에서 수행 (CSV는 조회/갱신마다 파일 전체를 읽음)
+- record_feedback(): 이전 기록 조회 → 피드백 갱신 → 콜백(캐시 투표)을 같은 id끼리 직렬화
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+import settings
+from services.history import build_interaction, history_sort_key, is_before
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    def __init__(self, store,
+                 max_queue: int = settings.HISTORY_QUEUE_MAX,
+                 batch_size: int = settings.HISTORY_BATCH_SIZE,
+                 flush_interval: float = settings.HISTORY_FLUSH_INTERVAL):
+        self.store = store
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # 큐에 있는 기록 (id → row), 저장 중인 기록, 저장 중에 들어온 피드백
+        self._queued: Dict[str, Dict] = {}
+        self._inflight: Dict[str, Dict] = {}
+        self._late_feedback: Dict[str, str] = {}
+        # 피드백 처리 중인 id → [잠금, 대기 수] (대기가 없어지면 제거)
+        self._feedback_locks: Dict[str, List] = {}
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.feedback_failed = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        """이벤트 루프 안에서 호출 (app lifespan)"""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._batch_full = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    def submit(self, user_id, query, intent, response) -> Optional[str]:
+        """기록을 저장 대기열에 넣고 interaction_id를 반환합니다. (대기열이 가득 차 버린 기록은 None)"""
+        interaction = build_interaction(user_id, query, intent, response)
+        if self._task is None:
+            # 워커가 없으면(스크립트/테스트) 바로 저장
+            self.store.append_interactions([interaction])
+            self.written += 1
+            return interaction["id"]
+
+        try:
+            self._queue.put_nowait(interaction)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            # 과부하 시 로그 폭주 방지 (첫 건 + 100건마다)
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                logger.warning(f"[HistoryWriter] 저장 대기열이 가득 차 기록을 버립니다 (누적 {self.dropped}건)")
+            return None
+
+        self._queued[interaction["id"]] = interaction
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_full.set()
+        return interaction["id"]
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if not self._stopping and self._queue.qsize() < self.batch_size - 1:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+
+            # None은 stop()이 넣는 깨우기용 값
+            batch = [first] if first is not None else []
+            while not self._queue.empty() and len(batch) < self.batch_size:
+                row = self._queue.get_nowait()
+                if row is not None:
+                    batch.append(row)
+            if batch:
+                await self._write(batch)
+
+            if self._stopping and self._queue.empty():
+                return
+
+    async def _write(self, batch: List[Dict]):
+        for row in batch:
+            self._queued.pop(row["id"], None)
+            self._inflight[row["id"]] = row
+
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.store.append_interactions, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"[HistoryWriter] 기록 {len(batch)}건 저장 실패: {e}")
+        finally:
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            for row in batch:
+                self._inflight.pop(row["id"], None)
+
+        # 저장 중에 들어온 피드백 반영
+        for row in batch:
+            feedback = self._late_feedback.pop(row["id"], None)
+            if feedback is None:
+                continue
+            try:
+                await asyncio.to_thread(self.store.update_feedback, row["id"], feedback)
+            except Exception as e:
+                # 워커 태스크가 종료되지 않도록 실패만 기록
+                self.feedback_failed += 1
+                logger.error(f"[HistoryWriter] 피드백 저장 실패 (interaction_id={row['id']}): {e}")
+
+    async def stop(self):
+        """남은 기록을 모두 저장하고 워커를 종료합니다."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._batch_full.set()
+        try:
+            self._queue.put_nowait(None) # get()에서 대기 중인 워커 깨우기
+        except asyncio.QueueFull:
+            pass
+        await self._task
+        self._task = None
+        logger.info(f"[HistoryWriter] 종료: {self.stats()}")
+
+    async def get_user_history(self, user_id) -> List[Dict]:
+        """저장소 기록 + 아직 저장되지 않은 기록 (최신순)"""
+        pending = self._pending_rows(user_id)
+        history = await asyncio.to_thread(self.store.get_user_history, user_id)
+        return self._merge(history, pending)
+
+    def _pending_rows(self, user_id, before=None) -> List[Dict]:
+        """아직 저장되지 않은 기록 (최신순)"""
+        rows = [dict(row) for row in list(self._inflight.values()) + list(self._queued.values())
+                if row["user_id"] == user_id and is_before(row, before)]
+        return sorted(rows, key=history_sort_key, reverse=True)
+
+    @staticmethod
+    def _merge(stored: List[Dict], pending: List[Dict]) -> List[Dict]:
+        """최신순으로 정렬된 두 목록을 합칩니다. (저장 직후 아직 inflight에 남은 기록은 한 번만)"""
+        if not pending:
+            return stored
+        pending_ids = {row["id"] for row in pending}
+        stored = [row for row in stored if row["id"] not in pending_ids]
+        return list(heapq.merge(stored, pending, key=history_sort_key, reverse=True))
+
+    async def get_user_history_page(self, user_id, limit: int, before=None) -> List[Dict]:
+        """저장소 페이지 + 아직 저장되지 않은 기록을 합친 limit건"""
+        pending = self._pending_rows(user_id, before)
+        page = await asyncio.to_thread(self.store.get_user_history_page, user_id, limit, before)
+        return self._merge(page, pending)[:limit]
+
+    async def stream_user_history(self, user_id, chunk_size: int, before=None,
+                                  limit: Optional[int] = None) -> AsyncIterator[Dict]:
+        """
+        커서(before) 이전 기록을 최신순으로 한 건씩 반환합니다. (NDJSON 스트리밍)
+        저장소 읽기는 스레드에서 chunk_size건씩 수행 (CSV는 파일을 한 번만 읽음)
+        """
+        pending = self._pending_rows(user_id, before)
+        chunks = self.store.iter_user_history(user_id, chunk_size, before)
+        sent = 0
+        try:
+            while limit is None or sent < limit:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                # 저장소 기록보다 최신인 대기 기록을 먼저 (마지막 chunk 뒤에는 남은 대기 기록 전부)
+                rows = self._merge(chunk or [], pending)
+                if chunk:
+                    boundary = history_sort_key(chunk[-1])
+                    pending = [row for row in pending if history_sort_key(row) < boundary]
+                    rows = [row for row in rows if history_sort_key(row) >= boundary]
+                else:
+                    pending = []
+                for row in rows:
+                    if limit is not None and sent >= limit:
+                        return
+                    yield row
+                    sent += 1
+                if chunk is None:
+                    return
+        finally:
+            chunks.close()
+
+    async def get_interaction(self, interaction_id) -> Optional[Dict]:
+        """아직 저장되지 않은 기록까지 포함해 id로 한 건 조회"""
+        interaction_id = str(interaction_id)
+        row = self._queued.get(interaction_id) or self._inflight.get(interaction_id)
+        if row is not None:
+            row = dict(row)
+            if interaction_id in self._late_feedback:
+                row["feedback"] = self._late_feedback[interaction_id]
+            return row
+        return await asyncio.to_thread(self.store.get_interaction, interaction_id)
+
+    async def update_feedback(self, interaction_id, feedback_type) -> bool:
+        interaction_id = str(interaction_id)
+        if interaction_id in self._queued:
+            self._queued[interaction_id]["feedback"] = feedback_type
+            return True
+        if interaction_id in self._inflight:
+            self._late_feedback[interaction_id] = feedback_type
+            return True
+        return await asyncio.to_thread(self.store.update_feedback, interaction_id, feedback_type)
+
+    async def record_feedback(self, interaction_id, feedback_type,
+                              on_recorded: Callable[[Dict], None] = None) -> bool:
+        """
+        피드백을 갱신하고, 갱신했으면 on_recorded(갱신 전 기록)를 호출합니다. (기록이 없으면 False)
+        같은 id의 요청은 조회~콜백까지 한 번에 하나씩 처리하므로, 동시에 들어온 두 투표가
+        같은 '이전 피드백'을 보고 캐시 항목을 두 번 승격/거부하지 않습니다.
+        on_recorded는 스레드에서 실행합니다. (캐시 저널 기록/fsync가 이벤트 루프를 막지 않도록)
+        """
+        interaction_id = str(interaction_id)
+        entry = self._feedback_locks.setdefault(interaction_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                previous = await self.get_interaction(interaction_id)
+                if previous is None or not await self.update_feedback(interaction_id, feedback_type):
+                    return False
+                if on_recorded is not None:
+                    await asyncio.to_thread(on_recorded, previous)
+                return True
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._feedback_locks[interaction_id]
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "inflight": len(self._inflight),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "feedback_failed": self.feedback_failed,
+            "batches": self.batches,
+            "last_flush_ms": self.last_flush_ms,
+        }
@@ -0,0 +1,202 @@
+"""
+LLM 호출용 공유 HTTP 클라이언트 팩토리
+- CSAgent / ClassificationService(ChatOpenAI)와 LLMAgent(OpenAI)가 같은 커넥션 풀을 사용
+- keep-alive 커넥션 재사용으로 요청마다 TLS 핸드셰이크가 발생하지 않도록 함
+- HTTP/2 (h2 패키지가 설치된 경우), 연결/읽기 타임아웃 설정
+- 풀 사용률 메트릭 제공
+"""
+
+import logging
+import threading
+from typing import Dict, Optional
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    """httpx의 HTTP/2 지원은 h2 패키지가 있어야 동작합니다."""
+    if not settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HTTPClientFactory:
+    """
+    프로세스 전체에서 공유하는 sync/async httpx 클라이언트를 생성합니다.
+
+    클라이언트는 최초 요청 시 한 번만 만들어지며, OpenAI SDK 클라이언트도
+    (api_key, base_url, max_retries) 조합별로 재사용합니다.
+    """
+
+    def __init__(self,
+                 max_connections: int = settings.HTTP_MAX_CONNECTIONS,
+                 max_keepalive_connections: int = settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                 keepalive_expiry: float = settings.HTTP_KEEPALIVE_EXPIRY,
+                 connect_timeout: float = settings.HTTP_CONNECT_TIMEOUT,
+                 read_timeout: float = settings.HTTP_READ_TIMEOUT,
+                 pool_timeout: float = settings.HTTP_POOL_TIMEOUT):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_timeout = pool_timeout
+        self.http2 = _http2_available()
+
+        self._lock = threading.RLock()
+        self._sync_client = None
+        self._async_client = None
+        self._openai_clients = {}
+        self.requests_total = {"sync": 0, "async": 0}
+
+    def _client_kwargs(self) -> Dict:
+        import httpx
+
+        return {
+            "http2": self.http2,
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            "timeout": httpx.Timeout(
+                self.read_timeout,
+                connect=self.connect_timeout,
+                pool=self.pool_timeout
+            ),
+        }
+
+    def get_sync_client(self):
+        """공유 httpx.Client"""
+        with self._lock:
+            if self._sync_client is None:
+                import httpx
+
+                def on_request(request):
+                    self.requests_total["sync"] += 1
+
+                self._sync_client = httpx.Client(event_hooks={"request": [on_request]}, **self._client_kwargs())
+                logger.info(f"  ✅ 공유 HTTP 클라이언트 생성 (sync, http2={self.http2})")
+            return self._sync_client
+
+    def get_async_client(self):
+        """공유 httpx.AsyncClient"""
+        with self._lock:
+            if self._async_client is None:
+                import httpx
+
+                async def on_request(request):
+                    self.requests_total["async"] += 1
+
+                self._async_client = httpx.AsyncClient(event_hooks={"request": [on_request]}, **self._client_kwargs())
+                logger.info(f"  ✅ 공유 HTTP 클라이언트 생성 (async, http2={self.http2})")
+            return self._async_client
+
+    def openai_client(self, api_key: str = None, base_url: str = None, max_retries: int = None):
+        """공유 커넥션 풀을 사용하는 openai.OpenAI"""
+        return self._get_openai_client(False, api_key, base_url, max_retries)
+
+    def async_openai_client(self, api_key: str = None, base_url: str = None, max_retries: int = None):
+        """공유 커넥션 풀을 사용하는 openai.AsyncOpenAI"""
+        return self._get_openai_client(True, api_key, base_url, max_retries)
+
+    def _get_openai_client(self, is_async: bool, api_key: Optional[str], base_url: Optional[str], max_retries: Optional[int]):
+        api_key = api_key or settings.OPENAI_API_KEY
+        base_url = base_url or settings.OPENAI_BASE_URL
+        max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+        key = (is_async, api_key, base_url, max_retries)
+
+        with self._lock:
+            client = self._openai_clients.get(key)
+            if client is None:
+                from openai import AsyncOpenAI, OpenAI
+
+                client_cls = AsyncOpenAI if is_async else OpenAI
+                http_client = self.get_async_client() if is_async else self.get_sync_client()
+                client = client_cls(
+                    api_key=api_key,
+                    base_url=base_url,
+                    max_retries=max_retries,
+                    http_client=http_client
+                )
+                self._openai_clients[key] = client
+            return client
+
+    def chat_model(self, model: str, temperature: float = 0.0, api_key: str = None, **kwargs):
+        """
+        공유 커넥션 풀을 사용하는 LangChain ChatOpenAI
+
+        ChatOpenAI는 client/async_client가 주어지면 자체 클라이언트를 만들지 않습니다.
+        """
+        from langchain_openai import ChatOpenAI
+
+        api_key = api_key or settings.OPENAI_API_KEY
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            api_key=api_key,
+            client=self.openai_client(api_key=api_key).chat.completions,
+            async_client=self.async_openai_client(api_key=api_key).chat.completions,
+            **kwargs
+        )
+
+    def pool_stats(self) -> Dict:
+        """커넥션 풀 사용률 메트릭"""
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "sync": self._client_pool_stats(self._sync_client, "sync"),
+            "async": self._client_pool_stats(self._async_client, "async"),
+        }
+
+    def _client_pool_stats(self, client, kind: str) -> Dict:
+        stats = {"created": client is not None, "requests_total": self.requests_total[kind]}
+        if client is None:
+            return stats
+
+        # httpx는 풀 상태를 공개 API로 노출하지 않으므로 httpcore 풀을 직접 조회
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for conn in connections if conn.is_idle())
+        active = len(connections) - idle
+        # httpcore의 _requests에는 처리 중인 요청과 커넥션을 기다리는 요청이 함께 들어 있음
+        queued = len(getattr(pool, "_requests", []) or [])
+        stats.update({
+            "connections": len(connections),
+            "active": active,
+            "idle": idle,
+            "waiting_requests": max(queued - active, 0),
+            "utilization": round(active / max(self.max_connections, 1), 3),
+        })
+        return stats
+
+    async def aclose(self):
+        """서버 종료 시 커넥션 풀 정리"""
+        with self._lock:
+            sync_client, async_client = self._sync_client, self._async_client
+            self._sync_client = self._async_client = None
+            self._openai_clients = {}
+        if sync_client is not None:
+            sync_client.close()
+        if async_client is not None:
+            await async_client.aclose()
+
+
+_factory = None
+_factory_lock = threading.Lock()
+
+
+def get_client_factory() -> HTTPClientFactory:
+    """프로세스 공유 HTTPClientFactory"""
+    global _factory
+    with _factory_lock:
+        if _factory is None:
+            _factory = HTTPClientFactory()
+        return _factory
@@ -0,0 +1,233 @@
+"""
+Write-Ahead Journal (append-only JSON lines)
+- 레코드는 즉시 OS 버퍼까지 기록(flush)하고, fsync는 묶어서 수행 (group commit)
+  fsync_batch개가 쌓이거나 fsync_interval초가 지나면 디스크에 동기화
+- 사용자에게 확정을 알리는 변경은 wait_synced()로 해당 레코드가 fsync될 때까지 대기
+  (이미 다른 쓰기의 fsync에 포함되었으면 대기 없이 반환)
+- 재시작 시 replay()로 스냅샷 이후 변경분을 다시 적용
+- 스냅샷 압축(compaction) 후 discard_before()로 반영된 구간을 잘라냄
+- 쓰기 도중 중단되어 잘린 마지막 줄은 무시하고 제거
+- WriterLock: 저널/스냅샷을 한 프로세스만 쓰도록 하는 잠금 파일 (서버와 오프라인 도구가 동시에 쓰지 않도록)
+- fsync_directory: rename(os.replace) 후 상위 디렉토리를 fsync (크래시 시 rename 자체가 사라지지 않도록)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class WriterLockHeld(RuntimeError):
+    """다른 프로세스가 이미 쓰기 잠금을 가지고 있음"""
+
+    def __init__(self, path: str, owner: str = ""):
+        self.path = path
+        self.owner = owner
+        super().__init__(f"다른 프로세스{f'(pid {owner})' if owner else ''}가 사용 중입니다: {path}")
+
+
+class WriterLock:
+    """
+    <path>에 대한 프로세스 간 배타 잠금 (OS 파일 잠금, 프로세스가 종료되면 자동 해제)
+    잠금 파일에는 소유 프로세스의 pid를 기록합니다. (거절 메시지용)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        """잠금 획득, 이미 잡혀 있으면 기다리지 않고 WriterLockHeld"""
+        f = open(self.path, 'a+', encoding='utf-8')
+        try:
+            f.seek(0)
+            _lock_file(f)
+        except OSError:
+            f.seek(0)
+            owner = f.read().strip()
+            f.close()
+            raise WriterLockHeld(self.path, owner)
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._file = f
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            self._file.seek(0)
+            _unlock_file(self._file)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+def fsync_directory(path: str):
+    """path가 들어 있는 디렉토리 항목을 디스크에 동기화합니다. (Windows는 디렉토리를 열 수 없어 생략)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _lock_file(f):
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock_file(f):
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class WriteAheadJournal:
+    def __init__(self, path: str, fsync_batch: int = 16, fsync_interval: float = 0.1):
+        self.path = path
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Lock()
+        self._repair_tail()
+        self._file = open(self.path, 'ab')
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._timer = None
+
+        self.entries = sum(1 for _ in self.replay())
+        self.appended = 0
+        self.fsyncs = 0
+        # 디스크에 동기화된 마지막 레코드 번호 (appended 기준)
+        self._synced_seq = 0
+
+    def _repair_tail(self):
+        """마지막 줄이 개행 없이 끝났다면(쓰기 중 크래시) 마지막 완전한 줄까지 잘라냅니다."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if not data or data.endswith(b"\n"):
+                return
+            keep = data.rfind(b"\n") + 1
+            logger.warning(f"[Journal] 불완전한 마지막 레코드 제거: {self.path} ({len(data) - keep} bytes)")
+            f.truncate(keep)
+
+    def append(self, record: Dict, sync: bool = False) -> int:
+        """레코드 추가. sync=True면 즉시 fsync, 레코드 번호(wait_synced 인자)를 반환"""
+        line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            self.entries += 1
+            self.appended += 1
+
+            if sync or self._unsynced >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._fsync_locked()
+            elif self._timer is None:
+                # 배치가 차지 않아도 fsync_interval 안에는 디스크에 반영되도록 예약
+                self._timer = threading.Timer(self.fsync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+            return self.appended
+
+    def _fsync_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self.fsyncs += 1
+            self._unsynced = 0
+        self._synced_seq = self.appended
+        self._last_sync = time.monotonic()
+
+    def wait_synced(self, seq: int):
+        """seq번 레코드까지 디스크에 동기화되었음을 보장합니다. (그 사이 쌓인 레코드도 함께 fsync)"""
+        with self._lock:
+            if self._synced_seq < seq and not self._file.closed:
+                self._fsync_locked()
+
+    def sync(self):
+        """대기 중인 레코드를 디스크에 동기화"""
+        with self._lock:
+            if not self._file.closed:
+                self._fsync_locked()
+
+    def tell(self) -> int:
+        """현재까지 기록된 바이트 위치 (compaction 기준점)"""
+        with self._lock:
+            return self._file.tell()
+
+    def replay(self) -> Iterator[Dict]:
+        """기록된 레코드를 순서대로 반환합니다."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.endswith(b"\n"):
+                    break # 기록 중인 마지막 줄
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning(f"[Journal] 손상된 레코드 건너뜀: {self.path}:{line_no}")
+
+    def discard_before(self, offset: int):
+        """
+        offset 이전 레코드(스냅샷에 반영 완료)를 제거합니다.
+        offset 이후에 추가된 레코드는 임시 파일 + rename으로 원자적으로 보존합니다.
+        """
+        with self._lock:
+            self._fsync_locked()
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                tail = f.read()
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            fsync_directory(self.path)
+            self._file = open(self.path, 'ab')
+            self.entries = tail.count(b"\n")
+
+    def size(self) -> int:
+        """디스크상의 저널 크기 (다른 프로세스의 쓰기 감지용)"""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._fsync_locked()
+            self._file.close()
+
+    def stats(self) -> Dict:
+        return {
+            "entries": self.entries,
+            "appended": self.appended,
+            "fsyncs": self.fsyncs,
+            "unsynced": self._unsynced,
+        }
@@ -3,22 +3,28 @@ B파트: 캐시 시스템이 추가된 RAG
 - 사용자 피드백 기반 캐시
 - 검증된 답변 재사용
 - LLM 비용 절감
+
+sentence_transformers(torch), faiss는 import 비용이 크므로 실제 사용 시점에 로드합니다.
 """
 
-from sentence_transformers import SentenceTransformer
-import faiss
-import numpy as np
-import pandas as pd
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
+from collections import deque
+import csv
 import logging
 import os
 import re
+import threading
 import time
 import json
 import hashlib
 from dotenv import load_dotenv
+from services.http_client import get_client_factory
+from services.journal import WriteAheadJournal, WriterLock, WriterLockHeld, fsync_directory
+from services.query_normalizer import normalize_query
+from services.resilience import CircuitOpenError, Deadline, DeadlineExceeded, DependencyUnavailable, get_breaker
+import settings
 
 load_dotenv()
 
@@ -36,9 +42,20 @@ class AnswerCache:
     1. 질문-답변 쌍 저장
     2. 사용자 피드백 기반 캐싱
     3. 캐시 히트 시 즉시 반환 (LLM 호출 없음)
+
+    저장 방식:
+    - answer_cache.json(스냅샷) + answer_cache.json.journal(변경 저널)
+    - 변경마다 저널에 한 줄 추가(O(1))하고, compact_every건마다 백그라운드에서
+      스냅샷을 임시 파일 + rename으로 원자적으로 다시 씀 (시작 시 스냅샷 로드 후 저널 replay)
+    - 통계(get_stats)는 변경 시점에 갱신하는 카운터로 O(1) 조회
+    - 한 프로세스만 씀: 열려 있는 동안 answer_cache.json.lock을 잡고(close()에서 해제),
+      이미 다른 프로세스(서버, 오프라인 도구)가 잡고 있으면 WriterLockHeld
     """
     
-    def __init__(self, cache_file: str = "backend/data/answer_cache.json"):
+    def __init__(self, cache_file: str = "backend/data/answer_cache.json", journal_path: str = None,
+                 compact_every: int = settings.CACHE_JOURNAL_COMPACT_EVERY,
+                 fsync_batch: int = settings.CACHE_JOURNAL_FSYNC_BATCH,
+                 fsync_interval: float = settings.CACHE_JOURNAL_FSYNC_INTERVAL):
         """캐시 파일 초기화 - 여러 경로 탐색"""
         base_dir = Path(__file__).parent.parent
         
@@ -59,8 +76,32 @@ class AnswerCache:
         
         if not self.cache_file:
             self.cache_file = search_paths[1]
-            
+
+        self._writer_lock = WriterLock(f"{self.cache_file}.lock")
+        self._writer_lock.acquire()
+
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compacting = False
+        self.compactions = 0
+        self._journal = WriteAheadJournal(journal_path or f"{self.cache_file}.journal", fsync_batch, fsync_interval)
+
+        # 항목별 통계 기여분 (verified, rejected, hit_count, bytes) + 합계
+        self._contrib: Dict[str, Tuple] = {}
+        self._totals = {'verified': 0, 'rejected': 0, 'hit_count': 0, 'bytes': 0}
+        # 프로세스 시작 이후 조회 결과 / invalidate()로 삭제한 항목 수 (용량 기반 축출은 없음)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
         self.cache = self._load_cache()
+        # 스냅샷 이후의 변경분 재적용
+        for record in self._journal.replay():
+            self._apply(record)
+        self._rehash_entries()
+        for key in self.cache:
+            self._track(key)
         self.embeddings_cache = {}
         logger.info(f"  ✅ 답변 캐시 초기화 ({len(self.cache)}개 저장됨)")
     
@@ -74,109 +115,404 @@ class AnswerCache:
                 logger.warning(f"캐시 로드 실패: {e}")
                 return {}
         return {}
-    
-    def _save_cache(self):
-        """캐시 파일 저장"""
+
+    def _apply(self, record: Dict):
+        """저널 레코드 하나를 메모리 상태에 적용합니다."""
+        op = record.get('op')
+        if op == 'put':
+            self.cache[record['key']] = record['item']
+        elif op == 'del':
+            for key in record['keys']:
+                self.cache.pop(key, None)
+        elif op == 'hit' and record['key'] in self.cache:
+            item = self.cache[record['key']]
+            item['hit_count'] = item.get('hit_count', 0) + 1
+            item['last_used'] = record.get('last_used')
+
+    def _track(self, key: str):
+        """항목 하나의 통계 기여분을 다시 계산합니다. (변경 후 호출, 전체 순회 없음)"""
+        previous = self._contrib.pop(key, None)
+        if previous:
+            for field, value in zip(self._totals, previous):
+                self._totals[field] -= value
+        item = self.cache.get(key)
+        if item is None:
+            return
+        current = (
+            int(bool(item.get('verified'))),
+            int(bool(item.get('rejected'))),
+            item.get('hit_count', 0),
+            len(json.dumps(item, ensure_ascii=False).encode('utf-8'))
+        )
+        self._contrib[key] = current
+        for field, value in zip(self._totals, current):
+            self._totals[field] += value
+
+    def _append(self, record: Dict, sync: bool = False):
+        """저널 기록, 필요하면 백그라운드 압축 시작"""
+        try:
+            self._journal.append(record, sync=sync)
+        except Exception as e:
+            logger.error(f"캐시 저장 실패: {e}")
+            return
+        if self._journal.entries >= self.compact_every and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self.compact, name="answer-cache-compaction", daemon=True).start()
+
+    def _commit(self, key: str, sync: bool = False):
+        """항목 하나의 변경을 저널에 기록하고 통계를 갱신합니다. (JSON 전체 재작성 없음)"""
+        item = self.cache.get(key)
+        if item is None:
+            self._append({'op': 'del', 'keys': [key]}, sync=sync)
+        else:
+            self._append({'op': 'put', 'key': key, 'item': item}, sync=sync)
+        self._track(key)
+
+    def compact(self):
+        """
+        현재 캐시를 스냅샷(answer_cache.json)으로 원자적으로 저장하고 반영된 저널 구간을 제거합니다.
+        스냅샷을 쓰는 동안에도 조회/변경은 계속 가능하며, 그 사이 추가된 저널은 보존됩니다.
+        """
         try:
-            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
+            with self._compact_lock:
+                with self._lock:
+                    payload = json.dumps(self.cache, ensure_ascii=False, indent=2)
+                    journal_offset = self._journal.tell()
+
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.cache_file.with_name(f"{self.cache_file.name}.tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # 스냅샷 교체 후 저널 정리 전 크래시가 나도 replay가 같은 결과를 만들므로 안전
+                os.replace(tmp_path, self.cache_file)
+                fsync_directory(self.cache_file)
+
+                with self._lock:
+                    self._journal.discard_before(journal_offset)
+                    self.compactions += 1
         except Exception as e:
             logger.error(f"캐시 저장 실패: {e}")
+        finally:
+            self._compacting = False
+
+    def close(self):
+        """대기 중인 저널을 디스크에 동기화하고 쓰기 잠금을 해제합니다."""
+        self._journal.close()
+        self._writer_lock.release()
+    
+    def _rehash_entries(self):
+        """
+        저장된 항목의 키를 현재 정규화 규칙으로 다시 계산합니다. (규칙이 바뀐 뒤 첫 로드 시 한 번 저장)
+        같은 키로 합쳐지는 항목은 검증됨 > 거부 아님 > 히트 수가 많은 순으로 하나만 남깁니다.
+        """
+        rehashed = {}
+        for item in self.cache.values():
+            key = self._get_query_hash(item.get('query', ''), item.get('category'))
+            current = rehashed.get(key)
+            if current is None or self._entry_rank(item) > self._entry_rank(current):
+                rehashed[key] = item
+        if list(rehashed) != list(self.cache):
+            logger.info(f"  🔑 캐시 키 재계산: {len(self.cache)}개 → {len(rehashed)}개")
+            self.cache = rehashed
+            self.compact()
+
+    @staticmethod
+    def _entry_rank(item: Dict) -> Tuple:
+        return (bool(item.get('verified')), not item.get('rejected'), item.get('hit_count', 0))
     
     def _get_query_hash(self, query: str, category: str = None) -> str:
-        """질문의 해시값 생성 - 공백/대소문자 무시"""
-        clean_query = query.strip().lower().replace(" ", "")
+        """질문의 해시값 생성 - 띄어쓰기/문장부호/이모티콘/조사·어미 차이 무시 (query_normalizer)"""
+        clean_query = normalize_query(query)
         key = f"{category}:{clean_query}" if category else clean_query
         return hashlib.md5(key.encode()).hexdigest()
     
-    def get(self, query: str, category: str = None, similarity_threshold: float = 0.95) -> Optional[Dict]:
+    def get(self, query: str, category: str = None) -> Optional[Dict]:
         """캐시에서 답변 조회"""
         query_hash = self._get_query_hash(query, category)
         
-        if query_hash in self.cache:
-            cached_item = self.cache[query_hash]
-            
-            if cached_item.get('verified', False):
+        with self._lock:
+            cached_item = self.cache.get(query_hash)
+            if cached_item is not None and cached_item.get('verified', False):
                 logger.info(f"  💾 캐시 히트! (정확한 매칭)")
-                cached_item['cache_hit'] = True
-                cached_item['cache_type'] = 'exact'
-                return cached_item
-        
+                self.hits += 1
+                # 조회 표시는 반환용 복사본에만 (저장된 항목이 바뀌면 통계의 bytes 기여분과 어긋남)
+                return dict(cached_item, cache_hit=True, cache_type='exact')
+            
+            self.misses += 1
         return None
     
     def add(self, query: str, answer: str, category: str = None, verified: bool = False, feedback_score: int = 0, metadata: Dict = None) -> str:
         """캐시에 답변 추가"""
         query_hash = self._get_query_hash(query, category)
         
-        self.cache[query_hash] = {
-            'query': query,
-            'answer': answer,
-            'category': category,
-            'verified': verified,
-            'feedback_score': feedback_score,
-            'created_at': datetime.now().isoformat(),
-            'hit_count': 0,
-            'metadata': metadata or {}
-        }
-        
-        self._save_cache()
+        with self._lock:
+            item = {
+                'query': query,
+                'answer': answer,
+                'category': category,
+                'verified': verified,
+                'feedback_score': feedback_score,
+                'created_at': datetime.now().isoformat(),
+                'hit_count': 0,
+                'metadata': metadata or {}
+            }
+            self._carry_feedback(self.cache.get(query_hash), item)
+            self.cache[query_hash] = item
+            self._commit(query_hash)
         logger.info(f"  💾 캐시 추가: {query[:30]}... (verified={verified})")
         
         return query_hash
     
+    @staticmethod
+    def _carry_feedback(previous: Optional[Dict], item: Dict):
+        """
+        같은 키의 새 답변에 이전 항목의 투표/거부 상태를 이어 붙입니다.
+        (get()은 검증된 항목만 반환하므로 검증 전 질문은 물을 때마다 새 답변으로 교체됨 -
+        투표가 초기화되면 답변마다 표가 한 개뿐이라 승격 기준에 도달할 수 없고, 거부도 다음 질문에 지워짐)
+        검증된 답변으로 교체하는 경우(사전 생성, 관리자 승인)에는 거부 상태를 이어 붙이지 않습니다.
+        """
+        if not previous:
+            return
+        for field in ('positive_votes', 'negative_votes'):
+            if previous.get(field):
+                item[field] = previous[field]
+        if previous.get('rejected') and not item.get('verified'):
+            for field in ('rejected', 'rejected_at', 'rejection_reason'):
+                item[field] = previous.get(field)
+            item.pop('verdict', None)
+
+    def add_many(self, entries: List[Dict]) -> List[str]:
+        """
+        여러 답변을 한 번에 추가하고 fsync는 마지막에 한 번만 합니다. (답변 사전 생성 작업용)
+        entries: add()와 같은 키 (query, answer, category, verified, feedback_score, metadata, verdict)
+        """
+        created_at = datetime.now().isoformat()
+        hashes = []
+        with self._lock:
+            for entry in entries:
+                query_hash = self._get_query_hash(entry['query'], entry.get('category'))
+                item = {
+                    'query': entry['query'],
+                    'answer': entry['answer'],
+                    'category': entry.get('category'),
+                    'verified': entry.get('verified', False),
+                    'feedback_score': entry.get('feedback_score', 0),
+                    'created_at': created_at,
+                    'hit_count': 0,
+                    'metadata': entry.get('metadata') or {}
+                }
+                if entry.get('verdict'):
+                    item['verdict'] = entry['verdict']
+                self._carry_feedback(self.cache.get(query_hash), item)
+                self.cache[query_hash] = item
+                self._commit(query_hash)
+                hashes.append(query_hash)
+            self._journal.sync()
+        
+        if hashes:
+            logger.info(f"  💾 캐시 일괄 추가: {len(hashes)}건")
+        return hashes
+    
     def verify(self, query: str, category: str = None, feedback_score: int = 5):
         """사용자가 답변을 승인"""
         query_hash = self._get_query_hash(query, category)
         
-        if query_hash in self.cache:
-            self.cache[query_hash]['verified'] = True
-            self.cache[query_hash]['feedback_score'] = feedback_score
-            self.cache[query_hash]['verified_at'] = datetime.now().isoformat()
-            
-            self._save_cache()
-            logger.info(f"  ✅ 답변 승인: {query[:30]}... (점수: {feedback_score})")
-        else:
-            logger.warning(f"  ⚠️  캐시에 없는 질문: {query[:30]}...")
+        with self._lock:
+            if query_hash in self.cache:
+                self.cache[query_hash]['verified'] = True
+                self.cache[query_hash]['feedback_score'] = feedback_score
+                self.cache[query_hash]['verified_at'] = datetime.now().isoformat()
+                
+                self._commit(query_hash)
+                logger.info(f"  ✅ 답변 승인: {query[:30]}... (점수: {feedback_score})")
+            else:
+                logger.warning(f"  ⚠️  캐시에 없는 질문: {query[:30]}...")
     
     def reject(self, query: str, category: str = None, reason: str = None):
         """사용자가 답변을 거부"""
-        query_hash = self._get_query_hash(query, category)
-        
-        if query_hash in self.cache:
-            self.cache[query_hash]['verified'] = False
-            self.cache[query_hash]['rejected'] = True
-            self.cache[query_hash]['rejected_at'] = datetime.now().isoformat()
-            self.cache[query_hash]['rejection_reason'] = reason
+        self.reject_key(self._get_query_hash(query, category), reason)
+    
+    def reject_key(self, query_hash: str, reason: str = None) -> bool:
+        """캐시 키(응답의 cache_key)로 답변 거부 (항목이 없으면 False)"""
+        with self._lock:
+            item = self.cache.get(query_hash)
+            if item is None:
+                return False
+            item['verified'] = False
+            item.pop('verdict', None)
+            item['rejected'] = True
+            item['rejected_at'] = datetime.now().isoformat()
+            item['rejection_reason'] = reason
             
-            self._save_cache()
-            logger.info(f"  ❌ 답변 거부: {query[:30]}...")
+            self._commit(query_hash)
+        logger.info(f"  ❌ 답변 거부: {item.get('query', '')[:30]}...")
+        return True
+    
+    def record_verdict(self, query: str, category: str = None, verdict: Dict = None) -> bool:
+        """검증 통과 판정을 항목에 저장 (검증된 항목의 캐시 히트는 응답 검증 생략)"""
+        return self.record_verdict_key(self._get_query_hash(query, category), verdict)
+    
+    def record_verdict_key(self, query_hash: str, verdict: Dict = None) -> bool:
+        """캐시 키(응답의 cache_key)로 검증 통과 판정 저장"""
+        with self._lock:
+            item = self.cache.get(query_hash)
+            if item is None or item.get('rejected') or not (verdict or {}).get('valid'):
+                return False
+            item['verdict'] = {
+                'valid': True,
+                'tier': verdict.get('tier'),
+                'validated_at': datetime.now().isoformat()
+            }
+            self._commit(query_hash)
+        return True
+    
+    def apply_feedback(self, query_hash: str, answer: str, previous: str = "", current: str = "",
+                       min_positive: int = settings.CACHE_PROMOTE_MIN_POSITIVE,
+                       min_negative: int = settings.CACHE_REJECT_MIN_NEGATIVE) -> Optional[str]:
+        """
+        대화 피드백(good/bad)을 캐시 항목 투표로 반영합니다. (같은 대화의 피드백 변경은 이전 표를 취소)
+
+        기록된 응답과 현재 캐시 답변이 다르면(그 사이 답변이 교체됨) 반영하지 않습니다.
+        Returns: "verified" (승격) | "rejected" (거부) | None (상태 변화 없음)
+        """
+        with self._lock:
+            item = self.cache.get(query_hash)
+            if item is None or previous == current or " ".join(item.get('answer', '').split()) != " ".join((answer or "").split()):
+                return None
+
+            votes = {'good': 'positive_votes', 'bad': 'negative_votes'}
+            if previous in votes:
+                item[votes[previous]] = max(0, item.get(votes[previous], 0) - 1)
+            if current in votes:
+                item[votes[current]] = item.get(votes[current], 0) + 1
+
+            if item.get('rejected'):
+                self._commit(query_hash)
+                return None
+            if item.get('negative_votes', 0) >= min_negative:
+                self.reject(item['query'], item.get('category'), reason="사용자 부정 피드백")
+                return "rejected"
+            if not item.get('verified') and item.get('positive_votes', 0) >= min_positive:
+                self.verify(item['query'], item.get('category'), feedback_score=item['positive_votes'])
+                return "verified"
+            self._commit(query_hash)
+        return None
     
     def increment_hit_count(self, query: str, category: str = None):
-        """캐시 히트 카운트 증가"""
+        """캐시 히트 카운트 증가 (저널에는 항목 전체 대신 짧은 hit 레코드만 기록)"""
         query_hash = self._get_query_hash(query, category)
         
-        if query_hash in self.cache:
-            self.cache[query_hash]['hit_count'] = self.cache[query_hash].get('hit_count', 0) + 1
-            self.cache[query_hash]['last_used'] = datetime.now().isoformat()
-            self._save_cache()
+        with self._lock:
+            if query_hash in self.cache:
+                record = {'op': 'hit', 'key': query_hash, 'last_used': datetime.now().isoformat()}
+                self._apply(record)
+                self._append(record)
+                self._track(query_hash)
+
+    def invalidate(self, keys: List[str] = None, category: str = None, faq_id: str = None) -> List[str]:
+        """
+        조건에 맞는 항목을 삭제합니다. (조건끼리는 OR, 저널에 삭제 레코드 한 줄만 기록)
+        - keys: 캐시 키 (/chat 응답·대화 기록의 cache_key)
+        - category: 캐시 카테고리 (예: tech_support)
+        - faq_id: 답변 생성에 쓰인 FAQ ID (metadata.faq_ids) - FAQ 원문이 바뀌었을 때
+        Returns: 삭제된 키 목록
+        """
+        with self._lock:
+            removed = [key for key in dict.fromkeys(keys or []) if key in self.cache]
+            if category is not None or faq_id is not None:
+                selected = set(removed)
+                removed += [
+                    key for key, item in self.cache.items()
+                    if key not in selected and (
+                        (category is not None and item.get('category') == category)
+                        or (faq_id is not None and faq_id in (item.get('metadata') or {}).get('faq_ids', []))
+                    )
+                ]
+            if not removed:
+                return []
+
+            for key in removed:
+                del self.cache[key]
+                self._track(key)
+            self._append({'op': 'del', 'keys': removed}, sync=True)
+            self.invalidations += len(removed)
+        logger.info(f"  🗑️  캐시 무효화: {len(removed)}건 (category={category}, faq_id={faq_id})")
+        return removed
     
     def get_stats(self) -> Dict:
-        """캐시 통계"""
-        total = len(self.cache)
-        verified = sum(1 for item in self.cache.values() if item.get('verified'))
-        rejected = sum(1 for item in self.cache.values() if item.get('rejected'))
-        pending = total - verified - rejected
-        
-        total_hits = sum(item.get('hit_count', 0) for item in self.cache.values())
-        
+        """캐시 통계 (변경 시점에 갱신한 카운터 - 항목 수와 무관하게 O(1))"""
+        with self._lock:
+            total = len(self.cache)
+            verified = self._totals['verified']
+            rejected = self._totals['rejected']
+            total_hits = self._totals['hit_count']
+            lookups = self.hits + self.misses
+            
+            return {
+                'total_cached': total,
+                'verified': verified,
+                'rejected': rejected,
+                'pending': total - verified - rejected,
+                'total_cache_hits': total_hits,
+                'cache_hit_rate': total_hits / max(total, 1),
+                'hits': self.hits,
+                'misses': self.misses,
+                'lookup_hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'bytes': self._totals['bytes'],
+                'compactions': self.compactions,
+                'journal': self._journal.stats()
+            }
+
+
+class CacheHitTrend:
+    """
+    답변 캐시 히트 / LLM 생성 건수를 일정 구간(bucket_seconds)별로 집계합니다.
+    히트율 = 캐시 덕분에 생략한 LLM 호출 비율
+    """
+
+    def __init__(self, bucket_seconds: int = settings.CACHE_TREND_BUCKET_SECONDS,
+                 buckets: int = settings.CACHE_TREND_BUCKETS):
+        self.bucket_seconds = bucket_seconds
+        self._buckets = deque(maxlen=buckets) # [구간 시작(epoch초), 히트, LLM 생성]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.llm_calls = 0
+
+    def record(self, hit: bool):
+        start = int(time.time() // self.bucket_seconds * self.bucket_seconds)
+        with self._lock:
+            if not self._buckets or self._buckets[-1][0] != start:
+                self._buckets.append([start, 0, 0])
+            self._buckets[-1][1 if hit else 2] += 1
+            if hit:
+                self.hits += 1
+            else:
+                self.llm_calls += 1
+
+    @staticmethod
+    def _rate(hits: int, llm_calls: int) -> float:
+        return round(hits / (hits + llm_calls), 3) if hits + llm_calls else 0.0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            buckets = [list(bucket) for bucket in self._buckets]
         return {
-            'total_cached': total,
-            'verified': verified,
-            'rejected': rejected,
-            'pending': pending,
-            'total_cache_hits': total_hits,
-            'cache_hit_rate': total_hits / max(total, 1)
+            "bucket_seconds": self.bucket_seconds,
+            "cache_hits": self.hits,
+            "llm_calls": self.llm_calls,
+            "hit_rate": self._rate(self.hits, self.llm_calls),
+            "trend": [
+                {
+                    "start": datetime.fromtimestamp(start).isoformat(timespec="seconds"),
+                    "cache_hits": hits,
+                    "llm_calls": llm_calls,
+                    "hit_rate": self._rate(hits, llm_calls)
+                }
+                for start, hits, llm_calls in buckets
+            ]
         }
 
 
@@ -187,9 +523,15 @@ class ConversationManager:
     
     def __init__(self):
         self.sessions = {}
+        # 지식 검색이 스레드에서 실행되므로 같은 세션의 동시 요청이 턴을 덮어쓰지 않도록 보호
+        self._lock = threading.Lock()
     
     def add_turn(self, session_id: str, user_query: str, bot_response: str, suggested_action: str = None, faq_ids: List[str] = None, from_cache: bool = False):
         """대화 턴 추가"""
+        with self._lock:
+            self._add_turn_locked(session_id, user_query, bot_response, suggested_action, faq_ids, from_cache)
+
+    def _add_turn_locked(self, session_id, user_query, bot_response, suggested_action, faq_ids, from_cache):
         if session_id not in self.sessions:
             self.sessions[session_id] = {
                 'history': [],
@@ -320,26 +662,39 @@ class LLMAgent:
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.max_retries = max_retries
         self.client = None
+        self.breaker = get_breaker("knowledge_llm")
         
         if self.api_key:
             try:
-                from openai import OpenAI
-                self.client = OpenAI(api_key=self.api_key)
+                # 재시도는 generate_with_retry에서 처리하므로 SDK 내부 재시도는 끔
+                self.client = get_client_factory().openai_client(api_key=self.api_key, max_retries=0)
                 logger.info("  ✅ LLM Agent 초기화 완료")
             except Exception as e:
                 logger.error(f"  ❌ LLM Agent 초기화 실패: {e}")
     
-    def generate_with_retry(self, prompt: str, system_prompt: str = None, temperature: float = 0.7, max_tokens: int = 500) -> str:
-        """재시도 로직이 있는 LLM 호출"""
+    def generate_with_retry(self, prompt: str, system_prompt: str = None, temperature: float = 0.7, max_tokens: int = 500, deadline: Deadline = None) -> str:
+        """
+        재시도 로직이 있는 LLM 호출
+        
+        deadline이 주어지면 각 시도의 타임아웃을 남은 시간으로 제한하고,
+        대기 후 재시도할 시간이 없으면 즉시 DeadlineExceeded를 발생시킵니다.
+        서킷 브레이커가 열려 있으면 CircuitOpenError를 발생시킵니다.
+        """
         if not self.client:
             raise Exception("OpenAI 클라이언트가 초기화되지 않았습니다")
         
         system_prompt = system_prompt or self._get_default_system_prompt()
         
         for attempt in range(1, self.max_retries + 1):
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(self.breaker.name)
+            if not self.breaker.allow_request():
+                raise CircuitOpenError(self.breaker.name)
+            
             try:
                 logger.info(f"  🤖 LLM 호출 시도 {attempt}/{self.max_retries}")
                 
+                timeout = deadline.cap(settings.HTTP_READ_TIMEOUT) if deadline is not None else settings.HTTP_READ_TIMEOUT
                 response = self.client.chat.completions.create(
                     model="gpt-3.5-turbo",
                     messages=[
@@ -347,19 +702,25 @@ class LLMAgent:
                         {"role": "user", "content": prompt}
                     ],
                     temperature=temperature,
-                    max_tokens=max_tokens
+                    max_tokens=max_tokens,
+                    timeout=timeout
                 )
                 
                 answer = response.choices[0].message.content.strip()
+                self.breaker.record_success()
                 logger.info(f"  ✅ LLM 호출 성공 (길이: {len(answer)}자)")
                 
                 return answer
                 
             except Exception as e:
+                self.breaker.record_failure()
                 logger.warning(f"  ⚠️  LLM 호출 실패 (시도 {attempt}): {e}")
                 
                 if attempt < self.max_retries:
                     wait_time = 2 ** attempt
+                    if deadline is not None and deadline.remaining() <= wait_time:
+                        logger.error(f"  ❌ 마감 시간 내 재시도 불가 (남은 시간 {deadline.remaining():.1f}초)")
+                        raise DeadlineExceeded(self.breaker.name)
                     logger.info(f"  ⏳ {wait_time}초 후 재시도...")
                     time.sleep(wait_time)
                 else:
@@ -416,10 +777,16 @@ class CachedRAGKnowledgeService:
         self.enable_cache = enable_cache
         self.enable_conversation = enable_conversation
         
+        self.cache = None
         if enable_cache:
-            self.cache = AnswerCache(cache_file)
-        else:
-            self.cache = None
+            try:
+                self.cache = AnswerCache(cache_file)
+            except WriterLockHeld as e:
+                # 다른 워커/오프라인 도구가 캐시를 쓰는 중이면 캐시 없이 동작 (LLM 생성으로 응답)
+                logger.warning(f"  ⚠️  답변 캐시 비활성: {e}")
+                self.enable_cache = False
+        self.hit_trend = CacheHitTrend()
+        self.feedback_counters = {"votes": 0, "promoted": 0, "rejected": 0}
         
         if enable_conversation:
             self.conversation = ConversationManager()
@@ -430,16 +797,17 @@ class CachedRAGKnowledgeService:
         self.llm_agent = LLMAgent(api_key=api_key, max_retries=3)
         
         logger.info(f"임베딩 모델 로드: {model_name}")
+        from sentence_transformers import SentenceTransformer
         self.model = SentenceTransformer(model_name)
         self.dimension = self.model.get_sentence_embedding_dimension()
         logger.info(f"  ✅ 임베딩 차원: {self.dimension}")
         
-        self.faq_df = self._load_csv(csv_path)
+        self.faqs = self._load_csv(csv_path)
         self.index = self._build_index()
         
         logger.info("✅ 캐시 + RAG 시스템 초기화 완료\n")
     
-    def _load_csv(self, csv_path) -> pd.DataFrame:
+    def _load_csv(self, csv_path) -> List[Dict]:
         """CSV 로드 - 여러 경로 탐색 + 중복 제거"""
         base_dir = Path(__file__).parent.parent
         
@@ -462,35 +830,43 @@ class CachedRAGKnowledgeService:
                 f"검색한 경로: {[str(p) for p in search_paths]}"
             )
         
-        df = pd.read_csv(csv_file, encoding='utf-8')
-        
-        # 중복 ID 제거
-        original_len = len(df)
-        df = df.drop_duplicates(subset=['id'], keep='first')
-        
-        if len(df) < original_len:
-            logger.warning(f"  ⚠️  중복 FAQ 제거: {original_len}개 → {len(df)}개")
-        
-        logger.info(f"  ✅ CSV 로드: {len(df)}개 FAQ")
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            columns = reader.fieldnames or []
+            rows = list(reader)
         
         required = ['id', 'category', 'question', 'answer']
-        missing = [col for col in required if col not in df.columns]
+        missing = [col for col in required if col not in columns]
         if missing:
             raise ValueError(f"필수 컬럼 누락: {missing}")
         
-        return df
+        # 중복 ID 제거 (첫 번째 항목 유지)
+        faqs = []
+        seen_ids = set()
+        for row in rows:
+            if row['id'] in seen_ids:
+                continue
+            seen_ids.add(row['id'])
+            faqs.append(row)
+        
+        if len(faqs) < len(rows):
+            logger.warning(f"  ⚠️  중복 FAQ 제거: {len(rows)}개 → {len(faqs)}개")
+        
+        logger.info(f"  ✅ CSV 로드: {len(faqs)}개 FAQ")
+        
+        return faqs
     
     def _build_index(self):
         """FAISS 인덱스 생성"""
+        import faiss
         logger.info("FAISS 인덱스 생성 중...")
         
         texts = []
-        for idx, row in self.faq_df.iterrows():
-            question = str(row['question']) if pd.notna(row['question']) else ""
-            text = question
+        for row in self.faqs:
+            text = row.get('question') or ""
             
-            if 'keywords' in self.faq_df.columns and pd.notna(row['keywords']):
-                text += " " + str(row['keywords']).replace(',', ' ')
+            if row.get('keywords'):
+                text += " " + row['keywords'].replace(',', ' ')
             
             texts.append(text)
         
@@ -510,8 +886,12 @@ class CachedRAGKnowledgeService:
         return result.get('answer', '죄송합니다. 현재 답변을 생성할 수 없습니다.')
 
     # ✅ 실제 RAG 로직 - Dict 반환
-    def _search_knowledge_internal(self, query: str, category: str = None, session_id: str = None) -> Dict:
-        """실제 RAG 처리 로직"""
+    def _search_knowledge_internal(self, query: str, category: str = None, session_id: str = None, deadline: Deadline = None) -> Dict:
+        """
+        실제 RAG 처리 로직
+        
+        deadline 초과 또는 LLM 서킷 오픈 시 최상위 FAQ 답변으로 대체합니다 (degraded 표시).
+        """
         original_query = query
         
         logger.info(f"\n{'='*60}")
@@ -524,6 +904,7 @@ class CachedRAGKnowledgeService:
             
             if cached_answer:
                 self.cache.increment_hit_count(original_query, category)
+                self.hit_trend.record(hit=True)
                 logger.info("  💾 캐시에서 답변 반환 (LLM 호출 없음)")
                 
                 if self.conversation and session_id:
@@ -540,6 +921,9 @@ class CachedRAGKnowledgeService:
                     "from_cache": True,
                     "cache_verified": cached_answer.get('verified', False),
                     "cache_hit_count": cached_answer.get('hit_count', 0),
+                    "verdict": cached_answer.get('verdict'),
+                    "cache_key": self.cache._get_query_hash(original_query, category),
+                    "cache_category": category,
                     "used_llm": False
                 }
         
@@ -598,13 +982,15 @@ class CachedRAGKnowledgeService:
         final_prompt = self._chain_prompts(query, retrieved_context, conversation_context)
         
         # Step 6: LLM 호출
+        cache_key = None
         try:
             logger.info("[Generation] LLM 답변 생성")
-            answer = self.llm_agent.generate_with_retry(prompt=final_prompt)
+            self.hit_trend.record(hit=False)
+            answer = self.llm_agent.generate_with_retry(prompt=final_prompt, deadline=deadline)
             
             # 캐시에 저장 (원래 질문으로)
             if self.enable_cache and self.cache:
-                self.cache.add(
+                cache_key = self.cache.add(
                     query=original_query,
                     answer=answer,
                     category=resolved_category,
@@ -634,7 +1020,9 @@ class CachedRAGKnowledgeService:
                 "used_llm": True,
                 "matched_faq_ids": [r['faq_id'] for r in results] if results else [],
                 "context_used": original_query != query,
-                "pending_verification": True
+                "pending_verification": True,
+                "cache_key": cache_key,
+                "cache_category": resolved_category if cache_key else None
             }
             
         except Exception as e:
@@ -642,17 +1030,20 @@ class CachedRAGKnowledgeService:
             
             # LLM 실패 시 fallback
             if results:
-                return {
+                fallback = {
                     "answer": results[0]['answer'],
                     "confidence": best_score,
                     "error": str(e)
                 }
             else:
-                return {
+                fallback = {
                     "answer": "죄송합니다. 현재 답변을 생성할 수 없습니다. 잠시 후 다시 시도해주세요.",
                     "confidence": 0.0,
                     "error": str(e)
                 }
+            if isinstance(e, DependencyUnavailable):
+                fallback["degraded"] = e.reason
+            return fallback
     
     def submit_feedback(self, query: str, category: str = None, is_helpful: bool = True, feedback_score: int = 5, reason: str = None):
         """사용자 피드백 제출"""
@@ -665,6 +1056,50 @@ class CachedRAGKnowledgeService:
         else:
             self.cache.reject(query, category, reason)
     
+    def record_verdict(self, cache_key: str, verdict: Dict = None) -> bool:
+        """
+        응답 검증 통과 판정을 캐시 항목에 저장
+        (cache_key: 응답의 cache_key - 대화 맥락으로 카테고리가 바뀐 항목도 저장된 키 그대로 사용)
+        """
+        if not self.enable_cache or not self.cache:
+            return False
+        return self.cache.record_verdict_key(cache_key, verdict)
+    
+    def reject_cached_answer(self, cache_key: str, reason: str = None) -> bool:
+        """검증에 실패한 캐시 답변을 키로 거부 처리 (항목이 없으면 False)"""
+        if not self.enable_cache or not self.cache:
+            return False
+        return self.cache.reject_key(cache_key, reason)
+    
+    def apply_history_feedback(self, interaction: Dict, feedback: str) -> Optional[str]:
+        """
+        /feedback으로 들어온 대화 피드백을 해당 대화의 캐시 항목에 반영합니다.
+        (interaction: 피드백 반영 전의 대화 기록, cache_key가 없으면 무시)
+        """
+        if not self.enable_cache or not self.cache or not interaction.get('cache_key'):
+            return None
+        self.feedback_counters["votes"] += 1
+        change = self.cache.apply_feedback(
+            interaction['cache_key'], interaction.get('response', ''),
+            previous=interaction.get('feedback', ''), current=feedback
+        )
+        if change == "verified":
+            self.feedback_counters["promoted"] += 1
+        elif change == "rejected":
+            self.feedback_counters["rejected"] += 1
+        return change
+    
+    def invalidate_cache(self, keys: List[str] = None, category: str = None, faq_id: str = None) -> List[str]:
+        """캐시 항목 무효화 (키 / 카테고리 / FAQ ID)"""
+        if not self.enable_cache or not self.cache:
+            return []
+        return self.cache.invalidate(keys=keys, category=category, faq_id=faq_id)
+    
+    def close(self):
+        """답변 캐시 저널의 fsync 대기분을 디스크에 반영합니다."""
+        if self.cache:
+            self.cache.close()
+    
     def get_cache_stats(self) -> Dict:
         """캐시 통계 조회"""
         if not self.enable_cache or not self.cache:
@@ -672,22 +1107,25 @@ class CachedRAGKnowledgeService:
         
         stats = self.cache.get_stats()
         stats['cache_enabled'] = True
+        stats['feedback'] = dict(self.feedback_counters)
+        stats.update(self.hit_trend.stats())
         return stats
     
     def _search_faq(self, query: str, category: str = None, top_k: int = 3, strict_category: bool = False) -> List[Dict]:
         """FAQ 검색 - 카테고리 강제 옵션 추가"""
+        import faiss
         query_embedding = self.model.encode([query], convert_to_numpy=True)
         faiss.normalize_L2(query_embedding)
         
-        search_k = min(top_k * 5, len(self.faq_df))
+        search_k = min(top_k * 5, len(self.faqs))
         scores, indices = self.index.search(query_embedding, search_k)
         
         results = []
         for score, idx in zip(scores[0], indices[0]):
-            if score < 0.1:
+            if score < 0.1 or idx < 0:
                 continue
             
-            faq_row = self.faq_df.iloc[idx]
+            faq_row = self.faqs[idx]
             
             # ✅ 카테고리 체크 강화
             if category:
@@ -0,0 +1,106 @@
+"""
+로컬 1차 검증 (LLM Judge 앞단)
+- 정책 위반 표현: 미리 컴파일한 정규식/금칙어 (예: "100% 보장", "무조건 승인")
+- 개인정보 노출: 주민등록번호, 카드번호, 휴대폰 번호 패턴
+- 주제 일관성: 질의/응답 임베딩 코사인 유사도 (임베딩 모델이 있을 때만)
+
+결과는 pass / fail / uncertain 세 가지이며, uncertain인 응답만 LLM Judge로 보냅니다.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+PASS = "pass"
+FAIL = "fail"
+UNCERTAIN = "uncertain"
+
+# 고객에게 해서는 안 되는 약속/단정 표현
+FORBIDDEN_PROMISE_PATTERNS = [
+    (re.compile(r"100\s*%\s*(보장|확실|환불|승인)"), "100% 보장 표현"),
+    (re.compile(r"무조건\s*(승인|환불|보상|보장|가능|해\s*드리)"), "무조건 처리 약속"),
+    (re.compile(r"반드시\s*(환불|보상|승인)\s*(해\s*드리|됩니다|받으실)"), "처리 결과 단정"),
+    (re.compile(r"절대\s*(문제\s*(가|는)?\s*없|실패하지\s*않)"), "절대 표현"),
+    (re.compile(r"(평생|영구)\s*(무료|보장)"), "영구 보장 약속"),
+]
+
+# 비속어/비전문적 표현 (응답에 나오면 실패)
+# 단어 앞이 한글이면 제외 (예: "출시발표"의 "시발"), 일상 표현과 겹치는 말("꺼져요", "닥쳐오다")은 넣지 않음
+PROFANITY_LEXICON = ["씨발", "시발", "병신", "개새끼", "개새기", "미친놈", "미친년"]
+# 뒤에 이어지면 정상 단어인 경우 (예: "시발점", "시발역"의 시발(始發))
+PROFANITY_EXCEPTIONS = {"시발": ["점", "역", "택시", "자동차"]}
+PROFANITY_PATTERN = re.compile(
+    r"(?<![가-힣])(?:"
+    + "|".join(word + (f"(?!{'|'.join(PROFANITY_EXCEPTIONS[word])})" if word in PROFANITY_EXCEPTIONS else "")
+               for word in PROFANITY_LEXICON)
+    + r")|좆"
+)
+
+# 응답에 노출되면 안 되는 개인정보 패턴
+PII_PATTERNS = [
+    (re.compile(r"(?<!\d)\d{6}\s*-\s*[1-4]\d{6}(?!\d)"), "주민등록번호"),
+    (re.compile(r"(?<!\d)(?:\d{4}[- ]){3}\d{4}(?!\d)"), "카드번호"),
+    (re.compile(r"(?<!\d)01[016789][- ]?\d{3,4}[- ]?\d{4}(?!\d)"), "휴대폰 번호"),
+]
+
+
+class LocalValidator:
+    """
+    Args:
+        embedding_model: encode(texts, normalize_embeddings=True)를 지원하는 모델 (없으면 주제 검사 생략)
+        topic_fail_threshold: 이 값 미만이면 주제 불일치로 실패
+        topic_uncertain_threshold: 이 값 미만이면 uncertain (LLM Judge 대상)
+    """
+
+    def __init__(self, embedding_model=None,
+                 topic_fail_threshold: float = 0.05,
+                 topic_uncertain_threshold: float = 0.3):
+        self.embedding_model = embedding_model
+        self.topic_fail_threshold = topic_fail_threshold
+        self.topic_uncertain_threshold = topic_uncertain_threshold
+
+    def check_policy(self, response: str) -> List[str]:
+        issues = [f"정책준수: {label}" for pattern, label in FORBIDDEN_PROMISE_PATTERNS if pattern.search(response)]
+        if PROFANITY_PATTERN.search(response):
+            issues.append("정책준수: 비속어/비전문적 표현")
+        return issues
+
+    def check_pii(self, response: str) -> List[str]:
+        return [f"개인정보: {label} 노출" for pattern, label in PII_PATTERNS if pattern.search(response)]
+
+    def topic_similarity(self, query: str, response: str) -> Optional[float]:
+        """질의/응답 코사인 유사도 (임베딩 모델이 없거나 빈 문자열이면 None)"""
+        if self.embedding_model is None or not query.strip() or not response.strip():
+            return None
+        vectors = self.embedding_model.encode([query, response], normalize_embeddings=True, show_progress_bar=False)
+        return float(vectors[0] @ vectors[1])
+
+    def validate(self, query: str, response: str, check_topic: bool = True) -> Dict:
+        """
+        Args:
+            check_topic: False면 주제 일관성 검사 생략 (템플릿/트랜잭션 고정 안내는 질의와 어휘가 겹치지 않음)
+
+        Returns:
+            {
+                "verdict": "pass" | "fail" | "uncertain",
+                "issues": List[str],
+                "topic_similarity": float | None
+            }
+        """
+        issues = self.check_policy(response) + self.check_pii(response)
+        if issues:
+            return {"verdict": FAIL, "issues": issues, "topic_similarity": None}
+
+        similarity = self.topic_similarity(query, response) if check_topic else None
+        if similarity is None or similarity >= self.topic_uncertain_threshold:
+            verdict = PASS
+        elif similarity < self.topic_fail_threshold:
+            verdict = FAIL
+            issues.append(f"일관성: 질의와 응답 주제 불일치 (유사도 {similarity:.2f})")
+        else:
+            verdict = UNCERTAIN
+
+        return {
+            "verdict": verdict,
+            "issues": issues,
+            "topic_similarity": round(similarity, 3) if similarity is not None else None
+        }
@@ -0,0 +1,493 @@
+"""
+주문 저장소 (Order Repository)
+- order_id 기본 키, customer_id / (customer_id, order_date) 보조 인덱스
+- 변경 감지(파일 mtime/size 또는 version 컬럼) 시에만 다시 로드
+- 구현체: IndexedCSVOrderRepository (orders.csv), SQLiteOrderRepository (orders.db)
+"""
+
+import csv
+import logging
+import os
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import settings
+from services.journal import WriteAheadJournal, WriterLock, fsync_directory
+
+logger = logging.getLogger(__name__)
+
+ORDER_FIELDS = ["order_id", "item", "status", "customer_name", "customer_id", "order_date"]
+
+
+def _parse_order_date(value: str) -> Optional[datetime]:
+    """주문 날짜 파싱 (ISO format: YYYY-MM-DDTHH:MM:SS), 형식이 다르면 None"""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class OrderRepository:
+    """주문 저장소 공통 인터페이스"""
+
+    def refresh(self) -> bool:
+        """저장소가 외부에서 변경되었으면 다시 읽습니다. 다시 읽었으면 True"""
+        raise NotImplementedError
+
+    def get(self, order_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def find_by_customer(self, customer_id: str, since: datetime = None, statuses: List[str] = None) -> List[Dict]:
+        """고객의 주문을 최신순으로 반환합니다. (since 이후, statuses에 포함된 상태만)"""
+        raise NotImplementedError
+
+    def add(self, order: Dict):
+        """새 주문을 추가하고 영구 저장합니다."""
+        raise NotImplementedError
+
+    def update_status(self, order_id: str, status: str) -> bool:
+        """주문 상태를 변경하고 영구 저장합니다. 주문이 없으면 False"""
+        raise NotImplementedError
+
+    def update_statuses(self, updates: Dict[str, str]) -> List[str]:
+        """
+        여러 주문 상태를 한 번에 변경합니다. (order_id → status)
+        구현체는 한 번의 쓰기로 영구 저장합니다. 변경된 order_id 목록을 반환합니다.
+        """
+        return [order_id for order_id, status in updates.items() if self.update_status(order_id, status)]
+
+    def status_counts(self, customer_id: str = None) -> Dict[str, int]:
+        """상태별 주문 수 (customer_id가 없으면 전체)"""
+        raise NotImplementedError
+
+    def close(self):
+        """저장소 자원 정리 (서버 종료 시)"""
+
+    def __contains__(self, order_id: str) -> bool:
+        return self.get(order_id) is not None
+
+    def __getitem__(self, order_id: str) -> Dict:
+        order = self.get(order_id)
+        if order is None:
+            raise KeyError(order_id)
+        return order
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class _CustomerOrderIndex:
+    """
+    고객 한 명의 주문 인덱스
+
+    주문 시각(미리 파싱한 timestamp) 오름차순으로 정렬된 병렬 리스트를 유지하여
+    기간 조회를 이진 탐색으로 처리하고, 상태별 주문 수를 함께 관리합니다.
+    """
+
+    __slots__ = ("timestamps", "order_ids", "status_counts")
+
+    def __init__(self):
+        self.timestamps: List[float] = []
+        self.order_ids: List[str] = []
+        self.status_counts = Counter()
+
+    def insert(self, timestamp: Optional[float], order_id: str, status: str):
+        self.status_counts[status] += 1
+        # 날짜 형식이 안맞는 주문은 기간 조회 대상에서 제외 (상태 카운트에만 포함)
+        if timestamp is None:
+            return
+        pos = bisect_right(self.timestamps, timestamp)
+        self.timestamps.insert(pos, timestamp)
+        self.order_ids.insert(pos, order_id)
+
+    def change_status(self, old_status: str, new_status: str):
+        self.status_counts[old_status] -= 1
+        if self.status_counts[old_status] <= 0:
+            del self.status_counts[old_status]
+        self.status_counts[new_status] += 1
+
+    def ids_since(self, since_ts: Optional[float]):
+        """since_ts 이후 주문 ID를 최신순으로 순회"""
+        start = bisect_left(self.timestamps, since_ts) if since_ts is not None else 0
+        for pos in range(len(self.order_ids) - 1, start - 1, -1):
+            yield self.order_ids[pos]
+
+
+class IndexedCSVOrderRepository(OrderRepository):
+    """
+    orders.csv(스냅샷) + orders.csv.journal(변경 저널)을 메모리 인덱스로 유지하는 저장소
+
+    - 스냅샷/저널의 (mtime, size)가 바뀐 경우에만 다시 읽으므로 메시지마다 전체 CSV를 파싱하지 않음
+    - 고객별 인덱스(_CustomerOrderIndex)로 최근 주문 조회가 O(log n + 결과 수)
+    - 상태 변경은 저널에 한 줄 추가(O(1))하고, compact_every건마다 백그라운드에서
+      스냅샷을 임시 파일 + rename으로 원자적으로 다시 씀
+    - 시작 시 스냅샷을 읽은 뒤 저널을 replay (같은 변경을 두 번 적용해도 결과 동일)
+    - 한 프로세스만 씀: 열려 있는 동안 orders.csv.lock을 잡고(close()에서 해제),
+      이미 다른 프로세스가 잡고 있으면 WriterLockHeld
+      (압축이 저널 파일을 교체하므로 두 번째 프로세스의 변경은 교체 전 파일에 기록되어 유실됨)
+    """
+
+    def __init__(self, csv_path: str, journal_path: str = None,
+                 compact_every: int = settings.ORDER_JOURNAL_COMPACT_EVERY,
+                 fsync_batch: int = settings.ORDER_JOURNAL_FSYNC_BATCH,
+                 fsync_interval: float = settings.ORDER_JOURNAL_FSYNC_INTERVAL):
+        self.csv_path = csv_path
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        # 저널을 열기 전에 잠금 (저널을 열면 잘린 마지막 줄을 정리하므로)
+        self._writer_lock = WriterLock(f"{csv_path}.lock")
+        self._writer_lock.acquire()
+        self._journal = WriteAheadJournal(journal_path or f"{csv_path}.journal", fsync_batch, fsync_interval)
+        self._orders: Dict[str, Dict] = {}
+        self._by_customer: Dict[str, _CustomerOrderIndex] = {}
+        self._status_counts = Counter()
+        self._signature = None
+        self._compacting = False
+        self._missing_logged = False
+        self.compactions = 0
+        self.refresh()
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, self._journal.size())
+
+    def refresh(self) -> bool:
+        with self._lock:
+            signature = self._file_signature()
+            if signature is None:
+                # refresh()는 요청마다 호출되므로 파일이 없다는 경고는 한 번만 남김
+                if not self._missing_logged:
+                    logger.warning(f"[OrderStore] 주문 파일 없음: {self.csv_path}")
+                    self._missing_logged = True
+                return False
+            self._missing_logged = False
+            if signature == self._signature:
+                return False
+
+            with open(self.csv_path, mode='r', encoding='utf-8', newline='') as f:
+                orders = {}
+                for row in csv.DictReader(f):
+                    # status 공백 제거 등 전처리
+                    row['status'] = row['status'].strip()
+                    orders[row["order_id"]] = row
+
+            self._orders = orders
+            self._rebuild_indexes()
+
+            # 스냅샷 이후의 변경분 재적용
+            for record in self._journal.replay():
+                self._apply(record)
+            self._signature = signature
+            return True
+
+    def _rebuild_indexes(self):
+        self._by_customer = {}
+        self._status_counts = Counter()
+        # 날짜 순으로 한 번 정렬한 뒤 append 하면 고객별 리스트가 정렬된 상태로 만들어짐
+        dated = []
+        for order in self._orders.values():
+            order_date = _parse_order_date(order['order_date'])
+            dated.append((order_date.timestamp() if order_date else None, order))
+        dated.sort(key=lambda item: item[0] if item[0] is not None else float("-inf"))
+        for timestamp, order in dated:
+            self._index_order(timestamp, order)
+
+    def _index_order(self, timestamp: Optional[float], order: Dict):
+        index = self._by_customer.get(order.get('customer_id'))
+        if index is None:
+            index = self._by_customer[order.get('customer_id')] = _CustomerOrderIndex()
+        index.insert(timestamp, order['order_id'], order['status'])
+        self._status_counts[order['status']] += 1
+
+    def _apply(self, record: Dict) -> bool:
+        """저널 레코드 하나를 메모리 상태에 적용합니다."""
+        if record.get("op") == "status":
+            order = self._orders.get(record["order_id"])
+            if order is None or order['status'] == record["status"]:
+                return order is not None
+            self._by_customer[order.get('customer_id')].change_status(order['status'], record["status"])
+            self._status_counts[order['status']] -= 1
+            self._status_counts[record["status"]] += 1
+            order['status'] = record["status"]
+            return True
+
+        if record.get("op") == "statuses":
+            applied = [self._apply({"op": "status", "order_id": order_id, "status": status})
+                       for order_id, status in record["updates"]]
+            return any(applied)
+
+        if record.get("op") == "add":
+            order = {k: record["order"].get(k, "") for k in ORDER_FIELDS}
+            if order['order_id'] in self._orders:
+                return False
+            self._orders[order['order_id']] = order
+            order_date = _parse_order_date(order['order_date'])
+            self._index_order(order_date.timestamp() if order_date else None, order)
+            return True
+
+        return False
+
+    def _commit(self, record: Dict, sync: bool = False) -> int:
+        """저널 기록 + 메모리 반영, 필요하면 백그라운드 압축 시작 (저널 레코드 번호 반환)"""
+        record["ts"] = datetime.now().isoformat()
+        seq = self._journal.append(record, sync=sync)
+        self._apply(record)
+        # 자기 자신의 쓰기는 재로드 대상이 아님
+        self._signature = self._file_signature()
+
+        if self._journal.entries >= self.compact_every and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self.compact, name="order-compaction", daemon=True).start()
+        return seq
+
+    def get(self, order_id: str) -> Optional[Dict]:
+        return self._orders.get(order_id)
+
+    def find_by_customer(self, customer_id: str, since: datetime = None, statuses: List[str] = None) -> List[Dict]:
+        index = self._by_customer.get(customer_id)
+        if index is None:
+            return []
+        # 상태별 카운터로 해당 상태의 주문이 아예 없으면 탐색 생략
+        if statuses and not any(index.status_counts.get(status) for status in statuses):
+            return []
+
+        results = []
+        for order_id in index.ids_since(since.timestamp() if since else None):
+            order = self._orders[order_id]
+            if statuses and order['status'] not in statuses:
+                continue
+            results.append(order)
+        return results
+
+    def add(self, order: Dict):
+        """새 주문을 추가하고 저널에 기록합니다."""
+        with self._lock:
+            if order.get('order_id') in self._orders:
+                raise ValueError(f"이미 존재하는 주문번호: {order.get('order_id')}")
+            self._commit({"op": "add", "order": {k: order.get(k, "") for k in ORDER_FIELDS}})
+
+    def update_status(self, order_id: str, status: str) -> bool:
+        """
+        상태 변경(주문 취소 승인 등)은 사용자에게 완료를 알리기 전에 fsync까지 기다립니다.
+        대기는 저장소 잠금 밖에서 하므로 동시에 들어온 변경은 한 번의 fsync로 묶일 수 있음
+        """
+        with self._lock:
+            if order_id not in self._orders:
+                return False
+            seq = self._commit({"op": "status", "order_id": order_id, "status": status})
+        self._journal.wait_synced(seq)
+        return True
+
+    def update_statuses(self, updates: Dict[str, str]) -> List[str]:
+        """일괄 변경을 저널 레코드 하나로 기록합니다. (fsync 1회)"""
+        with self._lock:
+            changed = [[order_id, status] for order_id, status in updates.items() if order_id in self._orders]
+            if changed:
+                self._commit({"op": "statuses", "updates": changed}, sync=True)
+            return [order_id for order_id, _ in changed]
+
+    def status_counts(self, customer_id: str = None) -> Dict[str, int]:
+        if customer_id is None:
+            return {status: count for status, count in self._status_counts.items() if count > 0}
+        index = self._by_customer.get(customer_id)
+        return dict(index.status_counts) if index else {}
+
+    def compact(self):
+        """
+        현재 상태를 스냅샷(orders.csv)으로 원자적으로 저장하고 반영된 저널 구간을 제거합니다.
+        스냅샷을 쓰는 동안에도 읽기/쓰기는 계속 가능하며, 그 사이 추가된 저널은 보존됩니다.
+        """
+        try:
+            with self._compact_lock:
+                with self._lock:
+                    rows = [[order.get(k, "") for k in ORDER_FIELDS] for order in self._orders.values()]
+                    journal_offset = self._journal.tell()
+
+                tmp_path = f"{self.csv_path}.tmp"
+                with open(tmp_path, mode='w', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(ORDER_FIELDS)
+                    writer.writerows(rows)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # 스냅샷 교체 후 저널 정리 전 크래시가 나도 replay가 멱등이므로 안전
+                os.replace(tmp_path, self.csv_path)
+                fsync_directory(self.csv_path)
+
+                with self._lock:
+                    self._journal.discard_before(journal_offset)
+                    self._signature = self._file_signature()
+                    self.compactions += 1
+        finally:
+            self._compacting = False
+
+    def close(self):
+        """대기 중인 저널을 디스크에 동기화하고 쓰기 잠금을 해제합니다."""
+        self._journal.close()
+        self._writer_lock.release()
+
+    def stats(self) -> Dict:
+        return {"orders": len(self._orders), "compactions": self.compactions, "journal": self._journal.stats()}
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+
+class SQLiteOrderRepository(OrderRepository):
+    """
+    SQLite 기반 저장소
+
+    store_meta.version 값을 쓰기마다 증가시키고, refresh()에서 값이 바뀐 경우에만
+    프로세스 내 행 캐시를 비웁니다. (다른 프로세스의 변경도 감지)
+    DB가 비어 있으면 seed_csv_path의 주문을 한 번 가져옵니다.
+    """
+
+    def __init__(self, db_path: str, seed_csv_path: str = None):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+        if seed_csv_path and len(self) == 0:
+            self._import_csv(seed_csv_path)
+        self._version = None
+        self._row_cache: Dict[str, Dict] = {}
+        self.refresh()
+
+    def _create_schema(self):
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS orders ("
+                " order_id TEXT PRIMARY KEY, item TEXT, status TEXT,"
+                " customer_name TEXT, customer_id TEXT, order_date TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_customer_date ON orders(customer_id, order_date)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('version', 0)")
+
+    def _import_csv(self, csv_path: str):
+        if not os.path.exists(csv_path):
+            return
+        with open(csv_path, mode='r', encoding='utf-8', newline='') as f:
+            rows = [
+                tuple(row.get(k, "").strip() if k == 'status' else row.get(k, "") for k in ORDER_FIELDS)
+                for row in csv.DictReader(f)
+            ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO orders ({', '.join(ORDER_FIELDS)}) VALUES ({', '.join('?' * len(ORDER_FIELDS))})",
+                rows
+            )
+            self._bump_version()
+
+    def _bump_version(self):
+        self._conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'version'")
+
+    def refresh(self) -> bool:
+        with self._lock:
+            version = self._conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0]
+            if version == self._version:
+                return False
+            self._version = version
+            self._row_cache = {}
+            return True
+
+    def get(self, order_id: str) -> Optional[Dict]:
+        with self._lock:
+            if order_id not in self._row_cache:
+                row = self._conn.execute("SELECT * FROM orders WHERE order_id = ?", (order_id,)).fetchone()
+                if row is None:
+                    return None
+                self._row_cache[order_id] = dict(row)
+            return self._row_cache[order_id]
+
+    def find_by_customer(self, customer_id: str, since: datetime = None, statuses: List[str] = None) -> List[Dict]:
+        sql = "SELECT * FROM orders WHERE customer_id = ?"
+        params = [customer_id]
+        if since:
+            sql += " AND order_date >= ?"
+            params.append(since.isoformat(timespec='seconds'))
+        if statuses:
+            sql += f" AND status IN ({', '.join('?' * len(statuses))})"
+            params.extend(statuses)
+        sql += " ORDER BY order_date DESC"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        # 날짜 형식이 안맞는 행은 CSV 저장소와 동일하게 제외
+        return [dict(row) for row in rows if _parse_order_date(row['order_date']) is not None]
+
+    def add(self, order: Dict):
+        with self._lock, self._conn:
+            try:
+                self._conn.execute(
+                    f"INSERT INTO orders ({', '.join(ORDER_FIELDS)}) VALUES ({', '.join('?' * len(ORDER_FIELDS))})",
+                    tuple(order.get(k, "") for k in ORDER_FIELDS)
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError(f"이미 존재하는 주문번호: {order.get('order_id')}")
+            self._bump_version()
+        self.refresh()
+
+    def status_counts(self, customer_id: str = None) -> Dict[str, int]:
+        sql = "SELECT status, COUNT(*) FROM orders"
+        params = []
+        if customer_id is not None:
+            sql += " WHERE customer_id = ?"
+            params.append(customer_id)
+        sql += " GROUP BY status"
+        with self._lock:
+            return {status: count for status, count in self._conn.execute(sql, params).fetchall()}
+
+    def update_status(self, order_id: str, status: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("UPDATE orders SET status = ? WHERE order_id = ?", (status, order_id))
+            if cursor.rowcount == 0:
+                return False
+            self._bump_version()
+        self.refresh()
+        return True
+
+    def update_statuses(self, updates: Dict[str, str]) -> List[str]:
+        """일괄 변경을 트랜잭션 하나로 커밋합니다."""
+        changed = []
+        with self._lock, self._conn:
+            for order_id, status in updates.items():
+                cursor = self._conn.execute("UPDATE orders SET status = ? WHERE order_id = ?", (status, order_id))
+                if cursor.rowcount:
+                    changed.append(order_id)
+            if changed:
+                self._bump_version()
+        self.refresh()
+        return changed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+
+def create_order_repository(backend: str = None) -> OrderRepository:
+    """settings.ORDER_STORE_BACKEND("csv" | "sqlite")에 맞는 저장소를 생성합니다."""
+    backend = (backend or settings.ORDER_STORE_BACKEND).lower()
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    csv_path = os.path.join(base_dir, 'data', 'orders.csv')
+
+    if backend == "sqlite":
+        return SQLiteOrderRepository(os.path.join(base_dir, 'data', 'orders.db'), seed_csv_path=csv_path)
+    if backend == "csv":
+        return IndexedCSVOrderRepository(csv_path)
+    raise ValueError(f"지원하지 않는 ORDER_STORE_BACKEND: {backend}")
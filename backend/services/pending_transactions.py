@@ -0,0 +1,172 @@
+"""
+승인 대기 트랜잭션 저장소
+- transaction_id → 트랜잭션, user_id → 대기 트랜잭션 ID 인덱스 (메시지마다 전체 스캔하지 않음)
+- 추측할 수 없는 무작위 ID (일괄 승인 API에 ID 목록을 그대로 받으므로 순차 ID를 쓰지 않음)
+- TTL 만료: 조회 시 만료 여부를 확인하고, 백그라운드 스위퍼가 방치된 항목을 주기적으로 정리
+"""
+
+import heapq
+import logging
+import secrets
+import threading
+import time
+from typing import Dict, List, Optional
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PendingTransactionStore:
+    def __init__(self,
+                 ttl_seconds: float = settings.PENDING_TXN_TTL_SECONDS,
+                 sweep_interval: float = settings.PENDING_TXN_SWEEP_INTERVAL):
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+
+        self._lock = threading.RLock()
+        self._by_id: Dict[str, Dict] = {}
+        # user_id → {transaction_id: None} (생성 순서 유지)
+        self._by_user: Dict[str, Dict[str, None]] = {}
+        self._expires_at: Dict[str, float] = {}
+        # (만료 시각, transaction_id) 최소 힙 - 스위퍼가 만료된 앞부분만 확인
+        self._expiry_heap: List[tuple] = []
+
+        self.created = 0
+        self.expired = 0
+        self.completed = 0
+
+        self._stop = threading.Event()
+        self._sweeper = None
+        if sweep_interval > 0:
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="pending-txn-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def new_id(self) -> str:
+        """TXN-{무작위 128비트 hex}: 기존 TXN- 접두사는 유지"""
+        with self._lock:
+            while True:
+                txn_id = f"TXN-{secrets.token_hex(16)}"
+                if txn_id not in self._by_id:
+                    return txn_id
+
+    def add(self, txn: Dict) -> Dict:
+        txn_id = txn["transaction_id"]
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._by_id[txn_id] = txn
+            self._by_user.setdefault(txn.get("user_id"), {})[txn_id] = None
+            self._expires_at[txn_id] = expires_at
+            heapq.heappush(self._expiry_heap, (expires_at, txn_id))
+            self.created += 1
+        return txn
+
+    def _remove_locked(self, txn_id: str) -> Optional[Dict]:
+        txn = self._by_id.pop(txn_id, None)
+        if txn is None:
+            return None
+        self._expires_at.pop(txn_id, None)
+        user_txns = self._by_user.get(txn.get("user_id"))
+        if user_txns is not None:
+            user_txns.pop(txn_id, None)
+            if not user_txns:
+                del self._by_user[txn.get("user_id")]
+        return txn
+
+    def _expire_if_due_locked(self, txn_id: str, now: float) -> bool:
+        expires_at = self._expires_at.get(txn_id)
+        if expires_at is not None and expires_at <= now:
+            self._remove_locked(txn_id)
+            self.expired += 1
+            return True
+        return False
+
+    def get(self, txn_id: str) -> Optional[Dict]:
+        """만료되지 않은 트랜잭션 (없거나 만료되었으면 None)"""
+        with self._lock:
+            if self._expire_if_due_locked(txn_id, time.monotonic()):
+                return None
+            return self._by_id.get(txn_id)
+
+    def pop(self, txn_id: str) -> Optional[Dict]:
+        """처리(승인/거절) 완료된 트랜잭션 제거"""
+        with self._lock:
+            txn = self._remove_locked(txn_id)
+            if txn is not None:
+                self.completed += 1
+            return txn
+
+    def claim(self, txn_id: str) -> Optional[Dict]:
+        """
+        승인 처리할 트랜잭션을 꺼냅니다. (없거나 만료되었으면 None)
+        조회와 제거를 한 번에 하므로 같은 ID로 동시에 들어온 승인/거절 중 하나만 트랜잭션을 얻습니다.
+        """
+        with self._lock:
+            if self._expire_if_due_locked(txn_id, time.monotonic()):
+                return None
+            txn = self._remove_locked(txn_id)
+            if txn is not None:
+                self.completed += 1
+            return txn
+
+    def find_for_user(self, user_id: str, status: str = "pending_approval") -> Optional[Dict]:
+        """유저의 가장 먼저 생성된 대기 트랜잭션"""
+        if not user_id:
+            return None
+        with self._lock:
+            user_txns = self._by_user.get(user_id)
+            if not user_txns:
+                return None
+            now = time.monotonic()
+            for txn_id in list(user_txns):
+                if self._expire_if_due_locked(txn_id, now):
+                    continue
+                txn = self._by_id[txn_id]
+                if txn.get("status") == status:
+                    return txn
+            return None
+
+    def sweep(self) -> int:
+        """만료된 항목을 정리하고 정리한 개수를 반환합니다."""
+        removed = 0
+        with self._lock:
+            now = time.monotonic()
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, txn_id = heapq.heappop(self._expiry_heap)
+                # 이미 처리된 항목(힙에만 남아 있음)은 건너뜀
+                if self._expires_at.get(txn_id) == expires_at:
+                    self._remove_locked(txn_id)
+                    self.expired += 1
+                    removed += 1
+        if removed:
+            logger.info(f"[PendingTransactions] 만료된 승인 대기 {removed}건 정리")
+        return removed
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"[PendingTransactions] 만료 정리 실패: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=1)
+
+    def __contains__(self, txn_id: str) -> bool:
+        return self.get(txn_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "pending": len(self._by_id),
+                "users": len(self._by_user),
+                "created": self.created,
+                "completed": self.completed,
+                "expired": self.expired,
+                "ttl_seconds": self.ttl_seconds,
+            }
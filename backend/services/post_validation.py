@@ -0,0 +1,159 @@
+"""
+응답 사후 검증 (VALIDATION_MODE=async)
+- 차단 대상이 아닌 인텐트의 응답은 먼저 반환하고, 표본(sample_rate)만 제한된 큐에 넣음
+- 백그라운드 워커 여러 개가 ValidationAgent로 검증 → 결과를 대화 기록 id별로 저장
+- 검증 실패 시 해당 답변 캐시 항목을 거부 처리 (CSAgent.reject_cached_answer, 응답의 cache_key 기준),
+  통과 시 판정을 캐시 항목에 저장 (CSAgent.store_cached_verdict)
+- 캐시 반영은 대화 기록과 무관하게 수행 (기록 대기열이 가득 차 interaction_id가 없어도 거부됨),
+  결과를 붙일 기록이 없으면 경고 로그를 남기고 unrecorded로 셈
+"""
+
+import asyncio
+import logging
+import random
+from typing import Dict, List, Optional
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PostValidationWorker:
+    """
+    Args:
+        agent: validator / reject_cached_answer / store_cached_verdict를 가진 CSAgent (워밍업 후 사용)
+        store: record_validation(interaction_id, result)를 지원하는 대화 기록 저장소
+        workers: 동시에 검증할 워커 수
+        max_queue: 대기열 최대 크기 (가득 차면 검증 생략)
+        sample_rate: 사후 검증할 응답 비율 (0~1)
+    """
+
+    def __init__(self, agent, store,
+                 workers: int = settings.VALIDATION_ASYNC_WORKERS,
+                 max_queue: int = settings.VALIDATION_ASYNC_QUEUE_MAX,
+                 sample_rate: float = settings.VALIDATION_ASYNC_SAMPLE_RATE):
+        self.agent = agent
+        self.store = store
+        self.workers = workers
+        self.max_queue = max_queue
+        self.sample_rate = sample_rate
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self.submitted = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.validated = 0
+        self.invalid = 0
+        self.cache_rejected = 0
+        self.unrecorded = 0
+        self.failed = 0
+
+    def start(self):
+        """이벤트 루프 안에서 호출 (app lifespan)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    def submit(self, interaction_id: Optional[str], query: str, response: Dict,
+               conversation_history: Optional[List[Dict]] = None) -> bool:
+        """검증 대기열에 넣습니다. 표본에서 빠졌거나 대기열이 가득 차면 False."""
+        if not self._tasks or random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return False
+
+        job = {
+            "interaction_id": interaction_id,
+            "query": query,
+            "response": response,
+            "conversation_history": conversation_history or [],
+        }
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            # 과부하 시 로그 폭주 방지 (첫 건 + 100건마다)
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                logger.warning(f"[PostValidation] 검증 대기열이 가득 차 검증을 생략합니다 (누적 {self.dropped}건)")
+            return False
+
+        self.submitted += 1
+        return True
+
+    async def _run(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._validate(job)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"[PostValidation] 검증 실패 (interaction_id={job['interaction_id']}): {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _validate(self, job: Dict):
+        response = job["response"]
+        # 임베딩 계산/LLM Judge가 이벤트 루프를 막지 않도록 스레드에서 실행
+        result = await asyncio.to_thread(
+            self.agent.validator.validate_response,
+            query=job["query"],
+            response=str(response.get("message", "")),
+            conversation_history=job["conversation_history"],
+            check_topic=self.agent.uses_topic_check(response)
+        )
+        self.validated += 1
+
+        if result["valid"]:
+            self.agent.store_cached_verdict(job["query"], response, result)
+        else:
+            self.invalid += 1
+            logger.warning(
+                f"[사후 검증 실패] interaction_id={job['interaction_id']}, tier={result.get('tier')}, issues={result['issues']}"
+            )
+            # 답변 캐시 갱신은 AnswerCache 내부 잠금으로 요청 경로(지식 검색 스레드)와 직렬화됨
+            if self.agent.reject_cached_answer(job["query"], response, "; ".join(result["issues"])):
+                self.cache_rejected += 1
+
+        if not job["interaction_id"]:
+            # 대화 기록이 저장되지 않은 응답 (HistoryWriter 대기열 초과 등): 캐시 반영은 위에서 끝남
+            self.unrecorded += 1
+            logger.warning(
+                f"[PostValidation] 검증 결과를 저장할 대화 기록이 없습니다 "
+                f"(valid={result['valid']}, cache_key={response.get('cache_key')}, query={job['query'][:50]!r})"
+            )
+            return
+        await asyncio.to_thread(self.store.record_validation, job["interaction_id"], result)
+
+    async def stop(self, timeout: float = 10.0):
+        """대기 중인 검증을 timeout초까지 처리한 뒤 워커를 종료합니다."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"[PostValidation] 종료 시간 초과로 검증 {self._queue.qsize()}건을 생략합니다")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info(f"[PostValidation] 종료: {self.stats()}")
+
+    def stats(self) -> Dict:
+        return {
+            "mode": settings.VALIDATION_MODE,
+            "blocking_intents": sorted(settings.VALIDATION_BLOCKING_INTENTS),
+            "workers": len(self._tasks),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "sample_rate": self.sample_rate,
+            "submitted": self.submitted,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "validated": self.validated,
+            "invalid": self.invalid,
+            "cache_rejected": self.cache_rejected,
+            "unrecorded": self.unrecorded,
+            "failed": self.failed,
+        }
@@ -0,0 +1,96 @@
+"""
+답변 캐시 키용 질문 정규화
+- 유니코드 NFC, 소문자
+- 이모티콘 제거 (ㅠㅠ, ㅋㅋ 같은 자모 반복, ^^, T_T, 이모지)
+- 문장부호 제거, 띄어쓰기 차이 무시
+- (선택, CACHE_KEY_STEMMING) 조사/어미 정리: "로그인이 안돼요" / "로그인이 안 돼요" / "로그인 안됨ㅠㅠ" → "로그인안되"
+  조사는 단어당 한 개, 두 글자 이상 남을 때만 뗌 ("사과 주문" ≠ "사이 주문")
+
+캐시 키를 만드는 쪽(AnswerCache._get_query_hash)과 분석 도구가 같은 함수를 사용합니다.
+"""
+
+import re
+import unicodedata
+
+import settings
+
+# 서양식/혼합 이모티콘 (소문자 변환 전에 제거)
+_EMOTICON_RE = re.compile(r"\^\^+|\^_\^|-_-+|T_T|t_t|ㅠ_ㅠ|ㅜ_ㅜ|>_<|[;:]-?[()DPp]")
+# 이모지 / 기호 블록
+_EMOJI_RE = re.compile("[\U0001F000-\U0001FAFF☀-➿️‍]")
+# 완성형이 아닌 자모만으로 된 표현 (ㅠㅠ, ㅋㅋㅋ, ㅎㅎ, ㅡㅡ)
+_JAMO_RE = re.compile(r"[ㄱ-ㆎ]+")
+# 문장부호/기호 → 공백 (단어 경계 유지)
+_NON_WORD_RE = re.compile(r"[^0-9a-z가-힣\s]+")
+
+# 단어 끝 조사 (긴 것부터 검사)
+_PARTICLES = ("에서는", "에서", "으로", "이랑", "한테", "에게", "까지", "부터", "이나",
+              "은", "는", "이", "가", "을", "를", "도", "에", "로", "와", "과", "의", "랑", "만")
+# 어미 → 어간 (예: 돼요/되요/됨/됩니다 → 되, 해요/합니다/함 → 하)
+_ENDING_RULES = (
+    (re.compile(r"(됩니다|되네요|되나요|되어요|돼요|되요|돼|됨|되네|되나)$"), "되"),
+    (re.compile(r"(합니다|하네요|하나요|해요|해|함|하네|하나)$"), "하"),
+    (re.compile(r"(습니다|어요|아요|에요|예요|네요|나요|세요|요)$"), ""),
+)
+# 어미를 떼고 남아야 하는 최소 글자 수 ("돼요" → "되")
+_MIN_STEM_CHARS = 1
+# 조사를 떼고 남아야 하는 최소 글자 수 (끝 글자가 조사와 같은 두 글자 단어 보호: "사과", "사이", "포도")
+_MIN_PARTICLE_STEM_CHARS = 2
+# 끝 글자가 조사/어미와 같지만 단어의 일부인 말 (그대로 유지)
+_PROTECTED_WORDS = frozenset({
+    "와이파이", "디스플레이", "플레이", "해상도", "검색결과", "고객문의", "필요", "중요",
+})
+# 조사가 붙지 않는 부사/의문사: 뒤 글자는 조사가 아니라 띄어 쓰지 않은 동사 ("언제와" = "언제 와")
+_NO_PARTICLE_STEMS = frozenset({
+    "언제", "어디", "어떻게", "얼마", "얼마나", "빨리", "다시", "자꾸", "계속", "아직", "벌써",
+})
+
+
+def legacy_clean_query(query: str) -> str:
+    """이전 캐시 키 정규화 (공백 제거 + 소문자) - 분석 도구 비교용"""
+    return (query or "").strip().lower().replace(" ", "")
+
+
+def _strip_particle(token: str) -> str:
+    """
+    단어 끝 조사를 최대 한 개만 뗍니다. (가장 긴 조사 기준)
+    남는 말이 _MIN_PARTICLE_STEM_CHARS보다 짧거나 조사가 붙지 않는 말이면 떼지 않습니다.
+    다른 질문이 같은 키로 합쳐지면 그 질문의 검증된 답변이 나가므로, 애매하면 떼지 않는 쪽을 택합니다.
+    """
+    for particle in _PARTICLES:
+        if token.endswith(particle):
+            stem = token[:-len(particle)]
+            if len(stem) < _MIN_PARTICLE_STEM_CHARS or stem in _NO_PARTICLE_STEMS:
+                return token
+            return stem
+    return token
+
+
+def _stem_token(token: str) -> str:
+    if token in _PROTECTED_WORDS:
+        return token
+    for pattern, replacement in _ENDING_RULES:
+        stemmed = pattern.sub(replacement, token)
+        if stemmed != token and len(stemmed) >= _MIN_STEM_CHARS:
+            return stemmed
+    return _strip_particle(token)
+
+
+def normalize_query(query: str, stemming: bool = None) -> str:
+    """
+    캐시 키용 정규화 문자열 (띄어쓰기 없음)
+
+    Args:
+        stemming: 조사/어미 정리 여부 (기본값: settings.CACHE_KEY_STEMMING)
+    """
+    stemming = settings.CACHE_KEY_STEMMING if stemming is None else stemming
+    text = unicodedata.normalize("NFC", query or "")
+    text = _EMOJI_RE.sub(" ", _EMOTICON_RE.sub(" ", text)).lower()
+    text = _NON_WORD_RE.sub(" ", _JAMO_RE.sub(" ", text))
+
+    tokens = text.split()
+    if stemming:
+        tokens = [_stem_token(token) for token in tokens]
+    normalized = "".join(tokens)
+    # 이모티콘/기호만 있는 질문은 이전 방식으로 (빈 키끼리 충돌 방지)
+    return normalized or legacy_clean_query(query)
@@ -0,0 +1,182 @@
+"""
+LLM 의존성 보호 장치
+- Deadline: 요청 단위 마감 시간 (process_query → 분류/검색/생성 단계로 전파)
+- CircuitBreaker: 의존성별 연속 실패 시 호출 차단 후 일정 시간 뒤 재시도(half-open)
+
+마감 초과나 차단 시 호출자는 LLM 없이 만들 수 있는 응답(키워드 분류, FAQ 원문,
+트랜잭션 메시지)으로 대체하고 응답에 degraded 표시를 남깁니다.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Deadline:
+    """요청 마감 시간 (monotonic clock 기준)"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """남은 시간(초), 지났으면 0"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cap(self, timeout: Optional[float]) -> float:
+        """개별 호출 타임아웃을 남은 시간 이내로 제한"""
+        if timeout is None:
+            return self.remaining()
+        return min(timeout, self.remaining())
+
+
+class DependencyUnavailable(Exception):
+    """LLM 의존성을 사용할 수 없어 대체 응답이 필요한 경우"""
+    reason = "unavailable"
+
+    def __init__(self, dependency: str):
+        super().__init__(f"{dependency}: {self.reason}")
+        self.dependency = dependency
+
+
+class DeadlineExceeded(DependencyUnavailable):
+    reason = "deadline_exceeded"
+
+
+class CircuitOpenError(DependencyUnavailable):
+    reason = "circuit_open"
+
+
+class CircuitBreaker:
+    """
+    연속 실패 횟수 기반 서킷 브레이커
+
+    closed → (failure_threshold회 연속 실패) → open → (reset_timeout 경과) → half_open
+    half_open 상태에서 시험 호출이 성공하면 closed, 실패하면 다시 open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str,
+                 failure_threshold: int = settings.BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = settings.BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.counters = {"success": 0, "failure": 0, "rejected": 0, "opened": 0}
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.counters["rejected"] += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == self.HALF_OPEN:
+                # half-open에서는 시험 호출 하나만 통과
+                if self._probe_in_flight:
+                    self.counters["rejected"] += 1
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.counters["success"] += 1
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            if self.state != self.CLOSED:
+                logger.info(f"[CircuitBreaker] {self.name}: closed")
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.counters["failure"] += 1
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.counters["opened"] += 1
+                    logger.warning(f"[CircuitBreaker] {self.name}: open ({self.consecutive_failures}회 연속 실패)")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """성공/실패 판정 없이 끝난 호출(취소 등)의 half-open 시험 호출 자리를 반납"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    async def acall(self, func, *args, deadline: Optional[Deadline] = None, **kwargs):
+        """
+        비동기 호출을 브레이커와 마감 시간으로 감쌉니다.
+
+        Raises:
+            DeadlineExceeded: 호출 전 마감이 지났거나 호출이 마감 내에 끝나지 않음
+            CircuitOpenError: 브레이커가 열려 있음
+        """
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded(self.name)
+        if not self.allow_request():
+            raise CircuitOpenError(self.name)
+
+        try:
+            timeout = deadline.remaining() if deadline is not None else None
+            result = await asyncio.wait_for(func(*args, **kwargs), timeout)
+        except asyncio.TimeoutError:
+            self.record_failure()
+            raise DeadlineExceeded(self.name)
+        except asyncio.CancelledError:
+            # 클라이언트 연결 종료 등으로 취소되면 판정 없이 시험 호출만 반납 (half-open에 갇히지 않도록)
+            self.release_probe()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                **self.counters
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """의존성 이름별 공유 CircuitBreaker"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_stats() -> Dict[str, Dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
@@ -0,0 +1,63 @@
+"""
+트랜잭션 결과 응답 템플릿
+- (action, 트랜잭션 status) 조합별 템플릿으로 주문/청구 답변을 로컬에서 즉시 생성
+- LLM으로 문장을 다듬는 것은 settings.LLM_REPHRASE_INTENTS에 지정한 인텐트만 (opt-in)
+- 주문 조회/취소 결과(TEMPLATED_STATUSES)만 템플릿으로 끝내고, 그 외(error 등)는 LLM 답변을 만들고
+  템플릿은 LLM을 쓸 수 없을 때의 대체 응답으로만 사용 (예: 주문과 무관한 청구 문의의 "알 수 없는 요청")
+- 템플릿이 없거나 필요한 값이 없으면 TransactionService가 준 message를 그대로 사용
+- 템플릿 응답은 주제 검사를 거치지 않으므로 주문 기록의 값과 서비스 메시지만 사용
+  (취소 가능 시점, 환불 기간 같은 정책 안내는 FAQ 답변으로)
+"""
+
+from typing import Dict, Optional
+
+
+class _SafeDict(dict):
+    """템플릿에 없는 키는 빈 문자열로 치환"""
+
+    def __missing__(self, key):
+        return ""
+
+
+# LLM 없이 템플릿만으로 답하는 트랜잭션 status (주문 조회/취소 결과)
+TEMPLATED_STATUSES = {"completed", "success", "failed", "need_selection"}
+
+# (action, status) → 템플릿
+# action: "transaction"(조회/청구) | "cancel"(주문 취소)
+RESPONSE_TEMPLATES = {
+    ("transaction", "completed"): "고객님의 주문 {order_id} ({item})은(는) 현재 '{order_status}' 상태입니다.",
+    ("cancel", "completed"): "고객님의 주문 {order_id} ({item})은(는) 현재 '{order_status}' 상태입니다.",
+    ("transaction", "error"): "{message}\n주문번호(예: ORD-001)를 함께 알려주시면 더 정확하게 확인해드리겠습니다.",
+    ("cancel", "error"): "{message}\n주문번호(예: ORD-001)를 함께 알려주시면 더 정확하게 확인해드리겠습니다.",
+    ("cancel", "failed"): "{message}",
+    ("cancel", "need_selection"): "{message}",
+    ("transaction", "success"): "{message}",
+    ("cancel", "success"): "{message}",
+}
+
+
+class ResponseTemplateEngine:
+    def __init__(self, templates: Dict = None):
+        self.templates = templates if templates is not None else RESPONSE_TEMPLATES
+
+    def render(self, action: str, txn_result: Dict) -> Optional[str]:
+        """
+        트랜잭션 결과를 템플릿으로 렌더링합니다.
+        해당 (action, status) 템플릿이 없으면 None
+        """
+        template = self.templates.get((action, txn_result.get("status")))
+        if template is None:
+            return None
+
+        order = txn_result.get("data") if isinstance(txn_result.get("data"), dict) else {}
+        values = _SafeDict(
+            message=txn_result.get("message", ""),
+            order_id=order.get("order_id", ""),
+            item=order.get("item", ""),
+            order_status=order.get("status", ""),
+        )
+        return template.format_map(values).strip()
+
+    def render_or_default(self, action: str, txn_result: Dict) -> str:
+        """템플릿 렌더링, 템플릿이 없으면 서비스 메시지"""
+        return self.render(action, txn_result) or txn_result.get("message", "")
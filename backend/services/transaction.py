@@ -1,47 +1,23 @@
-import csv
-import os
 import re
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+from services.order_store import OrderRepository, create_order_repository
+from services.pending_transactions import PendingTransactionStore
+from services.candidate_matcher import CandidateIndex
+import settings
 
 class TransactionService:
-    def __init__(self):
-        # 데이터 파일 경로 설정
-        # backend/services/../data/orders.csv
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.csv_file_path = os.path.join(base_dir, 'data', 'orders.csv')
-        
-        self.orders = {}
-        self.pending_transactions = {} # 트랜잭션 임시 저장소 (캐시)
+    def __init__(self, order_store: OrderRepository = None):
+        # 주문 저장소 (settings.ORDER_STORE_BACKEND: csv | sqlite)
+        self.orders = order_store or create_order_repository()
+        self.pending_transactions = PendingTransactionStore() # 승인 대기 트랜잭션 (user_id 인덱스 + TTL 만료)
         self.user_sessions = {} # 유저별 세션 (last_viewed 등)
-        self._load_data()
+        # 승인 시 주문 상태 재확인~반영을 한 번에 하나씩 (같은 주문의 다른 트랜잭션이 동시에 확인을 통과하지 않도록)
+        self._approval_lock = threading.Lock()
 
     def _load_data(self):
-        """CSV 파일에서 주문 데이터를 로드합니다."""
-        if not os.path.exists(self.csv_file_path):
-            print(f"File not found: {self.csv_file_path}")
-            return
-        
-        with open(self.csv_file_path, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            self.orders = {} # 초기화
-            for row in reader:
-                # status 공백 제거 등 전처리
-                row['status'] = row['status'].strip()
-                self.orders[row["order_id"]] = row
-
-    def _save_data(self):
-        """변경된 데이터를 CSV 파일에 영구 저장합니다."""
-        if not self.orders:
-            return
-            
-        fieldnames = ["order_id", "item", "status", "customer_name", "customer_id", "order_date"]
-        with open(self.csv_file_path, mode='w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for order in self.orders.values():
-                # 저장 시 필요한 필드만 추출
-                row = {k: order.get(k, "") for k in fieldnames}
-                writer.writerow(row)
+        """최신 주문 데이터를 반영합니다. (저장소가 변경된 경우에만 다시 로드)"""
+        self.orders.refresh()
 
     def _find_recent_orders(self, user_id: str, status_filter: list = None, days_limit: int = 30):
         """
@@ -50,35 +26,19 @@ class TransactionService:
         """
         if not user_id:
              return [], None
-             
-        user_orders = [o for o in self.orders.values() if o.get('customer_id') == user_id]
         
-        # 날짜 필터링
-        from datetime import datetime, timedelta
+        # customer_id 인덱스로 해당 유저의 주문만 조회 (최신순, 날짜/상태 필터 적용)
         cutoff_date = datetime.now() - timedelta(days=days_limit)
-        
-        recent_orders = []
-        for o in user_orders:
-            # 주문 날짜 파싱 (ISO format presumed: YYYY-MM-DDTHH:MM:SS)
-            try:
-                # 간단한 파싱 시도
-                o_date = datetime.fromisoformat(o['order_date'])
-                if o_date >= cutoff_date:
-                    recent_orders.append(o)
-            except ValueError:
-                # 날짜 형식이 안맞으면 건너뛰거나 포함 (여기선 안전하게 건너뜀)
-                continue
-                
-        # 상태 필터링
-        if status_filter:
-            recent_orders = [o for o in recent_orders if o['status'] in status_filter]
-        
-        # 정렬: 최신순
-        recent_orders.sort(key=lambda x: x['order_date'], reverse=True)
+        recent_orders = self.orders.find_by_customer(user_id, since=cutoff_date, statuses=status_filter)
         
         most_recent = recent_orders[0] if recent_orders else None
         return recent_orders, most_recent
 
+    def _build_candidate_index(self, candidate_ids: list) -> CandidateIndex:
+        """세션에 인덱스가 없을 때 후보 주문번호 목록으로 생성"""
+        candidates = [self.orders[cand_id] for cand_id in candidate_ids if cand_id in self.orders]
+        return CandidateIndex(candidates, threshold=settings.CANDIDATE_MATCH_THRESHOLD)
+
     def has_active_context(self, user_id: str) -> bool:
         """
         유저가 답변해야 할 컨텍스트(선택지, 승인대기)가 있는지 확인합니다.
@@ -88,9 +48,8 @@ class TransactionService:
             return False
             
         # 1. 승인 대기 확인
-        for txn in self.pending_transactions.values():
-            if txn.get("user_id") == user_id and txn.get("status") == "pending_approval":
-                return True
+        if self.pending_transactions.find_for_user(user_id):
+            return True
                 
         # 2. 선택지(candidates) 확인
         if user_id in self.user_sessions:
@@ -105,12 +64,7 @@ class TransactionService:
         user_id가 제공되면 해당 유저의 맥락을 고려합니다.
         """
         # 0. [NEW] 승인 대기 중인 트랜잭션이 있고, 사용자가 확답(예/아니오)을 한 경우 우선 처리
-        pending_txn = None
-        if user_id:
-             for txn_id, txn in self.pending_transactions.items():
-                 if txn.get("user_id") == user_id and txn.get("status") == "pending_approval":
-                     pending_txn = txn
-                     break
+        pending_txn = self.pending_transactions.find_for_user(user_id)
         
         if pending_txn:
              # 긍정 응답 처리
@@ -123,7 +77,7 @@ class TransactionService:
              if any(word in user_response for word in affirmative):
                  return self.execute_transaction(pending_txn["transaction_id"])
              elif any(word in user_response for word in negative):
-                 del self.pending_transactions[pending_txn["transaction_id"]]
+                 self.pending_transactions.pop(pending_txn["transaction_id"])
                  return {"status": "cancelled", "message": "취소가 철회되었습니다."}
              
              # 모호한 답변이면 다시 물어봄 (여기서 return하지 않고 아래 로직 태울수도 있지만, 컨텍스트가 강력하므로 재확인)
@@ -147,25 +101,22 @@ class TransactionService:
             if match:
                 order_id = match.group(1)
         
-        # 1.5. [NEW] 주문번호가 없고 유저 세션에 'candidates'가 있다면, 아이템명 등으로 매칭 시도
+        # 1.5. [NEW] 주문번호가 없고 유저 세션에 'candidates'가 있다면, 아이템명/순서로 매칭 시도
         if not order_id and user_id and user_id in self.user_sessions:
-            candidates = self.user_sessions[user_id].get("candidates", [])
-            if candidates and entity:
-                # candidates는 order_id 리스트임. 해당 주문들의 정보 조회
-                for cand_id in candidates:
-                    if cand_id in self.orders:
-                        cand_order = self.orders[cand_id]
-                        # 아이템명이 쿼리에 포함되어 있는지 확인 (간단한 포함 여부)
-                        # 예: entity="사운드바 보여줘", item="사운드바" -> Match
-                        if cand_order['item'] in entity or cand_order['item'].replace(" ", "") in entity.replace(" ", ""):
-                            order_id = cand_id
-                            # 매칭 성공 시 candidates 제거 (선택 완료)
-                            del self.user_sessions[user_id]["candidates"]
-                            
-                            # [FIX] 모호성 해소 성공 시, 의도를 '조회'로 확정
-                            if intent == "transaction":
-                                intent = "status_check"
-                            break
+            session = self.user_sessions[user_id]
+            if session.get("candidates") and entity:
+                # 예: entity="싸운드바 보여줘" → "사운드바", entity="두번째" → 목록의 2번째 주문
+                index = session.get("candidate_index") or self._build_candidate_index(session["candidates"])
+                matched_id = index.match(entity)
+                if matched_id and matched_id in self.orders:
+                    order_id = matched_id
+                    # 매칭 성공 시 candidates 제거 (선택 완료)
+                    del session["candidates"]
+                    session.pop("candidate_index", None)
+                    
+                    # [FIX] 모호성 해소 성공 시, 의도를 '조회'로 확정
+                    if intent == "transaction":
+                        intent = "status_check"
         
         # 2. 주문번호가 없고 유저 ID가 있다면, 스마트 조회를 시도
         # (취소 Intent일 때는 신중해야 하므로 여기서 바로 자동 할당하지 않음, status_check일 때만 아래 로직으로 후보군 탐색)
@@ -189,13 +140,16 @@ class TransactionService:
                 
                 # Case 1: 목록이 있으면 선택 유도 또는 보여주기
                 if len(recent_orders) > 1:
-                    self.user_sessions[user_id] = {"candidates": [o['order_id'] for o in recent_orders]}
+                    self.user_sessions[user_id] = {
+                        "candidates": [o['order_id'] for o in recent_orders],
+                        "candidate_index": CandidateIndex(recent_orders, threshold=settings.CANDIDATE_MATCH_THRESHOLD)
+                    }
                     
                     status_msg = "취소된" if "주문취소" in target_statuses else "최근(30일) 진행/완료된"
-                    order_list_str = "\n".join([f"- {o['item']} ({o['status']})" for o in recent_orders])
+                    order_list_str = "\n".join([f"{i}. {o['item']} ({o['status']})" for i, o in enumerate(recent_orders, 1)])
                     return {
                         "status": "multiple_choice",
-                        "message": f"{status_msg} 주문이 {len(recent_orders)}건 있습니다. 어떤 주문을 조회하시겠습니까?\n{order_list_str}",
+                        "message": f"{status_msg} 주문이 {len(recent_orders)}건 있습니다. 어떤 주문을 조회하시겠습니까? (상품명 또는 '첫번째'처럼 순서로 답해주세요)\n{order_list_str}",
                         "data": recent_orders
                     }
                 
@@ -266,7 +220,7 @@ class TransactionService:
                     return {"status": "failed", "message": f"주문 {order_id}는 이미 취소된 주문입니다."}
                 
                 # 취소 트랜잭션 생성
-                transaction_id = f"TXN-{int(datetime.now().timestamp())}"
+                transaction_id = self.pending_transactions.new_id()
                 pending_action = {
                     "transaction_id": transaction_id,
                     "action_type": "cancel_order",
@@ -279,7 +233,7 @@ class TransactionService:
                     "timestamp": datetime.now().isoformat()
                 }
                 
-                self.pending_transactions[transaction_id] = pending_action
+                self.pending_transactions.add(pending_action)
                 
                 return {
                     "status": "pending_approval",
@@ -302,61 +256,148 @@ class TransactionService:
         
         return {"status": "error", "message": "알 수 없는 요청입니다."}
 
+    def _check_cancel_action(self, transaction_id: str, action: dict):
+        """
+        승인 시점의 주문 상태를 재확인합니다. (데이터는 호출 전에 로드, 트랜잭션은 이미 claim으로 꺼낸 상태)
+        실행할 수 없으면 에러 응답을, 실행 가능하면 None을 반환합니다.
+        """
+        order_id = action['target_entity']
+
+        if order_id not in self.orders:
+             return {"status": "error", "message": "주문 정보가 사라졌습니다."}
+
+        current_order = self.orders[order_id]
+
+        # 상태 변경 여부 확인 (동시성/타이밍 이슈 방지)
+        if current_order['status'] != action['current_status']:
+            return {
+                "status": "error", 
+                "message": f"주문 상태가 변경되어 취소할 수 없습니다. (현재: {current_order['status']})"
+            }
+        return None
+
+    def _finish_cancel_action(self, transaction_id: str, action: dict):
+        """반영이 끝난 취소 트랜잭션의 세션 정리 후 성공 응답 반환"""
+        order_id = action['target_entity']
+
+        # 세션에서 해당 주문 제거 (선택적)
+        user_id = action.get("user_id")
+        if user_id and user_id in self.user_sessions:
+             if self.user_sessions[user_id].get("last_viewed") == order_id:
+                 del self.user_sessions[user_id]["last_viewed"]
+            
+        return {
+            "status": "success", 
+            "transaction_id": transaction_id, 
+            "message": f"주문 {order_id}가 성공적으로 취소되었습니다."
+        }
+
     def execute_transaction(self, transaction_id: str):
         """
         사용자가 확답(승인)을 했을 때 호출되어 실제 데이터 수정을 수행합니다.
+        대기 트랜잭션은 처음에 꺼내므로(claim) 같은 ID를 동시에 승인해도 한 번만 실행되고,
+        실패한 트랜잭션도 다시 승인할 수 없습니다.
         """
-        if transaction_id not in self.pending_transactions:
+        action = self.pending_transactions.claim(transaction_id)
+        if action is None:
             return {"status": "error", "message": "유효하지 않거나 만료된 트랜잭션 ID입니다."}
-            
-        action = self.pending_transactions[transaction_id]
         
         if action['action_type'] == "cancel_order":
-            # [검증 강화] 데이터 다시 로드 및 상태 재확인
-            self._load_data()
-            order_id = action['target_entity']
-            
-            if order_id not in self.orders:
-                 del self.pending_transactions[transaction_id]
-                 return {"status": "error", "message": "주문 정보가 사라졌습니다."}
-            
-            current_order = self.orders[order_id]
-            
-            # 상태 변경 여부 확인 (동시성/타이밍 이슈 방지)
-            if current_order['status'] != action['current_status']:
-                del self.pending_transactions[transaction_id]
-                return {
-                    "status": "error", 
-                    "message": f"주문 상태가 변경되어 취소할 수 없습니다. (현재: {current_order['status']})"
-                }
-            
-            # 실제 업데이트 수행
-            self.orders[order_id]['status'] = action['new_value']
-            self._save_data()
-            
-            # 캐시/세션 정리
-            del self.pending_transactions[transaction_id]
-            
-            # 세션에서 해당 주문 제거 (선택적)
-            user_id = action.get("user_id")
-            if user_id and user_id in self.user_sessions:
-                 if self.user_sessions[user_id].get("last_viewed") == order_id:
-                     del self.user_sessions[user_id]["last_viewed"]
+            with self._approval_lock:
+                # [검증 강화] 데이터 다시 로드 및 상태 재확인
+                self._load_data()
+                error = self._check_cancel_action(transaction_id, action)
+                if error:
+                    return error
                 
-            return {
-                "status": "success", 
-                "transaction_id": transaction_id, 
-                "message": f"주문 {order_id}가 성공적으로 취소되었습니다."
-            }
+                # 실제 업데이트 수행
+                if not self.orders.update_status(action['target_entity'], action['new_value']):
+                    return {"status": "error", "message": "주문 정보가 사라졌습니다."}
+            return self._finish_cancel_action(transaction_id, action)
 
         
         return {"status": "error", "message": "트랜잭션 실행 실패"}
 
+    def execute_transactions(self, transaction_ids: list) -> dict:
+        """
+        여러 트랜잭션을 한 번에 승인합니다. (운영자 일괄 처리)
+        데이터 로드/상태 재확인은 한 번만 수행하고, 유효한 변경은 저장소에 한 번에 기록합니다.
+        트랜잭션별 결과는 execute_transaction과 같은 형식으로 반환합니다.
+        """
+        with self._approval_lock:
+            results, approved = self._execute_transactions_locked(transaction_ids)
+
+        ordered = [{"transaction_id": txn_id, **results[txn_id]} for txn_id in dict.fromkeys(transaction_ids)]
+        succeeded = len(approved)
+        return {
+            "status": "success" if succeeded == len(ordered) else ("partial" if succeeded else "error"),
+            "succeeded": succeeded,
+            "failed": len(ordered) - succeeded,
+            "results": ordered
+        }
+
+    def _execute_transactions_locked(self, transaction_ids: list):
+        """execute_transactions 본체 (self._approval_lock 안에서 호출) - (ID별 결과, 성공한 ID → action) 반환"""
+        self._load_data()
+
+        results = {}
+        approved = {} # transaction_id -> action
+        updates = {} # order_id -> new_value
+        for transaction_id in transaction_ids:
+            if transaction_id in results or transaction_id in approved:
+                continue # 중복 ID는 한 번만 처리
+
+            # 꺼낸 트랜잭션만 처리 (동시에 들어온 같은 ID의 승인/거절과 중복 실행되지 않도록)
+            action = self.pending_transactions.claim(transaction_id)
+            if action is None:
+                results[transaction_id] = {"status": "error", "message": "유효하지 않거나 만료된 트랜잭션 ID입니다."}
+                continue
+            if action['action_type'] != "cancel_order":
+                results[transaction_id] = {"status": "error", "message": "트랜잭션 실행 실패"}
+                continue
+            if action['target_entity'] in updates:
+                # 같은 주문에 대한 대기 트랜잭션이 여러 개면 첫 번째만 반영
+                results[transaction_id] = {"status": "error", "message": "같은 주문에 대한 다른 트랜잭션이 함께 처리되었습니다."}
+                continue
+
+            error = self._check_cancel_action(transaction_id, action)
+            if error:
+                results[transaction_id] = error
+                continue
+
+            approved[transaction_id] = action
+            updates[action['target_entity']] = action['new_value']
+
+        # 유효한 변경을 한 번에 영구 저장 (저장소에 반영되지 않은 주문은 실패로 보고)
+        updated = set(self.orders.update_statuses(updates)) if updates else set()
+        for transaction_id, action in list(approved.items()):
+            if action['target_entity'] not in updated:
+                results[transaction_id] = {"status": "error", "message": "주문 정보가 사라졌습니다."}
+                del approved[transaction_id]
+                continue
+            results[transaction_id] = self._finish_cancel_action(transaction_id, action)
+        return results, approved
+
     def reject_transaction(self, transaction_id: str):
         """
         사용자가 거절했을 때 호출되어 대기 중인 트랜잭션을 제거합니다.
         """
-        if transaction_id in self.pending_transactions:
-            del self.pending_transactions[transaction_id]
+        if self.pending_transactions.pop(transaction_id) is not None:
             return {"status": "cancelled", "message": "Transaction cancelled by user."}
         return {"status": "error", "message": "Transaction not found."}
+
+    def reject_transactions(self, transaction_ids: list) -> dict:
+        """여러 트랜잭션을 한 번에 거절합니다."""
+        ordered = [{"transaction_id": txn_id, **self.reject_transaction(txn_id)} for txn_id in dict.fromkeys(transaction_ids)]
+        succeeded = sum(1 for r in ordered if r["status"] == "cancelled")
+        return {
+            "status": "success" if succeeded == len(ordered) else ("partial" if succeeded else "error"),
+            "succeeded": succeeded,
+            "failed": len(ordered) - succeeded,
+            "results": ordered
+        }
+
+    def close(self):
+        """만료 정리 스레드와 주문 저장소(저널)를 닫습니다."""
+        self.pending_transactions.close()
+        self.orders.close()
@@ -1,42 +1,129 @@
 """
 최종 검증 에이전트 (D 역할)
-Upstage Solar Pro 3를 사용한 LLM-as-a-Judge 구현
+1차: 로컬 규칙/임베딩 검증 (services/local_validation.py, 수 ms)
+2차: Upstage Solar Pro 3를 사용한 LLM-as-a-Judge
+     - 1차에서 uncertain으로 판단한 응답 + 표본(VALIDATION_JUDGE_SAMPLE_RATE)만 호출
+같은 (질의, 응답, 맥락)은 판정 캐시(VerdictCache)로 다시 검증하지 않습니다.
 """
 
 import os
 import json
+import hashlib
+import random
+import threading
+import unicodedata
+from collections import OrderedDict
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
+
+import settings
+from services.local_validation import FAIL, UNCERTAIN, LocalValidator
 
 # .env 파일 로드
 load_dotenv()
 
 
+def _normalize_text(text: str) -> str:
+    """NFC 정규화 + 공백 정리 (표현이 같은 응답은 같은 키)"""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+class VerdictCache:
+    """
+    (질의, 응답, 맥락) 지문 → 검증 결과 LRU 캐시
+
+    캐시 답변/템플릿 응답처럼 같은 쌍이 반복될 때 로컬 검증과 LLM Judge를 다시 돌리지 않습니다.
+    max_size가 0이면 비활성입니다.
+    """
+
+    def __init__(self, max_size: int = settings.VALIDATION_VERDICT_CACHE_SIZE):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(query: str, response: str, context: str = "", check_topic: bool = True) -> str:
+        key = "\x1f".join(_normalize_text(part) for part in (query, response, context))
+        if not check_topic:
+            # 주제 검사를 생략한 판정은 별도 키 (같은 쌍의 주제 검사 결과와 섞이지 않도록)
+            key += "\x1fno-topic"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            verdict = self._items.get(key)
+            if verdict is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return dict(verdict)
+
+    def put(self, key: str, verdict: Dict):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[key] = dict(verdict)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
 class ValidationAgent:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, embedding_model=None,
+                 judge_enabled: bool = settings.VALIDATION_LLM_JUDGE,
+                 judge_sample_rate: float = settings.VALIDATION_JUDGE_SAMPLE_RATE):
         """
         Solar Pro 3 기반 검증 에이전트 초기화
         
         Args:
             api_key: Upstage API Key (.env 파일 또는 환경변수 사용)
+            embedding_model: 주제 일관성 검사용 임베딩 모델 (없으면 규칙 검사만)
+            judge_enabled: LLM Judge 사용 여부 (Upstage API 사용 중단으로 기본 비활성, 2025-01-29)
+            judge_sample_rate: 로컬 검증을 통과한 응답 중 LLM Judge로 표본 검사할 비율 (0~1)
         """
-        # Upstage API 사용 중단 (2025-01-29)
-        # self.api_key = api_key or os.getenv("UPSTAGE_API_KEY")
-        # if not self.api_key:
-        #     raise ValueError("UPSTAGE_API_KEY가 필요합니다. .env 파일을 확인하세요.")
-        
-        # self.client = OpenAI(
-        #     api_key=self.api_key,
-        #     base_url="https://api.upstage.ai/v1"
-        # )
         self.model = "solar-pro3"
+        self.local = LocalValidator(
+            embedding_model,
+            topic_fail_threshold=settings.VALIDATION_TOPIC_FAIL_THRESHOLD,
+            topic_uncertain_threshold=settings.VALIDATION_TOPIC_UNCERTAIN_THRESHOLD
+        )
+        self.judge_enabled = judge_enabled
+        self.judge_sample_rate = judge_sample_rate
+        self.client = None
+        self.counters = {"local_pass": 0, "local_fail": 0, "uncertain": 0, "judged": 0, "judge_fail": 0}
+        self.verdicts = VerdictCache()
+
+        if judge_enabled:
+            self.api_key = api_key or os.getenv("UPSTAGE_API_KEY")
+            if not self.api_key:
+                raise ValueError("UPSTAGE_API_KEY가 필요합니다. .env 파일을 확인하세요.")
+            from services.http_client import get_client_factory
+            self.client = get_client_factory().openai_client(
+                api_key=self.api_key,
+                base_url=settings.UPSTAGE_BASE_URL
+            )
         
     def validate_response(
         self, 
         query: str, 
         response: str,
-        conversation_history: Optional[List[Dict]] = None
+        conversation_history: Optional[List[Dict]] = None,
+        check_topic: bool = True
     ) -> Dict:
         """
         에이전트 응답 검증
@@ -45,33 +132,67 @@ class ValidationAgent:
             query: 사용자 질의
             response: 에이전트 응답
             conversation_history: 대화 히스토리 (선택)
+            check_topic: False면 주제 일관성 검사 생략 (템플릿/트랜잭션 고정 안내)
             
         Returns:
             {
                 "valid": bool,
                 "issues": List[str],
-                "filtered_response": str
+                "filtered_response": str,
+                "tier": "local" | "llm"
             }
         """
-        
-        # Upstage API 사용 중단으로 인한 Bypass (2025-01-29)
+        # 같은 (질의, 응답, 맥락)은 이전 판정 재사용 (LLM Judge가 보는 맥락까지 키에 포함)
+        context = self._build_context(conversation_history)
+        key = VerdictCache.fingerprint(query, response, context, check_topic)
+        cached = self.verdicts.get(key)
+        if cached is not None:
+            if cached["valid"]:
+                cached["filtered_response"] = response
+            return cached
+
+        result, cacheable = self._validate_uncached(query, response, context, check_topic)
+        if cacheable:
+            self.verdicts.put(key, result)
+        return result
+
+    def _validate_uncached(self, query: str, response: str, context: str, check_topic: bool = True):
+        """(검증 결과, 판정 캐시 저장 여부) - Judge API 오류로 기본 통과한 결과는 저장하지 않음"""
+        # 1차: 로컬 검증
+        local = self.local.validate(query, response, check_topic=check_topic)
+        if local["verdict"] == FAIL:
+            self.counters["local_fail"] += 1
+            return {"valid": False, "issues": local["issues"], "filtered_response": response, "tier": "local"}, True
+
+        if local["verdict"] == UNCERTAIN:
+            self.counters["uncertain"] += 1
+            needs_judge = True
+        else:
+            self.counters["local_pass"] += 1
+            needs_judge = self.judge_sample_rate > 0 and random.random() < self.judge_sample_rate
+
+        # LLM Judge 비활성 시 보수적 통과 (불확실하면 통과)
+        if not (self.judge_enabled and needs_judge):
+            return {"valid": True, "issues": [], "filtered_response": response, "tier": "local"}, True
+
+        # 2차: LLM Judge
+        prompt = self._build_validation_prompt(query, response, context)
+        llm_output = self._call_solar_pro(prompt)
+        cacheable = llm_output is not None
+        result = self._parse_validation_result(llm_output if cacheable else self._get_default_pass_response(), response)
+        self.counters["judged"] += 1
+        if not result["valid"]:
+            self.counters["judge_fail"] += 1
+        result["tier"] = "llm"
+        return result, cacheable
+
+    def stats(self) -> Dict:
         return {
-            "valid": True,
-            "issues": [],
-            "filtered_response": response
+            "judge_enabled": self.judge_enabled,
+            "judge_sample_rate": self.judge_sample_rate,
+            **self.counters,
+            "verdict_cache": self.verdicts.stats()
         }
-
-        # # 대화 맥락 구성
-        # context = self._build_context(conversation_history)
-        # 
-        # # 검증 프롬프트
-        # prompt = self._build_validation_prompt(query, response, context)
-        # 
-        # # Solar Pro 2 호출
-        # result = self._call_solar_pro(prompt)
-        # 
-        # # 결과 파싱
-        # return self._parse_validation_result(result, response)
     
     def _build_context(self, history: Optional[List[Dict]]) -> str:
         """대화 히스토리에서 맥락 추출"""
@@ -81,7 +202,7 @@ class ValidationAgent:
         # 최근 3턴만 사용
         recent = history[-3:]
         return "\n".join([
-            f"{msg['role']}: {msg['content']}" 
+            f"{msg.get('role', '')}: {msg.get('content', '')}" 
             for msg in recent
         ])
     
@@ -182,7 +303,7 @@ class ValidationAgent:
 
     def _call_solar_pro(self, prompt: str) -> str:
         """
-        Solar Pro 3 API 호출 (reasoning_effort=high)
+        Solar Pro 3 API 호출 (reasoning_effort=high, 오류 시 None)
         """
         
         try:
@@ -204,7 +325,7 @@ class ValidationAgent:
             
         except Exception as e:
             print(f"Solar Pro 3 API 오류: {e}")
-            return self._get_default_pass_response()
+            return None
     
     def _parse_validation_result(
         self, 
@@ -4,5 +4,93 @@ from dotenv import load_dotenv
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") # OpenAI 호환 엔드포인트 (미설정 시 공식 API)
 MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4o")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "jhgan/ko-sroberta-multitask")
+UPSTAGE_BASE_URL = os.getenv("UPSTAGE_BASE_URL", "https://api.upstage.ai/v1")
+
+# LLM 호출용 공유 HTTP 커넥션 풀
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1")) # OpenAI SDK 내부 재시도 횟수
+
+# 요청 마감 시간 및 LLM 서킷 브레이커
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "20"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+# /chat 입장 제어 (동시성 제한 + 유저별 속도 제한)
+CHAT_MAX_CONCURRENT = int(os.getenv("CHAT_MAX_CONCURRENT", "32"))
+CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "64"))
+CHAT_QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", "5"))
+CHAT_MAX_CONCURRENT_PER_USER = int(os.getenv("CHAT_MAX_CONCURRENT_PER_USER", "2"))
+CHAT_RATE_PER_USER = float(os.getenv("CHAT_RATE_PER_USER", "1")) # 초당 허용 요청 수
+CHAT_BURST_PER_USER = float(os.getenv("CHAT_BURST_PER_USER", "5"))
+
+# 주문 저장소: csv (orders.csv 인덱스) | sqlite (orders.db, 최초 실행 시 orders.csv에서 가져옴)
+ORDER_STORE_BACKEND = os.getenv("ORDER_STORE_BACKEND", "csv")
+# orders.csv 변경 저널: fsync 묶음 크기/주기, 스냅샷 압축 주기(저널 레코드 수)
+ORDER_JOURNAL_FSYNC_BATCH = int(os.getenv("ORDER_JOURNAL_FSYNC_BATCH", "16"))
+ORDER_JOURNAL_FSYNC_INTERVAL = float(os.getenv("ORDER_JOURNAL_FSYNC_INTERVAL", "0.05"))
+ORDER_JOURNAL_COMPACT_EVERY = int(os.getenv("ORDER_JOURNAL_COMPACT_EVERY", "1000"))
+
+# 대화 기록 저장소: csv (history.csv) | sqlite (history.db, 최초 실행 시 history.csv에서 가져옴)
+HISTORY_STORE_BACKEND = os.getenv("HISTORY_STORE_BACKEND", "csv")
+# 대화 기록 비동기 저장: 대기열 최대 크기, 한 번에 저장할 건수, 최대 저장 주기(초)
+HISTORY_QUEUE_MAX = int(os.getenv("HISTORY_QUEUE_MAX", "10000"))
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "100"))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "0.5"))
+# /history 페이지 크기 (기본/최대), NDJSON 스트리밍 시 한 번에 읽는 건수
+HISTORY_PAGE_DEFAULT = int(os.getenv("HISTORY_PAGE_DEFAULT", "50"))
+HISTORY_PAGE_MAX = int(os.getenv("HISTORY_PAGE_MAX", "500"))
+HISTORY_STREAM_CHUNK = int(os.getenv("HISTORY_STREAM_CHUNK", "200"))
+
+# 승인 대기 트랜잭션 만료 시간(초) 및 만료 정리 주기(초)
+PENDING_TXN_TTL_SECONDS = float(os.getenv("PENDING_TXN_TTL_SECONDS", "600"))
+PENDING_TXN_SWEEP_INTERVAL = float(os.getenv("PENDING_TXN_SWEEP_INTERVAL", "30"))
+# /approve/batch 한 번에 처리할 수 있는 최대 트랜잭션 수
+APPROVE_BATCH_MAX = int(os.getenv("APPROVE_BATCH_MAX", "500"))
+
+# 선택지 응답 ↔ 상품명 매칭 최소 유사도 (자모 3-gram, 0~1)
+CANDIDATE_MATCH_THRESHOLD = float(os.getenv("CANDIDATE_MATCH_THRESHOLD", "0.6"))
+
+# 주문 조회/취소 결과를 LLM으로 다듬을 인텐트 (쉼표 구분, 기본: 없음 → 템플릿 응답)
+# 예: LLM_REPHRASE_INTENTS=ORDER,BILLING,ORDER_CANCEL
+LLM_REPHRASE_INTENTS = {intent.strip().upper() for intent in os.getenv("LLM_REPHRASE_INTENTS", "").split(",") if intent.strip()}
+
+# 응답 검증: LLM Judge(Solar Pro) 사용 여부, 로컬 통과 응답의 표본 검사 비율,
+# 질의/응답 임베딩 유사도 기준 (fail 미만 → 차단, uncertain 미만 → LLM Judge 대상)
+VALIDATION_LLM_JUDGE = os.getenv("VALIDATION_LLM_JUDGE", "false").lower() == "true"
+VALIDATION_JUDGE_SAMPLE_RATE = float(os.getenv("VALIDATION_JUDGE_SAMPLE_RATE", "0"))
+VALIDATION_TOPIC_FAIL_THRESHOLD = float(os.getenv("VALIDATION_TOPIC_FAIL_THRESHOLD", "0.05"))
+VALIDATION_TOPIC_UNCERTAIN_THRESHOLD = float(os.getenv("VALIDATION_TOPIC_UNCERTAIN_THRESHOLD", "0.3"))
+# 검증 모드: blocking (모든 응답을 반환 전에 검증) | async (VALIDATION_BLOCKING_INTENTS만 반환 전 검증,
+# 나머지는 응답 후 백그라운드 워커가 표본 검증 → 결과를 대화 기록 옆에 저장, 실패 시 답변 캐시 거부)
+VALIDATION_MODE = os.getenv("VALIDATION_MODE", "blocking").lower()
+VALIDATION_BLOCKING_INTENTS = {intent.strip().upper() for intent in os.getenv("VALIDATION_BLOCKING_INTENTS", "ORDER_CANCEL,BILLING").split(",") if intent.strip()}
+VALIDATION_ASYNC_WORKERS = int(os.getenv("VALIDATION_ASYNC_WORKERS", "4"))
+VALIDATION_ASYNC_QUEUE_MAX = int(os.getenv("VALIDATION_ASYNC_QUEUE_MAX", "1000"))
+VALIDATION_ASYNC_SAMPLE_RATE = float(os.getenv("VALIDATION_ASYNC_SAMPLE_RATE", "1"))
+# (질의, 응답, 맥락)별 검증 결과 LRU 캐시 크기 (0이면 비활성)
+VALIDATION_VERDICT_CACHE_SIZE = int(os.getenv("VALIDATION_VERDICT_CACHE_SIZE", "4096"))
+
+# 대화 피드백 → 답변 캐시: 긍정(good) 피드백 N건이면 검증(캐시 히트 대상)으로 승격, 부정(bad) M건이면 거부
+CACHE_PROMOTE_MIN_POSITIVE = int(os.getenv("CACHE_PROMOTE_MIN_POSITIVE", "3"))
+CACHE_REJECT_MIN_NEGATIVE = int(os.getenv("CACHE_REJECT_MIN_NEGATIVE", "1"))
+# 캐시 히트율 추이: 구간 길이(초)와 보관할 구간 수
+CACHE_TREND_BUCKET_SECONDS = int(os.getenv("CACHE_TREND_BUCKET_SECONDS", "60"))
+CACHE_TREND_BUCKETS = int(os.getenv("CACHE_TREND_BUCKETS", "60"))
+# 답변 캐시 키 정규화 시 조사/어미 정리 ("로그인이 안돼요" = "로그인 안됨") - 바꾸면 기존 캐시 키는 로드 시 재계산
+# 다른 질문이 한 키로 합쳐지면 그 답변이 나가므로 기본은 끔 (tools/cache_key_analysis.py의 잘못 합쳐진 키 확인 후 사용)
+CACHE_KEY_STEMMING = os.getenv("CACHE_KEY_STEMMING", "false").lower() == "true"
+# 관리 API(/admin/cache 삭제) 토큰: 요청 헤더 X-Admin-Token과 일치해야 함 (미설정 시 삭제 API 비활성)
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+# 답변 캐시 변경 저널 (answer_cache.json.journal): fsync 묶음 크기/주기, N건마다 JSON 스냅샷 재작성
+CACHE_JOURNAL_FSYNC_BATCH = int(os.getenv("CACHE_JOURNAL_FSYNC_BATCH", "32"))
+CACHE_JOURNAL_FSYNC_INTERVAL = float(os.getenv("CACHE_JOURNAL_FSYNC_INTERVAL", "0.5"))
+CACHE_JOURNAL_COMPACT_EVERY = int(os.getenv("CACHE_JOURNAL_COMPACT_EVERY", "500"))
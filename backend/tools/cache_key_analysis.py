@@ -0,0 +1,137 @@
+"""
+답변 캐시 키 정규화 효과 분석
+
+history.csv의 질문을 기록 순서대로 다시 흘려 보내며, 캐시 키 방식별로 "이전에 같은 키가
+있었는가"(= 캐시 히트 가능)를 세어 히트율과 줄어드는 LLM 호출 수를 비교합니다.
+- legacy: 이전 방식 (공백 제거 + 소문자)
+- normalized: NFC/문장부호/이모티콘/띄어쓰기 정규화 (기본값)
+- stemmed: normalized + 조사/어미 정리 (CACHE_KEY_STEMMING=true)
+
+히트율과 함께 잘못 합쳐진 키(legacy 기준으로 다른 질문인데 기록된 답변도 다른 키)를 셉니다.
+이런 키에서는 한 질문의 답변이 다른 질문에 캐시 히트로 나가므로, 0이 아니면 목록을 확인하세요.
+
+사용법 (backend 디렉토리에서):
+    python tools/cache_key_analysis.py                       # TECH_SUPPORT 질문
+    python tools/cache_key_analysis.py --intents all --top 20
+"""
+
+import argparse
+import csv
+import os
+import sys
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.history import DEFAULT_CSV_PATH
+from services.query_normalizer import legacy_clean_query, normalize_query
+
+KEY_FUNCTIONS: Dict[str, Callable[[str], str]] = {
+    "legacy": legacy_clean_query,
+    "normalized": lambda query: normalize_query(query, stemming=False),
+    "stemmed": lambda query: normalize_query(query, stemming=True),
+}
+
+
+def load_queries(path: str, intents) -> List[Tuple[str, str]]:
+    """(질문, 기록된 답변) 목록 (기록 순서)"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [(row['query'], row.get('response') or "") for row in csv.DictReader(f)
+                if row.get('query', '').strip() and (intents is None or row.get('intent') in intents)]
+
+
+def replay(queries: List[str], key_fn: Callable[[str], str]) -> Dict:
+    """처음 나온 키는 LLM 생성(미스), 이후 같은 키는 캐시 히트로 계산"""
+    seen = set()
+    hits = 0
+    for query in queries:
+        key = key_fn(query)
+        if key in seen:
+            hits += 1
+        else:
+            seen.add(key)
+    return {
+        "queries": len(queries),
+        "distinct_keys": len(seen),
+        "hits": hits,
+        "llm_calls": len(queries) - hits,
+        "hit_rate": round(hits / len(queries), 3) if queries else 0.0,
+    }
+
+
+def false_merges(rows: List[Tuple[str, str]], key_fn: Callable[[str], str]) -> List[Dict]:
+    """
+    서로 다른 legacy 질문이 한 키로 합쳐졌는데 질문별 대표 답변(가장 많이 기록된 답변)이 다른 키
+    답변이 없는 기록은 비교에서 제외합니다.
+    """
+    answers = defaultdict(lambda: defaultdict(Counter))
+    for query, response in rows:
+        if response.strip():
+            answers[key_fn(query)][legacy_clean_query(query)][" ".join(response.split())] += 1
+
+    merges = []
+    for by_query in answers.values():
+        if len(by_query) < 2:
+            continue
+        representative = {query: counter.most_common(1)[0][0] for query, counter in by_query.items()}
+        if len(set(representative.values())) > 1:
+            merges.append({
+                "queries": sorted(representative),
+                "records": sum(sum(counter.values()) for counter in by_query.values()),
+            })
+    merges.sort(key=lambda merge: merge["records"], reverse=True)
+    return merges
+
+
+def merged_groups(queries: List[str], top: int) -> List[List[str]]:
+    """stemmed 키 하나로 합쳐진 서로 다른 legacy 표현 (많은 순)"""
+    groups = defaultdict(set)
+    for query in queries:
+        groups[KEY_FUNCTIONS["stemmed"](query)].add(query.strip())
+    variants = [sorted(group) for group in groups.values()
+                if len({legacy_clean_query(q) for q in group}) > 1]
+    variants.sort(key=len, reverse=True)
+    return variants[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="history.csv 재생으로 캐시 키 정규화 방식별 히트율을 비교합니다.")
+    parser.add_argument("--history", default=DEFAULT_CSV_PATH)
+    parser.add_argument("--intents", default="TECH_SUPPORT", help="쉼표 구분 인텐트 또는 all")
+    parser.add_argument("--top", type=int, default=10, help="출력할 합쳐진 표현 그룹 수")
+    args = parser.parse_args()
+
+    intents = None if args.intents.lower() == "all" else {i.strip() for i in args.intents.split(",") if i.strip()}
+    rows = load_queries(args.history, intents)
+    if not rows:
+        print("분석할 질문이 없습니다.")
+        return
+    queries = [query for query, _ in rows]
+
+    results = {name: replay(queries, key_fn) for name, key_fn in KEY_FUNCTIONS.items()}
+    merges = {name: false_merges(rows, key_fn) for name, key_fn in KEY_FUNCTIONS.items()}
+    baseline = results["legacy"]
+    print(f"질문 {len(queries):,}건 ({args.history}, 인텐트: {args.intents})\n")
+    print(f"{'방식':<12}{'고유 키':>10}{'히트':>8}{'히트율':>10}{'LLM 호출':>10}{'절감(vs legacy)':>18}{'잘못 합쳐진 키':>16}")
+    for name, result in results.items():
+        saved = baseline["llm_calls"] - result["llm_calls"]
+        print(f"{name:<12}{result['distinct_keys']:>10,}{result['hits']:>8,}{result['hit_rate']:>10.1%}"
+              f"{result['llm_calls']:>10,}{saved:>18,}{len(merges[name]):>16,}")
+
+    for name in ("normalized", "stemmed"):
+        if merges[name]:
+            print(f"\n{name}: 답변이 다른 질문이 합쳐진 키 (기록 많은 순)")
+            for merge in merges[name][:args.top]:
+                print(f"  - {' / '.join(merge['queries'])} ({merge['records']}건)")
+
+    groups = merged_groups(queries, args.top)
+    if groups:
+        print("\n하나의 키로 합쳐진 표현:")
+        for group in groups:
+            print(f"  - {' / '.join(group)}")
+
+
+if __name__ == "__main__":
+    main()
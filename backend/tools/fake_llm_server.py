@@ -0,0 +1,202 @@
+"""
+로컬 가짜 LLM 서버 (OpenAI 호환 /v1/chat/completions)
+
+외부 API 없이 답변 사전 생성/일괄 검증/부하 테스트를 돌리기 위한 표준 라이브러리 서버입니다.
+- 응답 지연(--latency-ms), 지터(--jitter-ms), 오류율(--error-rate, HTTP 500) 설정
+- 검증 프롬프트("overall_pass" 포함)에는 통과 판정 JSON, 그 외에는 질문을 인용한 고정 형식 답변
+- 의도 분류 프롬프트에는 프롬프트에 포함된 가장 가까운 과거 사례(cases.csv)의 인텐트를 분류 JSON으로 반환
+- GET /v1/models: 상태 확인, GET /stats: 요청/오류 수
+
+사용법 (backend 디렉토리에서):
+    python tools/fake_llm_server.py --port 8081 --latency-ms 300 --jitter-ms 100 --error-rate 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8081/v1 OPENAI_API_KEY=local python tools/materialize_answers.py
+
+코드에서 사용:
+    server = start_fake_llm_server(port=0, latency_ms=50)   # 백그라운드 스레드, port=0이면 빈 포트
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    ...
+    server.shutdown()
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+VALIDATION_MARKER = "overall_pass"
+CLASSIFICATION_MARKER = "Classify the user input"
+# 분류 프롬프트의 과거 사례 줄: "- Case: ... => Intent: TECH_SUPPORT"
+_CASE_INTENT_RE = re.compile(r"=> Intent: (\w+)")
+# 답변에 인용할 질문 길이
+QUOTE_CHARS = 60
+
+
+def fake_completion_text(messages) -> str:
+    """프롬프트 종류에 맞는 고정 형식 응답"""
+    prompt = messages[-1].get("content", "") if messages else ""
+    system = "\n".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    if CLASSIFICATION_MARKER in system:
+        match = _CASE_INTENT_RE.search(system)
+        return json.dumps({
+            "intent": match.group(1) if match else "OFF_TOPIC",
+            "confidence": 0.8 if match else 0.3,
+            "reasoning": "모의 분류: 가장 가까운 과거 사례"
+        }, ensure_ascii=False)
+
+    if VALIDATION_MARKER in prompt:
+        return json.dumps({
+            "일관성": {"pass": True, "reason": "모의 판정"},
+            "완전성": {"pass": True, "reason": "모의 판정"},
+            "정확성": {"pass": True, "reason": "모의 판정"},
+            "정책준수": {"pass": True, "reason": "모의 판정"},
+            "overall_pass": True,
+            "improvement": ""
+        }, ensure_ascii=False)
+
+    # 프롬프트 마지막 질문 줄을 인용 (주제 일관성 검사 통과용)
+    question = ""
+    for line in reversed(prompt.splitlines()):
+        if line.strip():
+            question = line.strip()
+            break
+    question = question[:QUOTE_CHARS]
+    return (
+        f"{question} 관련 안내드립니다.\n"
+        "1. 앱과 브라우저를 최신 버전으로 업데이트해주세요.\n"
+        "2. 캐시와 쿠키를 삭제한 뒤 다시 시도해주세요.\n"
+        "3. 문제가 계속되면 고객센터(1588-0000)로 문의해주세요."
+    )
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    server_version = "FakeLLM/1.0"
+
+    def log_message(self, format, *args):
+        # 요청마다 stderr 출력 생략 (부하 테스트 시 출력 폭주 방지)
+        pass
+
+    def _send_json(self, status: int, body: Dict):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "fake-llm", "object": "model"}]})
+        elif self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.server.stats())
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid JSON"}})
+            return
+
+        server = self.server
+        delay = max(0.0, server.latency_ms + server.rng_uniform(-server.jitter_ms, server.jitter_ms)) / 1000
+        if delay:
+            time.sleep(delay)
+
+        if server.rng_uniform(0, 1) < server.error_rate:
+            server.count("errors")
+            self._send_json(500, {"error": {"message": "fake upstream error", "type": "server_error"}})
+            return
+
+        server.count("completions")
+        content = fake_completion_text(request.get("messages") or [])
+        self._send_json(200, {
+            "id": f"chatcmpl-fake-{server.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake-llm"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: int = None):
+        super().__init__(address, FakeLLMHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.completions = 0
+        self.errors = 0
+
+    def rng_uniform(self, low: float, high: float) -> float:
+        with self._lock:
+            return self._rng.uniform(low, high)
+
+    def count(self, field: str):
+        with self._lock:
+            self.requests += 1
+            setattr(self, field, getattr(self, field) + 1)
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "completions": self.completions,
+            "errors": self.errors,
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "error_rate": self.error_rate,
+        }
+
+
+def start_fake_llm_server(host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                          jitter_ms: float = 0.0, error_rate: float = 0.0, seed: int = None) -> FakeLLMServer:
+    """백그라운드 스레드에서 서버를 시작합니다. (종료: server.shutdown())"""
+    server = FakeLLMServer((host, port), latency_ms, jitter_ms, error_rate, seed)
+    threading.Thread(target=server.serve_forever, name="fake-llm", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 호환 가짜 LLM 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = FakeLLMServer((args.host, args.port), args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    print(f"가짜 LLM 서버: http://{args.host}:{server.server_port}/v1 "
+          f"(지연 {args.latency_ms}±{args.jitter_ms}ms, 오류율 {args.error_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"종료: {server.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+FAQ 답변 사전 생성 (답변 캐시 미리 채우기)
+
+질문마다 첫 사용자가 LLM 생성 비용을 내지 않도록, 자주 나올 질문의 답변을 미리 만들어
+답변 캐시에 넣습니다.
+- 대상 질문: faq_database.csv의 질문 + cases.csv 예문 + history.csv에서 반복된 질문
+  (에이전트가 지식 검색으로 보내는 TECH_SUPPORT 범위, 캐시 키 기준 중복 제거)
+- CachedRAGKnowledgeService의 검색/프롬프트/LLM 호출을 그대로 사용, 동시 생성 수 제한
+- 로컬 검증(규칙 + 주제 일관성)에서 실패한 답변은 제외, 통과(pass)한 답변만 판정을 함께 보관
+  (uncertain 답변은 판정 없이 저장 → 히트 시 응답 검증/LLM Judge를 거침)
+- 기본은 대기(staged) 상태로 저장 → 피드백으로 승격, --verified면 바로 캐시 히트 대상
+- 캐시 파일은 마지막에 한 번만 저장
+- 답변 캐시 쓰기 잠금(answer_cache.json.lock)을 잡고 실행하므로 서버가 캐시를 열고 있으면 거절
+  → 서버를 내린 뒤 실행 (서버 캐시에 두 프로세스가 동시에 쓰지 않도록, --dry-run 포함)
+
+사용법 (backend 디렉토리에서):
+    python tools/fake_llm_server.py --port 8081 &
+    python tools/materialize_answers.py --llm-base-url http://127.0.0.1:8081/v1 --dry-run
+    python tools/materialize_answers.py --concurrency 8 --verified
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import settings
+from services.history import DEFAULT_CSV_PATH as DEFAULT_HISTORY_PATH
+
+DATA_DIR = os.path.join(BACKEND_DIR, 'data')
+DEFAULT_FAQ_PATH = os.path.join(DATA_DIR, 'faq_database.csv')
+DEFAULT_CASES_PATH = os.path.join(DATA_DIR, 'cases.csv')
+DEFAULT_CACHE_PATH = os.path.join(DATA_DIR, 'answer_cache.json')
+
+# 에이전트가 지식 검색(캐시 조회)에 쓰는 인텐트/카테고리 (agent.py TECH_SUPPORT 분기)
+KNOWLEDGE_INTENT = "TECH_SUPPORT"
+KNOWLEDGE_CATEGORY = "tech_support"
+
+
+def _read_csv(path: str) -> List[Dict]:
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def collect_questions(args) -> List[Tuple[str, str]]:
+    """(질문, 출처) 목록 - FAQ → 예문 → 대화 기록 순"""
+    questions = [(row['question'], 'faq') for row in _read_csv(args.faq)
+                 if row.get('category') in args.faq_categories]
+    questions += [(row['page_content'], 'cases') for row in _read_csv(args.cases)
+                  if row.get('intent') == KNOWLEDGE_INTENT]
+
+    history_counts = Counter(
+        row['query'].strip() for row in _read_csv(args.history)
+        if row.get('intent') == KNOWLEDGE_INTENT and row.get('query', '').strip()
+    )
+    questions += [(query, 'history') for query, count in history_counts.most_common()
+                  if count >= args.history_min_count]
+    return [(question.strip(), source) for question, source in questions if question.strip()]
+
+
+def plan(questions: List[Tuple[str, str]], cache, refresh: bool) -> Tuple[List[Tuple[str, str]], Counter]:
+    """캐시 키 기준 중복 제거 + 이미 캐시에 있는 질문 제외"""
+    skipped = Counter()
+    seen = set()
+    todo = []
+    for question, source in questions:
+        key = cache._get_query_hash(question, KNOWLEDGE_CATEGORY)
+        if key in seen:
+            skipped['duplicate'] += 1
+            continue
+        seen.add(key)
+        existing = cache.cache.get(key)
+        if existing and not refresh:
+            skipped['rejected' if existing.get('rejected') else 'cached'] += 1
+            continue
+        todo.append((question, source))
+    return todo, skipped
+
+
+def materialize(args, cache):
+    """대상 질문의 답변을 생성/검증해 캐시에 추가합니다. (--dry-run이면 대상만 출력)"""
+    todo, skipped = plan(collect_questions(args), cache, args.refresh)
+    if args.limit is not None:
+        todo = todo[:args.limit]
+    print(f"생성 대상: {len(todo)}건 (출처 {dict(Counter(source for _, source in todo))}, 건너뜀 {dict(skipped)})")
+    if args.dry_run:
+        for question, source in todo:
+            print(f"  [{source}] {question}")
+        return
+    if not todo:
+        return
+
+    from services.knowledge import KnowledgeService
+    from services.local_validation import FAIL, PASS, LocalValidator
+
+    # 캐시 쓰기는 이 스크립트가 모아서 한 번에 (서비스 내부 캐시/대화 맥락 비활성)
+    service = KnowledgeService(enable_cache=False, enable_conversation=False)
+    validator = LocalValidator(
+        service.model,
+        topic_fail_threshold=settings.VALIDATION_TOPIC_FAIL_THRESHOLD,
+        topic_uncertain_threshold=settings.VALIDATION_TOPIC_UNCERTAIN_THRESHOLD
+    )
+
+    def generate(question: str) -> Dict:
+        return service._search_knowledge_internal(question, category=KNOWLEDGE_CATEGORY)
+
+    entries = []
+    failed = Counter()
+    uncertain = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = {executor.submit(generate, question): (question, source) for question, source in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            question, source = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed['error'] += 1
+                print(f"  ❌ {question}: {e}")
+                continue
+            if not result.get('used_llm') or result.get('error'):
+                # LLM 실패 시 FAQ 원문 대체 답변은 저장하지 않음
+                failed['llm'] += 1
+                continue
+
+            verdict = validator.validate(question, result['answer'])
+            if verdict['verdict'] == FAIL:
+                failed['validation'] += 1
+                print(f"  ⚠️  검증 실패로 제외: {question} {verdict['issues']}")
+                continue
+
+            entry = {
+                'query': question,
+                'answer': result['answer'],
+                'category': KNOWLEDGE_CATEGORY,
+                'verified': args.verified,
+                'metadata': {
+                    'faq_ids': result.get('matched_faq_ids', []),
+                    'confidence': result.get('confidence'),
+                    'source': f"materialized:{source}",
+                    'materialized_at': datetime.now().isoformat()
+                }
+            }
+            # 로컬 검증을 확실히 통과한 답변만 판정 저장 (uncertain은 첫 히트 때 Judge까지 거치도록 판정 없이 저장)
+            if verdict['verdict'] == PASS:
+                entry['verdict'] = {'valid': True, 'tier': 'local', 'validated_at': datetime.now().isoformat()}
+            else:
+                uncertain += 1
+            entries.append(entry)
+            if done % 10 == 0:
+                print(f"  {done}/{len(todo)}건 처리")
+
+    elapsed = time.perf_counter() - started
+    cache.add_many(entries)
+    print(f"저장: {len(entries)}건 ({'verified' if args.verified else 'staged'}, 판정 없이 저장한 uncertain {uncertain}건) / 실패: {dict(failed)}")
+    print(f"소요 시간: {elapsed:.2f}s ({len(todo) / elapsed:.1f} 질문/s, 동시 {args.concurrency})")
+    print(f"캐시 파일: {cache.cache_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAQ/자주 묻는 질문의 답변을 미리 생성해 답변 캐시에 넣습니다.")
+    parser.add_argument("--faq", default=DEFAULT_FAQ_PATH)
+    parser.add_argument("--cases", default=DEFAULT_CASES_PATH)
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH)
+    parser.add_argument("--cache-file", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--faq-categories", default=KNOWLEDGE_CATEGORY, help="쉼표 구분 FAQ 카테고리")
+    parser.add_argument("--history-min-count", type=int, default=2, help="대화 기록에서 이 횟수 이상 나온 질문만")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 LLM 생성 수")
+    parser.add_argument("--limit", type=int, help="생성할 최대 질문 수")
+    parser.add_argument("--verified", action="store_true", help="검증됨으로 저장 (바로 캐시 히트 대상)")
+    parser.add_argument("--refresh", action="store_true", help="이미 캐시에 있는 질문도 다시 생성")
+    parser.add_argument("--llm-base-url", help="OpenAI 호환 엔드포인트 (예: tools/fake_llm_server.py)")
+    parser.add_argument("--dry-run", action="store_true", help="대상 질문만 출력")
+    args = parser.parse_args()
+    args.faq_categories = {c.strip() for c in args.faq_categories.split(",") if c.strip()}
+
+    if args.llm_base_url:
+        # LLMAgent가 공유 클라이언트를 만들기 전에 설정 (http_client가 호출 시점에 읽음)
+        settings.OPENAI_BASE_URL = args.llm_base_url
+        settings.OPENAI_API_KEY = settings.OPENAI_API_KEY or "local"
+        os.environ.setdefault("OPENAI_API_KEY", settings.OPENAI_API_KEY)
+
+    from services.journal import WriterLockHeld
+    from services.knowledge import AnswerCache
+
+    try:
+        cache = AnswerCache(args.cache_file)
+    except WriterLockHeld as e:
+        print(f"답변 캐시를 열 수 없습니다: {e}")
+        print("서버가 실행 중이면 종료한 뒤 다시 실행하세요.")
+        sys.exit(1)
+    try:
+        materialize(args, cache)
+    finally:
+        # 저널 fsync 대기분 반영 + 쓰기 잠금 해제
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
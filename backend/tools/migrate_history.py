@@ -0,0 +1,54 @@
+"""
+history.csv → history.db (SQLite) 일회성 마이그레이션
+
+이미 있는 id는 건너뛰므로 여러 번 실행해도 안전합니다. 마이그레이션 후
+HISTORY_STORE_BACKEND=sqlite 로 설정하면 서버가 history.db를 사용합니다.
+
+사용법 (backend 디렉토리에서):
+    python tools/migrate_history.py
+    python tools/migrate_history.py --csv data/history.csv --db data/history.db
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.history import DEFAULT_CSV_PATH, DEFAULT_DB_PATH, SQLiteHistoryService
+
+
+def count_csv_rows(csv_path: str) -> int:
+    with open(csv_path, mode='r', encoding='utf-8', newline='') as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="history.csv를 SQLite 기록 저장소로 옮깁니다.")
+    parser.add_argument("--csv", default=DEFAULT_CSV_PATH)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.csv):
+        print(f"CSV 파일이 없습니다: {args.csv}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    store = SQLiteHistoryService(args.db)
+    before = len(store)
+    inserted = store.import_csv(args.csv)
+    total = len(store)
+    store.close()
+
+    csv_rows = count_csv_rows(args.csv)
+    print(f"CSV 행: {csv_rows:,}")
+    print(f"추가: {inserted:,} / 건너뜀(이미 존재하거나 중복 id): {csv_rows - inserted:,}")
+    print(f"DB 행: {before:,} → {total:,} ({args.db})")
+    print(f"소요 시간: {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+대화 기록 일괄 검증 (오프라인 감사)
+
+history.csv / history.db의 응답을 ValidationAgent 규칙으로 다시 검사해 잘못된 답변과
+그 답변을 담고 있는 답변 캐시 항목을 찾습니다.
+- 기록을 chunk 단위로 스트리밍 (전체를 메모리에 올리지 않음)
+- 로컬 규칙/임베딩 검사는 프로세스 풀에서 병렬 실행
+- --judge: uncertain 응답(+ --judge-sample 비율의 통과 응답)을 LLM Judge로 재검사
+  (OpenAI 호환 엔드포인트, --judge-base-url로 로컬 스텁 서버 지정 가능, 동시 요청 수 제한)
+- chunk마다 체크포인트를 저장하므로 --resume으로 중단한 위치부터 이어서 실행
+  (실패 기록은 체크포인트 옆 <checkpoint>.failures에 한 줄씩 추가, 체크포인트에는 파일 위치만 저장)
+- 결과는 요약 리포트(JSON)로 저장, --reject-cache면 실패 기록의 cache_key로 캐시 항목을 거부 처리
+  (cache_key가 없는 이전 기록만 답변 텍스트가 같은 항목으로 찾음)
+- --reject-cache는 답변 캐시 쓰기 잠금(answer_cache.json.lock)을 먼저 잡고 시작하므로,
+  서버가 캐시를 열고 있으면 검사 전에 거절 → 서버를 내린 뒤 실행 (서버 캐시에 두 프로세스가 동시에 쓰지 않도록)
+
+사용법 (backend 디렉토리에서):
+    python tools/validate_history.py
+    python tools/validate_history.py --backend sqlite --workers 8 --embedding-model jhgan/ko-sroberta-multitask
+    python tools/validate_history.py --judge --judge-base-url http://127.0.0.1:8081/v1 --judge-concurrency 16
+    python tools/validate_history.py --resume --reject-cache --record
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import settings
+from services.journal import WriterLockHeld
+from services.history import DEFAULT_CSV_PATH, DEFAULT_DB_PATH, HistoryService, SQLiteHistoryService
+from services.local_validation import FAIL, PASS, UNCERTAIN, LocalValidator
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(BACKEND_DIR, 'data', 'validate_history.checkpoint.json')
+DEFAULT_REPORT_PATH = os.path.join(BACKEND_DIR, 'data', 'validation_report.json')
+# 리포트에 남길 질의/응답 길이 (요약용)
+SNIPPET_CHARS = 80
+# 주제 일관성 검사를 적용할 인텐트 (LLM/지식 검색이 만든 답변)
+# 주문/청구/범위 밖 응답은 템플릿·트랜잭션 고정 안내라 질의("예")와 어휘가 겹치지 않음 (기록에 템플릿 여부가 없어 인텐트로 판단)
+TOPIC_CHECK_INTENTS = {"TECH_SUPPORT", "ACCOUNT_MGMT"}
+
+
+# ==================== 프로세스 풀 (로컬 검증) ====================
+
+_worker_validator: Optional[LocalValidator] = None
+
+
+def _init_worker(embedding_model_name: Optional[str]):
+    """프로세스마다 한 번: LocalValidator (+ 임베딩 모델) 생성"""
+    global _worker_validator
+    model = None
+    if embedding_model_name:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(embedding_model_name)
+    _worker_validator = LocalValidator(
+        model,
+        topic_fail_threshold=settings.VALIDATION_TOPIC_FAIL_THRESHOLD,
+        topic_uncertain_threshold=settings.VALIDATION_TOPIC_UNCERTAIN_THRESHOLD
+    )
+
+
+def _validate_pairs(pairs: List[Tuple[str, str, bool]]) -> List[Dict]:
+    return [_worker_validator.validate(query, response, check_topic=check_topic) for query, response, check_topic in pairs]
+
+
+# ==================== LLM Judge (비동기, 동시 요청 수 제한) ====================
+
+class BatchJudge:
+    """ValidationAgent와 같은 프롬프트/파싱으로 OpenAI 호환 엔드포인트를 호출합니다."""
+
+    def __init__(self, base_url: str, api_key: str, model: str, concurrency: int):
+        from services.http_client import get_client_factory
+        from services.validation import ValidationAgent
+
+        self.prompts = ValidationAgent(judge_enabled=False)
+        self.client = get_client_factory().async_openai_client(api_key=api_key, base_url=base_url)
+        self.model = model
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.calls = 0
+        self.errors = 0
+
+    async def judge(self, query: str, response: str) -> Optional[Dict]:
+        """판정 결과 (API 오류 시 None → 로컬 판정 유지)"""
+        prompt = self.prompts._build_validation_prompt(query, response, "없음")
+        async with self.semaphore:
+            self.calls += 1
+            try:
+                completion = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.1,
+                    max_tokens=4000,
+                    reasoning_effort="high",
+                    stream=False
+                )
+            except Exception:
+                self.errors += 1
+                return None
+        return self.prompts._parse_validation_result(completion.choices[0].message.content or "", response)
+
+
+# ==================== 체크포인트 / 리포트 ====================
+
+def new_state(source: str) -> Dict:
+    return {
+        "source": source,
+        "processed": 0,
+        "valid": 0,
+        "invalid": 0,
+        "judged": 0,
+        "by_tier": {},
+        "by_issue": {},
+        "invalid_by_intent": {},
+        "failures": [],
+        "failures_truncated": 0,
+        # 실패 기록 파일(<checkpoint>.failures)에서 이 체크포인트까지 반영된 위치 (bytes)
+        "failures_offset": 0,
+        "elapsed_s": 0.0,
+    }
+
+
+def load_checkpoint(path: str, source: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get("source") != source:
+        print(f"체크포인트 대상이 다릅니다 ({state.get('source')}) - 처음부터 시작합니다.")
+        return None
+    if "failures_offset" not in state:
+        print("이전 형식의 체크포인트입니다 - 처음부터 시작합니다.")
+        return None
+    failures = failures_path(path)
+    if (os.path.getsize(failures) if os.path.exists(failures) else 0) < state["failures_offset"]:
+        print(f"실패 기록 파일이 체크포인트보다 짧습니다 ({failures}) - 처음부터 시작합니다.")
+        return None
+    return state
+
+
+def failures_path(checkpoint_path: str) -> str:
+    return checkpoint_path + '.failures'
+
+
+def open_failures(path: str, offset: int):
+    """
+    실패 기록 파일을 offset 위치로 잘라 이어 쓰기용으로 엽니다.
+    (마지막 체크포인트 이후에 추가된 줄은 다시 검사하므로 제거)
+    """
+    f = open(path, 'ab')
+    f.truncate(offset)
+    f.seek(0, os.SEEK_END)
+    return f
+
+
+def read_failures(path: str) -> Iterator[Dict]:
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def write_json(path: str, data: Dict):
+    """임시 파일에 쓴 뒤 교체 (중단되어도 이전 체크포인트 유지)"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _snippet(text: str) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= SNIPPET_CHARS else text[:SNIPPET_CHARS] + "…"
+
+
+def accumulate(state: Dict, rows: List[Dict], results: List[Dict], max_failures: int):
+    by_tier = Counter(state["by_tier"])
+    by_issue = Counter(state["by_issue"])
+    by_intent = Counter(state["invalid_by_intent"])
+    for row, result in zip(rows, results):
+        by_tier[result["tier"]] += 1
+        if result["valid"]:
+            state["valid"] += 1
+            continue
+        state["invalid"] += 1
+        by_intent[row.get("intent") or "unknown"] += 1
+        for issue in result["issues"]:
+            by_issue[issue.split(":")[0].strip()] += 1
+        if len(state["failures"]) < max_failures:
+            state["failures"].append({
+                "id": row["id"],
+                "user_id": row["user_id"],
+                "intent": row.get("intent"),
+                "query": _snippet(row.get("query")),
+                "response": _snippet(row.get("response")),
+                "tier": result["tier"],
+                "issues": result["issues"],
+            })
+        else:
+            state["failures_truncated"] += 1
+    state["processed"] += len(rows)
+    state["by_tier"] = dict(by_tier)
+    state["by_issue"] = dict(by_issue)
+    state["invalid_by_intent"] = dict(by_intent)
+
+
+# ==================== 답변 캐시 거부 ====================
+
+def _normalize_answer(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def failure_record(row: Dict) -> Dict:
+    """실패 기록 한 줄 - cache_key가 없는 이전 기록만 답변 텍스트를 남김 (거부 대상 찾기용)"""
+    if row.get("cache_key"):
+        return {"id": row["id"], "cache_key": row["cache_key"]}
+    return {"id": row["id"], "response": _normalize_answer(row.get("response"))}
+
+
+def reject_cache_entries(cache, failures: Iterator[Dict]) -> int:
+    """
+    실패한 기록이 가리키는 답변 캐시 항목을 거부 처리합니다.
+    기록의 cache_key로 항목을 찾고, cache_key가 없는 기록만 답변 텍스트가 같은 항목으로 찾습니다.
+    """
+    by_answer = None
+    rejected = 0
+    for failure in failures:
+        if failure.get("cache_key"):
+            keys = [failure["cache_key"]]
+        else:
+            if by_answer is None:
+                by_answer = {}
+                for key, item in cache.cache.items():
+                    if not item.get('rejected'):
+                        by_answer.setdefault(_normalize_answer(item.get('answer')), []).append(key)
+            keys = by_answer.pop(failure["response"], [])
+        for key in keys:
+            if cache.reject_key(key, reason=f"일괄 검증 실패 (interaction {failure['id']})"):
+                rejected += 1
+    return rejected
+
+
+def open_answer_cache(cache_path: Optional[str]):
+    """답변 캐시를 쓰기 잠금과 함께 엽니다. (서버가 열고 있으면 WriterLockHeld)"""
+    from services.knowledge import AnswerCache
+
+    return AnswerCache(cache_path) if cache_path else AnswerCache()
+
+
+# ==================== 실행 ====================
+
+def open_store(args):
+    backend = (args.backend or settings.HISTORY_STORE_BACKEND).lower()
+    if backend == "sqlite":
+        path = args.db or DEFAULT_DB_PATH
+        return SQLiteHistoryService(path), f"sqlite:{os.path.abspath(path)}"
+    path = args.csv or DEFAULT_CSV_PATH
+    return HistoryService(path), f"csv:{os.path.abspath(path)}"
+
+
+async def run(args) -> Dict:
+    # 캐시 쓰기 잠금을 먼저 확인 (서버가 실행 중이면 긴 검사를 돌리기 전에 거절)
+    cache = open_answer_cache(args.cache_file) if args.reject_cache else None
+    store, source = open_store(args)
+    state = load_checkpoint(args.checkpoint, source) if args.resume else None
+    if state:
+        print(f"체크포인트에서 이어서 실행: {state['processed']:,}건 처리됨")
+    else:
+        state = new_state(source)
+
+    judge = None
+    if args.judge:
+        judge = BatchJudge(
+            base_url=args.judge_base_url,
+            api_key=args.judge_api_key or os.getenv("UPSTAGE_API_KEY") or "local",
+            model=args.judge_model,
+            concurrency=args.judge_concurrency
+        )
+
+    loop = asyncio.get_running_loop()
+    executor = None
+    if args.workers > 0:
+        executor = ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(args.embedding_model,))
+    else:
+        _init_worker(args.embedding_model)
+
+    failures_file = open_failures(failures_path(args.checkpoint), state["failures_offset"])
+    started = time.perf_counter() - state["elapsed_s"]
+    rng = random.Random(args.seed)
+    try:
+        for rows in store.iter_interactions(args.chunk_size, skip=state["processed"]):
+            pairs = [(row.get("query") or "", row.get("response") or "", row.get("intent") in TOPIC_CHECK_INTENTS)
+                     for row in rows]
+
+            # 1차: 로컬 검증 (프로세스 수만큼 나눠 병렬 실행)
+            if executor is not None:
+                size = max(1, -(-len(pairs) // args.workers))
+                parts = [pairs[i:i + size] for i in range(0, len(pairs), size)]
+                local = [r for part in await asyncio.gather(
+                    *(loop.run_in_executor(executor, _validate_pairs, part) for part in parts)
+                ) for r in part]
+            else:
+                local = _validate_pairs(pairs)
+
+            results = []
+            judge_targets = []
+            for position, verdict in enumerate(local):
+                result = {"valid": verdict["verdict"] != FAIL, "issues": verdict["issues"], "tier": "local"}
+                results.append(result)
+                if judge and (verdict["verdict"] == UNCERTAIN or
+                              (verdict["verdict"] == PASS and rng.random() < args.judge_sample)):
+                    judge_targets.append(position)
+
+            # 2차: LLM Judge (동시 요청 수 제한)
+            if judge_targets:
+                judged = await asyncio.gather(*(judge.judge(*pairs[p][:2]) for p in judge_targets))
+                for position, verdict in zip(judge_targets, judged):
+                    if verdict is not None:
+                        results[position] = {"valid": verdict["valid"], "issues": verdict["issues"], "tier": "llm"}
+                        state["judged"] += 1
+
+            accumulate(state, rows, results, args.max_failures)
+            for row, result in zip(rows, results):
+                if not result["valid"]:
+                    failures_file.write(json.dumps(failure_record(row), ensure_ascii=False).encode('utf-8') + b"\n")
+            failures_file.flush()
+            os.fsync(failures_file.fileno())
+            state["failures_offset"] = failures_file.tell()
+            if args.record:
+                await asyncio.to_thread(
+                    lambda: [store.record_validation(row["id"], result) for row, result in zip(rows, results)]
+                )
+
+            state["elapsed_s"] = round(time.perf_counter() - started, 3)
+            write_json(args.checkpoint, state)
+            print(f"  {state['processed']:,}건 처리 (실패 {state['invalid']:,}, {state['elapsed_s']:.1f}s)")
+    finally:
+        failures_file.close()
+        if executor is not None:
+            executor.shutdown()
+
+    report = dict(state)
+    report.pop("failures_offset", None)
+    report["rows_per_s"] = round(state["processed"] / state["elapsed_s"], 1) if state["elapsed_s"] else None
+    if judge:
+        report["judge"] = {"calls": judge.calls, "errors": judge.errors, "base_url": args.judge_base_url}
+    if cache is not None:
+        try:
+            report["cache_rejected"] = await asyncio.to_thread(
+                reject_cache_entries, cache, read_failures(failures_path(args.checkpoint))
+            )
+        finally:
+            cache.close()
+    store.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대화 기록 응답을 일괄 검증하고 요약 리포트를 만듭니다.")
+    parser.add_argument("--backend", choices=["csv", "sqlite"], help="기본: settings.HISTORY_STORE_BACKEND")
+    parser.add_argument("--csv", help=f"기본: {DEFAULT_CSV_PATH}")
+    parser.add_argument("--db", help=f"기본: {DEFAULT_DB_PATH}")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="로컬 검증 프로세스 수 (0: 현재 프로세스)")
+    parser.add_argument("--embedding-model", help="주제 일관성 검사용 임베딩 모델 (없으면 규칙 검사만)")
+    parser.add_argument("--judge", action="store_true", help="uncertain 응답을 LLM Judge로 재검사")
+    parser.add_argument("--judge-sample", type=float, default=0.0, help="로컬 통과 응답 중 LLM Judge 표본 비율")
+    parser.add_argument("--judge-base-url", default=settings.UPSTAGE_BASE_URL)
+    parser.add_argument("--judge-api-key", help="기본: UPSTAGE_API_KEY 환경변수")
+    parser.add_argument("--judge-model", default="solar-pro3")
+    parser.add_argument("--judge-concurrency", type=int, default=8)
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH)
+    parser.add_argument("--resume", action="store_true", help="체크포인트 위치부터 이어서 실행")
+    parser.add_argument("--report", default=DEFAULT_REPORT_PATH)
+    parser.add_argument("--max-failures", type=int, default=1000, help="리포트에 남길 실패 건수")
+    parser.add_argument("--record", action="store_true", help="판정 결과를 기록 저장소(history_validation)에 저장")
+    parser.add_argument("--reject-cache", action="store_true", help="실패 답변과 같은 답변 캐시 항목을 거부 처리")
+    parser.add_argument("--cache-file", help="답변 캐시 파일 (기본: data/answer_cache.json)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(run(args))
+    except WriterLockHeld as e:
+        print(f"답변 캐시를 열 수 없습니다: {e}")
+        print("서버가 실행 중이면 종료한 뒤 다시 실행하세요. (--reject-cache 없이 검사만 하는 것은 가능)")
+        sys.exit(1)
+    write_json(args.report, report)
+    for path in (args.checkpoint, failures_path(args.checkpoint)):
+        if os.path.exists(path):
+            os.remove(path)
+
+    print(f"검사: {report['processed']:,}건 / 통과 {report['valid']:,} / 실패 {report['invalid']:,}")
+    print(f"판정 단계: {report['by_tier']}")
+    if report["by_issue"]:
+        print(f"실패 유형: {report['by_issue']}")
+    if "cache_rejected" in report:
+        print(f"거부한 캐시 항목: {report['cache_rejected']}")
+    print(f"소요 시간: {report['elapsed_s']:.2f}s ({report['rows_per_s']} rows/s)")
+    print(f"리포트: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
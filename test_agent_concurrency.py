@@ -0,0 +1,112 @@
+import sys
+import os
+import asyncio
+import time
+
+# backend 모듈은 backend 디렉토리 기준으로 import (services.*)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import settings
+from agent import CSAgent
+from services.classification import ClassificationService
+from services.resilience import Deadline
+
+SEARCH_SECONDS = 0.5
+
+
+class FakeClassifier:
+    async def classify_intent(self, query, deadline=None):
+        return {"intent": "TECH_SUPPORT", "confidence": 0.9}
+
+
+class FakeTransaction:
+    def has_active_context(self, session_id):
+        return False
+
+
+class SlowKnowledge:
+    """임베딩 검색/LLM 호출처럼 스레드를 막는 동기 검색"""
+
+    def _search_knowledge_internal(self, query, category, session_id, deadline=None):
+        time.sleep(SEARCH_SECONDS)
+        return {"answer": f"{query} 답변", "from_cache": False}
+
+
+def _make_agent():
+    agent = CSAgent(warmup=False)
+    agent.classifier = FakeClassifier()
+    agent.transaction = FakeTransaction()
+    agent.knowledge = SlowKnowledge()
+    return agent
+
+
+def test_slow_knowledge_searches_overlap():
+    """느린 지식 검색 두 건이 이벤트 루프를 막지 않고 동시에 진행"""
+    agent = _make_agent()
+    original_mode = settings.VALIDATION_MODE
+    # 검증은 사후(deferred)로 돌려 검색 단계만 측정
+    settings.VALIDATION_MODE = "async"
+    try:
+        async def run_two():
+            started = time.perf_counter()
+            results = await asyncio.gather(
+                agent.process_query("와이파이 연결이 끊겨요", session_id="user-a"),
+                agent.process_query("블루투스가 안 잡혀요", session_id="user-b"),
+            )
+            return results, time.perf_counter() - started
+
+        results, elapsed = asyncio.run(run_two())
+    finally:
+        settings.VALIDATION_MODE = original_mode
+
+    assert [r["validation"] for r in results] == ["deferred", "deferred"], results
+    # 직렬 실행이면 2 * SEARCH_SECONDS 이상 걸림
+    assert elapsed < SEARCH_SECONDS * 1.6, elapsed
+
+
+
+class SlowCaseIndex:
+    """스레드를 막는 동기 유사 사례 검색 (FAISS 대역)"""
+
+    def similarity_search(self, query, k=3):
+        time.sleep(SEARCH_SECONDS)
+        return []
+
+
+def test_slow_case_search_respects_deadline():
+    """분류의 유사 사례 검색은 이벤트 루프를 막지 않고 남은 마감 시간 안에 키워드 분류로 대체"""
+    classifier = ClassificationService.__new__(ClassificationService)
+    classifier.db = SlowCaseIndex()
+
+    async def classify_with_ticker():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        result = await classifier.classify_intent("배송 조회 해주세요", deadline=Deadline(0.1))
+        elapsed = time.perf_counter() - started
+        task.cancel()
+        return result, elapsed, ticks
+
+    result, elapsed, ticks = asyncio.run(classify_with_ticker())
+    assert result["degraded"] == "deadline_exceeded", result
+    assert result["intent"] == "ORDER"
+    assert elapsed < SEARCH_SECONDS / 2, elapsed
+    # 검색 중에도 이벤트 루프가 다른 작업을 처리
+    assert ticks >= 3, ticks
+
+    expired = asyncio.run(classifier.classify_intent("배송 조회 해주세요", deadline=Deadline(0)))
+    assert expired["degraded"] == "deadline_exceeded"
+
+
+if __name__ == "__main__":
+    test_slow_knowledge_searches_overlap()
+    test_slow_case_search_respects_deadline()
+    print("agent concurrency OK")
@@ -0,0 +1,137 @@
+import sys
+import os
+import asyncio
+import csv
+import tempfile
+
+# backend 모듈은 backend 디렉토리 기준으로 import (services.*)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import settings
+from agent import CSAgent
+from services.order_store import IndexedCSVOrderRepository
+from services.post_validation import PostValidationWorker
+from services.transaction import TransactionService
+from services.validation import ValidationAgent
+
+ORDER_FIELDS = ["order_id", "item", "status", "customer_name", "customer_id", "order_date"]
+
+
+class Vector(list):
+    def __matmul__(self, other):
+        return sum(a * b for a, b in zip(self, other))
+
+
+class OrthogonalEmbedding:
+    """질의와 응답을 항상 직교 벡터로 만드는 임베딩 (유사도 0 → 주제 검사를 하면 반드시 실패)"""
+
+    def encode(self, texts, normalize_embeddings=True, show_progress_bar=False):
+        return [Vector([1.0 if i == j else 0.0 for j in range(len(texts))]) for i in range(len(texts))]
+
+
+class FakeClassifier:
+    """주문번호가 있으면 ORDER_CANCEL, 짧은 확답("예")은 OFF_TOPIC (실제 분류기처럼 맥락 없이 판단)"""
+
+    async def classify_intent(self, query, deadline=None):
+        if "ORD-" in query:
+            return {"intent": "ORDER_CANCEL", "confidence": 0.9}
+        return {"intent": "OFF_TOPIC", "confidence": 0.3}
+
+
+def _make_agent(tmp_dir):
+    orders_path = os.path.join(tmp_dir, "orders.csv")
+    with open(orders_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=ORDER_FIELDS)
+        writer.writeheader()
+        writer.writerow({"order_id": "ORD-900", "item": "무선 키보드", "status": "배송중",
+                         "customer_name": "테스트", "customer_id": "user_900", "order_date": "2026-10-01T10:00:00"})
+
+    agent = CSAgent(warmup=False)
+    agent.classifier = FakeClassifier()
+    agent.transaction = TransactionService(order_store=IndexedCSVOrderRepository(orders_path))
+    agent.validator = ValidationAgent(embedding_model=OrthogonalEmbedding(), judge_enabled=False)
+    return agent
+
+
+def test_confirmed_cancel_is_not_blocked():
+    """'예'로 승인한 취소는 이미 반영되었으므로 결과 안내가 차단 문구로 바뀌지 않음"""
+    original_mode = settings.VALIDATION_MODE
+    settings.VALIDATION_MODE = "blocking"
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            agent = _make_agent(tmp_dir)
+
+            async def cancel():
+                first = await agent.process_query("ORD-900 취소해주세요", session_id="user_900")
+                second = await agent.process_query("예", session_id="user_900")
+                return first, second
+
+            first, second = asyncio.run(cancel())
+            agent.transaction.orders.refresh()
+            status = agent.transaction.orders["ORD-900"]["status"]
+            agent.transaction.orders.close()
+    finally:
+        settings.VALIDATION_MODE = original_mode
+
+    assert first.get("requires_approval"), first
+    assert not first.get("blocked"), first
+    assert status == "주문취소"
+    assert second["message"] == "주문 ORD-900가 성공적으로 취소되었습니다.", second
+    assert not second.get("blocked"), second
+
+
+def test_generated_answers_keep_topic_check():
+    """LLM이 만든 답변은 그대로 주제 일관성 검사 대상"""
+    validator = ValidationAgent(embedding_model=OrthogonalEmbedding(), judge_enabled=False)
+    result = validator.validate_response("와이파이가 끊겨요", "오늘 점심 메뉴는 김치찌개입니다.")
+    assert not result["valid"]
+    assert any(issue.startswith("일관성") for issue in result["issues"]), result
+    # 같은 쌍이라도 주제 검사를 생략한 판정은 따로 저장
+    assert validator.validate_response("와이파이가 끊겨요", "오늘 점심 메뉴는 김치찌개입니다.", check_topic=False)["valid"]
+
+
+class RecordingKnowledge:
+    def __init__(self):
+        self.rejected = []
+
+    def reject_cached_answer(self, cache_key, reason=None):
+        self.rejected.append(cache_key)
+        return True
+
+
+class RecordingStore:
+    def __init__(self):
+        self.records = []
+
+    def record_validation(self, interaction_id, result):
+        self.records.append(interaction_id)
+
+
+def test_failed_post_validation_rejects_cache_without_history_record():
+    """대화 기록이 저장되지 않아 interaction_id가 없어도 실패한 캐시 답변은 거부"""
+    agent = CSAgent(warmup=False)
+    agent.validator = ValidationAgent(embedding_model=OrthogonalEmbedding(), judge_enabled=False)
+    agent.knowledge = RecordingKnowledge()
+    store = RecordingStore()
+    response = {"intent": "TECH_SUPPORT", "message": "오늘 점심 메뉴는 김치찌개입니다.", "cache_key": "key-1",
+                "data": {"from_cache": True}}
+
+    async def run():
+        worker = PostValidationWorker(agent, store, workers=1, sample_rate=1.0)
+        worker.start()
+        assert worker.submit(None, "와이파이가 끊겨요", response)
+        await worker.stop()
+        return worker.stats()
+
+    stats = asyncio.run(run())
+    assert agent.knowledge.rejected == ["key-1"]
+    assert store.records == []
+    assert stats["cache_rejected"] == 1 and stats["unrecorded"] == 1, stats
+
+
+if __name__ == "__main__":
+    test_confirmed_cancel_is_not_blocked()
+    test_generated_answers_keep_topic_check()
+    test_failed_post_validation_rejects_cache_without_history_record()
+    print("agent validation OK")
@@ -0,0 +1,425 @@
+import sys
+import os
+import asyncio
+import json
+import tempfile
+
+# backend 모듈은 backend 디렉토리 기준으로 import (services.*)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from services import knowledge
+from services.history import HistoryService
+from services.history_writer import HistoryWriter
+from services.journal import WriterLockHeld
+from services.knowledge import AnswerCache
+
+ANSWER = "비밀번호 재설정은 로그인 화면의 '비밀번호 찾기'에서 할 수 있습니다."
+
+
+def _open_cache(tmp_dir, **kwargs):
+    """임시 스냅샷 파일을 먼저 만들어 둠 (없는 경로를 주면 AnswerCache가 기본 data/answer_cache.json을 찾음)"""
+    cache_file = os.path.join(tmp_dir, "answer_cache.json")
+    if not os.path.exists(cache_file):
+        with open(cache_file, "w", encoding="utf-8") as f:
+            f.write("{}")
+    return AnswerCache(cache_file, **kwargs)
+
+
+def test_positive_votes_promote_once():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = _open_cache(tmp_dir)
+        try:
+            key = cache.add("비밀번호를 잊어버렸어요", ANSWER, category="account")
+            assert cache.apply_feedback(key, ANSWER, current="good", min_positive=3) is None
+            # 같은 대화의 같은 피드백 재전송은 투표가 아님
+            assert cache.apply_feedback(key, ANSWER, previous="good", current="good", min_positive=3) is None
+            assert cache.apply_feedback(key, ANSWER, current="good", min_positive=3) is None
+            # 줄바꿈/공백 차이는 같은 답변으로 봄
+            assert cache.apply_feedback(key, ANSWER.replace(" ", "\n", 1), current="good", min_positive=3) == "verified"
+            assert cache.cache[key]["verified"] is True
+            assert cache.cache[key]["feedback_score"] == 3
+            assert cache.get("비밀번호를 잊어버렸어요", category="account") is not None
+            # 이미 검증된 항목은 다시 승격하지 않음
+            assert cache.apply_feedback(key, ANSWER, current="good", min_positive=3) is None
+            assert cache.cache[key]["positive_votes"] == 4
+        finally:
+            cache.close()
+
+
+def test_negative_vote_rejects_and_changed_vote_is_withdrawn():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = _open_cache(tmp_dir)
+        try:
+            key = cache.add("비밀번호를 잊어버렸어요", ANSWER, category="account", verified=True)
+            assert cache.apply_feedback(key, ANSWER, current="good", min_negative=2) is None
+            # good → bad 로 바꾸면 이전 표를 취소
+            assert cache.apply_feedback(key, ANSWER, previous="good", current="bad", min_negative=2) is None
+            assert (cache.cache[key]["positive_votes"], cache.cache[key]["negative_votes"]) == (0, 1)
+            assert cache.apply_feedback(key, ANSWER, current="bad", min_negative=2) == "rejected"
+            assert cache.cache[key]["rejected"] is True
+            assert cache.cache[key]["verified"] is False
+            assert cache.get("비밀번호를 잊어버렸어요", category="account") is None
+            # 거부된 항목은 표만 세고 상태는 그대로
+            assert cache.apply_feedback(key, ANSWER, current="good", min_positive=1) is None
+            assert cache.cache[key]["rejected"] is True
+        finally:
+            cache.close()
+
+
+def test_feedback_ignored_for_replaced_or_missing_answer():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = _open_cache(tmp_dir)
+        try:
+            key = cache.add("비밀번호를 잊어버렸어요", ANSWER, category="account")
+            # 기록된 응답 이후 캐시 답변이 교체된 경우
+            assert cache.apply_feedback(key, "예전 답변", current="bad") is None
+            assert not cache.cache[key].get("rejected")
+            assert "negative_votes" not in cache.cache[key]
+            assert cache.apply_feedback("missing-key", ANSWER, current="bad") is None
+        finally:
+            cache.close()
+
+
+def test_concurrent_votes_for_one_interaction_count_once():
+    """같은 대화의 피드백이 동시에 들어와도 '이전 피드백'을 하나씩 보고 투표 (중복 승격 없음)"""
+    async def scenario(writer, cache, key, interaction_id):
+        changes = []
+
+        def vote(interaction):
+            changes.append(cache.apply_feedback(key, interaction["response"],
+                                                previous=interaction["feedback"], current="good", min_positive=2))
+
+        results = await asyncio.gather(*[
+            writer.record_feedback(interaction_id, "good", on_recorded=vote) for _ in range(5)
+        ])
+        assert results == [True] * 5
+        assert await writer.record_feedback("missing-id", "good", on_recorded=vote) is False
+        assert not writer._feedback_locks
+        return changes
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = _open_cache(tmp_dir)
+        try:
+            key = cache.add("비밀번호를 잊어버렸어요", ANSWER, category="account")
+            store = HistoryService(os.path.join(tmp_dir, "history.csv"))
+            writer = HistoryWriter(store)
+            interaction_id = writer.submit("user_001", "비밀번호를 잊어버렸어요", "POLICY_QA",
+                                           {"message": ANSWER, "cache_key": key, "cache_category": "account"})
+
+            changes = asyncio.run(scenario(writer, cache, key, interaction_id))
+            assert changes == [None] * 5
+            assert cache.cache[key]["positive_votes"] == 1
+            assert not cache.cache[key]["verified"]
+            assert store.get_interaction(interaction_id)["feedback"] == "good"
+        finally:
+            cache.close()
+
+
+class _ScriptedLLM:
+    """물을 때마다 다른 답변을 만드는 LLM 대역"""
+    def __init__(self):
+        self.calls = 0
+
+    def generate_with_retry(self, prompt, deadline=None, **kwargs):
+        self.calls += 1
+        return f"{ANSWER} ({self.calls})"
+
+
+class _OfflineKnowledge(knowledge.CachedRAGKnowledgeService):
+    """임베딩 모델 없이 캐시 + LLM 경로만 쓰는 RAG (FAQ 검색 결과 없음)"""
+    def __init__(self, cache):
+        self.enable_cache = True
+        self.enable_conversation = False
+        self.cache = cache
+        self.conversation = None
+        self.hit_trend = knowledge.CacheHitTrend()
+        self.feedback_counters = {"votes": 0, "promoted": 0, "rejected": 0}
+        self.llm_agent = _ScriptedLLM()
+
+    def _search_faq(self, query, category=None, top_k=3, strict_category=False):
+        return []
+
+
+def test_feedback_endpoint_promotes_and_keeps_rejection_across_asks():
+    """검증 전 질문은 물을 때마다 답변이 교체되어도 /feedback 투표와 거부 상태가 이어짐"""
+    import router
+
+    def ask_and_vote(service, query, feedback):
+        result = service._search_knowledge_internal(query, category="account")
+        interaction_id = router.history_writer.submit("user_001", query, "POLICY_QA", {
+            "message": result["answer"], "cache_key": result["cache_key"], "cache_category": result["cache_category"]})
+        asyncio.run(router.save_feedback(router.FeedbackRequest(interaction_id=interaction_id, feedback=feedback)))
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = _open_cache(tmp_dir)
+        service = _OfflineKnowledge(cache)
+        original = (router.agent.ready, getattr(router.agent, "knowledge", None), router.history_writer.store)
+        router.agent.ready, router.agent.knowledge = True, service
+        router.history_writer.store = HistoryService(os.path.join(tmp_dir, "history.csv"))
+        try:
+            # good 3건(settings.CACHE_PROMOTE_MIN_POSITIVE)이면 마지막 답변이 승격되어 캐시에서 반환
+            for n in range(1, 4):
+                result = ask_and_vote(service, "비밀번호를 잊어버렸어요", "good")
+                assert not result["from_cache"]
+                assert cache.cache[result["cache_key"]]["positive_votes"] == n
+            assert cache.cache[result["cache_key"]]["verified"] is True
+            cached = service._search_knowledge_internal("비밀번호를 잊어버렸어요", category="account")
+            assert cached["from_cache"] and cached["answer"] == f"{ANSWER} (3)"
+            assert service.llm_agent.calls == 3
+            assert service.feedback_counters == {"votes": 3, "promoted": 1, "rejected": 0}
+
+            # bad로 거부된 질문은 다시 물어 새 답변이 저장되어도 거부 상태 유지 (이후 good으로 승격 안 됨)
+            result = ask_and_vote(service, "배송지를 바꾸고 싶어요", "bad")
+            key = result["cache_key"]
+            assert cache.cache[key]["rejected"] is True
+            for _ in range(3):
+                result = ask_and_vote(service, "배송지를 바꾸고 싶어요", "good")
+                assert not result["from_cache"]
+            assert cache.cache[key]["rejected"] is True
+            assert not cache.cache[key]["verified"]
+            assert cache.cache[key]["negative_votes"] == 1
+            assert cache.get("배송지를 바꾸고 싶어요", category="account") is None
+            assert service.feedback_counters["rejected"] == 1
+        finally:
+            router.agent.ready, router.agent.knowledge, router.history_writer.store = original
+            cache.close()
+
+
+def test_feedback_refused_until_agent_ready():
+    """워밍업 전 /feedback은 503 (기록만 바뀌고 캐시 투표가 빠지지 않도록)"""
+    import router
+    from fastapi import HTTPException
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        original = (router.agent.ready, router.history_writer.store)
+        router.agent.ready = False
+        router.history_writer.store = HistoryService(os.path.join(tmp_dir, "history.csv"))
+        try:
+            interaction_id = router.history_writer.submit("user_001", "비밀번호를 잊어버렸어요", "POLICY_QA",
+                                                          {"message": ANSWER, "cache_key": "key"})
+            try:
+                asyncio.run(router.save_feedback(router.FeedbackRequest(interaction_id=interaction_id, feedback="good")))
+                assert False, "워밍업 전 피드백이 기록됨"
+            except HTTPException as e:
+                assert e.status_code == 503
+            assert router.history_writer.store.get_interaction(interaction_id)["feedback"] == ""
+        finally:
+            router.agent.ready, router.history_writer.store = original
+
+
+def test_admin_cache_routes_require_token():
+    """통계 조회를 포함한 /admin/cache 경로는 모두 X-Admin-Token 검사"""
+    import router
+
+    admin_routes = [route for route in router.router.routes if route.path.startswith("/admin/cache")]
+    assert {route.path for route in admin_routes} >= {"/admin/cache/stats", "/admin/cache/entries/{cache_key}"}
+    for route in admin_routes:
+        assert router._require_admin in [d.dependency for d in route.dependencies], route.path
+
+
+def _recount(cache):
+    """get_stats 카운터와 비교할 전체 순회 결과"""
+    items = list(cache.cache.values())
+    return {
+        "total_cached": len(items),
+        "verified": sum(bool(item.get("verified")) for item in items),
+        "rejected": sum(bool(item.get("rejected")) for item in items),
+        "total_cache_hits": sum(item.get("hit_count", 0) for item in items),
+        "bytes": sum(len(json.dumps(item, ensure_ascii=False).encode("utf-8")) for item in items),
+    }
+
+
+def _counters(cache):
+    stats = cache.get_stats()
+    return {field: stats[field] for field in ("total_cached", "verified", "rejected", "total_cache_hits", "bytes")}
+
+
+def _fill(cache):
+    keys = [
+        cache.add("비밀번호를 잊어버렸어요", ANSWER, category="account", verified=True),
+        cache.add("와이파이가 자꾸 끊겨요", "공유기를 재부팅해 보세요.", category="tech_support",
+                  metadata={"faq_ids": ["FAQ-7"]}),
+        cache.add("환불은 언제 되나요", "영업일 기준 3~5일 걸립니다.", category="billing", verified=True,
+                  metadata={"faq_ids": ["FAQ-2", "FAQ-7"]}),
+        cache.add("배송 조회", "주문 내역에서 확인할 수 있습니다.", category="transaction"),
+    ]
+    cache.verify("와이파이가 자꾸 끊겨요", category="tech_support")
+    cache.reject("배송 조회", category="transaction", reason="오래된 안내")
+    for _ in range(3):
+        assert cache.get("비밀번호를 잊어버렸어요", category="account") is not None
+        cache.increment_hit_count("비밀번호를 잊어버렸어요", category="account")
+    assert cache.get("배송 조회", category="transaction") is None
+    cache.record_verdict_key(keys[2], {"valid": True, "tier": "local"})
+    # 같은 키 덮어쓰기
+    cache.add("환불은 언제 되나요?", "영업일 기준 3~5일 걸립니다. (카드사에 따라 다름)", category="billing", verified=True,
+              metadata={"faq_ids": ["FAQ-2", "FAQ-7"]})
+    return keys
+
+
+def test_stats_counters_match_full_scan():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = _open_cache(tmp_dir)
+        try:
+            _fill(cache)
+            assert _counters(cache) == _recount(cache)
+            stats = cache.get_stats()
+            assert (stats["total_cached"], stats["verified"], stats["rejected"], stats["pending"]) == (4, 3, 1, 0)
+            assert (stats["hits"], stats["misses"], stats["total_cache_hits"]) == (3, 1, 3)
+            assert stats["lookup_hit_rate"] == 0.75
+            # 조회 표시는 저장된 항목에 남지 않음
+            assert all("cache_hit" not in item for item in cache.cache.values())
+
+            cache.invalidate(category="billing")
+            assert _counters(cache) == _recount(cache)
+            assert cache.get_stats()["invalidations"] == 1
+        finally:
+            cache.close()
+
+
+def test_invalidate_by_key_category_and_faq():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = _open_cache(tmp_dir)
+        try:
+            keys = _fill(cache)
+            assert cache.invalidate() == []
+            assert cache.invalidate(keys=["missing"], category="missing", faq_id="FAQ-404") == []
+            appended = cache.get_stats()["journal"]["appended"]
+
+            # 조건끼리는 OR, 중복 키는 한 번만
+            removed = cache.invalidate(keys=[keys[3], keys[3], "missing"], faq_id="FAQ-7")
+            assert removed == [keys[3], keys[1], keys[2]]
+            assert list(cache.cache) == [keys[0]]
+            # 삭제 레코드는 한 줄
+            assert cache.get_stats()["journal"]["appended"] == appended + 1
+            assert cache.get_stats()["invalidations"] == 3
+
+            assert cache.invalidate(category="account") == [keys[0]]
+            assert cache.get_stats()["total_cached"] == 0
+        finally:
+            cache.close()
+
+        cache = _open_cache(tmp_dir)
+        try:
+            assert cache.cache == {}
+        finally:
+            cache.close()
+
+
+def test_journal_replay_after_crash():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = _open_cache(tmp_dir)
+        keys = _fill(cache)
+        cache.invalidate(keys=[keys[3]])
+        expected = json.loads(json.dumps(cache.cache))
+        expected_counters = _counters(cache)
+        # close() 없이 프로세스가 죽고, 마지막 레코드는 쓰다 만 상태
+        cache._journal.sync()
+        cache._journal._file.close()
+        cache._writer_lock.release()
+        with open(os.path.join(tmp_dir, "answer_cache.json.journal"), "ab") as f:
+            f.write(b'{"op": "del", "keys": ["')
+
+        cache = _open_cache(tmp_dir)
+        try:
+            assert cache.cache == expected
+            assert _counters(cache) == expected_counters
+            # 스냅샷은 그대로이고 변경은 모두 저널에서 복원됨
+            with open(os.path.join(tmp_dir, "answer_cache.json"), encoding="utf-8") as f:
+                assert json.load(f) == {}
+            assert cache.get("비밀번호를 잊어버렸어요", category="account")["hit_count"] == 3
+        finally:
+            cache.close()
+
+
+def test_compaction_keeps_changes_made_while_compacting():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = _open_cache(tmp_dir, compact_every=1000)
+        original_fsync_directory = knowledge.fsync_directory
+
+        def write_during_compaction(path):
+            # 스냅샷 교체 후, 반영된 저널 구간을 잘라내기 전에 들어온 변경
+            original_fsync_directory(path)
+            cache.add("압축 중 추가", "답변", category="etc")
+            cache.increment_hit_count("비밀번호를 잊어버렸어요", category="account")
+
+        try:
+            _fill(cache)
+            knowledge.fsync_directory = write_during_compaction
+            try:
+                cache.compact()
+            finally:
+                knowledge.fsync_directory = original_fsync_directory
+            assert cache.compactions == 1
+            assert cache.get_stats()["journal"]["entries"] == 2
+            expected = json.loads(json.dumps(cache.cache))
+        finally:
+            cache.close()
+
+        with open(os.path.join(tmp_dir, "answer_cache.json"), encoding="utf-8") as f:
+            snapshot = json.load(f)
+        assert len(snapshot) == 4
+
+        cache = _open_cache(tmp_dir)
+        try:
+            assert cache.cache == expected
+            assert cache.get("압축 중 추가", category="etc") is None # 검증 전 항목
+            assert cache.get("비밀번호를 잊어버렸어요", category="account")["hit_count"] == 4
+            assert _counters(cache) == _recount(cache)
+        finally:
+            cache.close()
+
+
+def test_second_writer_is_refused():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = _open_cache(tmp_dir)
+        try:
+            try:
+                _open_cache(tmp_dir)
+                assert False, "두 번째 쓰기 프로세스가 열림"
+            except WriterLockHeld:
+                pass
+        finally:
+            cache.close()
+        _open_cache(tmp_dir).close()
+
+
+def test_entries_are_rehashed_with_current_key_rules():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_file = os.path.join(tmp_dir, "answer_cache.json")
+        # 이전 정규화 규칙으로 저장된 키 (같은 질문의 두 항목 중 검증된 항목만 남음)
+        legacy = {
+            "old-key-1": {"query": "로그인이 안돼요!!", "answer": "예전 답변", "category": "tech_support",
+                          "verified": False, "hit_count": 9},
+            "old-key-2": {"query": "로그인이 안돼요", "answer": ANSWER, "category": "tech_support",
+                          "verified": True, "hit_count": 1},
+        }
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(legacy, f, ensure_ascii=False)
+
+        cache = AnswerCache(cache_file)
+        try:
+            assert len(cache.cache) == 1
+            assert cache.get("로그인이 안돼요", category="tech_support")["answer"] == ANSWER
+            assert cache.compactions == 1
+            assert _counters(cache) == _recount(cache)
+        finally:
+            cache.close()
+
+
+if __name__ == "__main__":
+    test_positive_votes_promote_once()
+    test_negative_vote_rejects_and_changed_vote_is_withdrawn()
+    test_feedback_ignored_for_replaced_or_missing_answer()
+    test_concurrent_votes_for_one_interaction_count_once()
+    test_feedback_endpoint_promotes_and_keeps_rejection_across_asks()
+    test_feedback_refused_until_agent_ready()
+    test_admin_cache_routes_require_token()
+    test_stats_counters_match_full_scan()
+    test_invalidate_by_key_category_and_faq()
+    test_journal_replay_after_crash()
+    test_compaction_keeps_changes_made_while_compacting()
+    test_second_writer_is_refused()
+    test_entries_are_rehashed_with_current_key_rules()
+    print("answer cache OK")
@@ -1,19 +1,32 @@
-
 import sys
 import os
-sys.path.append(os.getcwd())
+
+# backend 모듈은 backend 디렉토리 기준으로 import (services.*, settings)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+# OpenAI 키가 없으면(.env 포함) 로컬 가짜 LLM 서버로 실행 (settings가 환경 변수를 읽기 전에 설정)
+from dotenv import load_dotenv
+load_dotenv()
+fake_llm = None
+if not os.getenv("OPENAI_API_KEY"):
+    from tools.fake_llm_server import start_fake_llm_server
+    fake_llm = start_fake_llm_server()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{fake_llm.server_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "local"
+    print(f"OPENAI_API_KEY 미설정 → 가짜 LLM 서버 사용: {os.environ['OPENAI_BASE_URL']}")
 
 try:
     print("Testing imports...")
-    from backend.services.classification import ClassificationService
+    from services.classification import ClassificationService
     print("ClassificationService OK")
-    from backend.services.knowledge import KnowledgeService
+    from services.knowledge import KnowledgeService
     print("KnowledgeService OK")
-    from backend.services.transaction import TransactionService
+    from services.transaction import TransactionService
     print("TransactionService OK")
-    from backend.services.validation import ValidationService
-    print("ValidationService OK")
-    from backend.agent import CSAgent
+    from services.validation import ValidationAgent
+    print("ValidationAgent OK")
+    from agent import CSAgent
     print("CSAgent OK")
     
     agent = CSAgent()
@@ -38,3 +51,6 @@ except Exception as e:
     import traceback
     traceback.print_exc()
     sys.exit(1)
+finally:
+    if fake_llm:
+        fake_llm.shutdown()
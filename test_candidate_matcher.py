@@ -0,0 +1,92 @@
+import sys
+import os
+import csv
+import tempfile
+from datetime import datetime, timedelta
+
+# backend 모듈은 backend 디렉토리 기준으로 import (services.*)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from services.candidate_matcher import CandidateIndex, parse_ordinal
+from services.order_store import ORDER_FIELDS, IndexedCSVOrderRepository
+from services.transaction import TransactionService
+
+CANDIDATES = [
+    {"order_id": "ORD-001", "item": "게이밍 노트북"},
+    {"order_id": "ORD-002", "item": "사운드바"},
+    {"order_id": "ORD-003", "item": "무선 키보드"},
+    {"order_id": "ORD-004", "item": "무선 마우스"},
+]
+
+
+def test_item_name_matching():
+    index = CandidateIndex(CANDIDATES, threshold=0.6)
+    # 오타, 다른 말이 섞인 응답, 띄어쓰기 차이, 상품명 일부
+    assert index.match("싸운드바") == "ORD-002"
+    assert index.match("노트북 보여줘") == "ORD-001"
+    assert index.match("무선키보드") == "ORD-003"
+    assert index.match("키보드요") == "ORD-003"
+    assert index.match("냉장고") is None
+    assert index.match("") is None
+
+
+def test_rank_prefers_earlier_candidate_on_tie():
+    index = CandidateIndex(CANDIDATES, threshold=0.6)
+    assert index.rank("무선") == [("ORD-003", 1.0), ("ORD-004", 1.0)]
+    assert index.match("무선") == "ORD-003"
+    assert index.rank("무선 마우스")[0] == ("ORD-004", 1.0)
+
+
+def test_ordinal_answers():
+    index = CandidateIndex(CANDIDATES, threshold=0.6)
+    assert index.match("첫번째") == "ORD-001"
+    assert index.match("두 번째요") == "ORD-002"
+    assert index.match("2번") == "ORD-002"
+    assert index.match("3번째 거요") == "ORD-003"
+    assert index.match("마지막") == "ORD-004"
+    assert index.match("5번") is None
+
+
+def test_parse_ordinal_bounds():
+    assert parse_ordinal("세번째", 3) == 2
+    assert parse_ordinal("10번", 3) is None
+    assert parse_ordinal("0번", 3) is None
+    assert parse_ordinal("맨 끝", 0) is None
+    # 연도 등 긴 숫자의 끝자리를 순서로 읽지 않음
+    assert parse_ordinal("2026번", 3) is None
+
+
+def test_selection_from_session_candidates():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orders_path = os.path.join(tmp_dir, "orders.csv")
+        now = datetime.now()
+        with open(orders_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=ORDER_FIELDS)
+            writer.writeheader()
+            for n, candidate in enumerate(CANDIDATES[:3]):
+                writer.writerow(dict(candidate, status="배송중", customer_name="테스트", customer_id="user_001",
+                                     order_date=(now - timedelta(days=n + 1)).isoformat(timespec="seconds")))
+
+        service = TransactionService(order_store=IndexedCSVOrderRepository(orders_path))
+        try:
+            result = service.process_transaction("status_check", entity="배송 조회", user_id="user_001")
+            assert result["status"] == "multiple_choice"
+            assert service.has_active_context("user_001")
+
+            result = service.process_transaction("status_check", entity="싸운드바 보여줘", user_id="user_001")
+            assert result["status"] == "completed"
+            assert result["data"]["order_id"] == "ORD-002"
+            # 선택이 끝나면 선택지 제거
+            assert not service.has_active_context("user_001")
+        finally:
+            service.close()
+
+
+if __name__ == "__main__":
+    test_item_name_matching()
+    test_rank_prefers_earlier_candidate_on_tie()
+    test_ordinal_answers()
+    test_parse_ordinal_bounds()
+    test_selection_from_session_candidates()
+    print("candidate matcher OK")
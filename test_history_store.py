@@ -0,0 +1,333 @@
+import sys
+import os
+import csv
+import asyncio
+import json
+import sqlite3
+import subprocess
+import tempfile
+
+# backend 모듈은 backend 디렉토리 기준으로 import (services.*)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from services.history import (HISTORY_FIELDS, HistoryService, SQLiteHistoryService, make_history_cursor,
+                              parse_history_cursor)
+from services.history_writer import HistoryWriter
+
+# 이전 형식의 history.csv (cache_key / cache_category 컬럼 없음, 여러 줄 응답 포함)
+LEGACY_FIELDS = ["id", "user_id", "timestamp", "query", "intent", "response", "feedback"]
+LEGACY_ROWS = [
+    {"id": "1769594583939", "user_id": "user_002", "timestamp": "2026-01-28 19:03", "query": "배송조회",
+     "intent": "transaction", "response": "주문이 2건 있습니다.\n- 와인셀러 (배송중)\n- 원두 1kg (배송중)", "feedback": ""},
+    {"id": "1769594600000", "user_id": "user_001", "timestamp": "2026-01-28 19:05", "query": "환불 규정",
+     "intent": "POLICY_QA", "response": "환불은 7일 이내 가능합니다.", "feedback": "like"},
+    {"id": "1769594700000", "user_id": "user_002", "timestamp": "2026-01-28 19:10", "query": "고마워요",
+     "intent": "OFF_TOPIC", "response": "천만에요, \"좋은 하루\" 되세요!", "feedback": ""},
+]
+
+
+def _write_legacy_csv(path, rows=LEGACY_ROWS):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=LEGACY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _all_rows(store, user_ids=("user_001", "user_002")):
+    return {user_id: store.get_user_history(user_id) for user_id in user_ids}
+
+
+def test_csv_to_sqlite_migration_is_idempotent():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "history.csv")
+        _write_legacy_csv(csv_path)
+        csv_store = HistoryService(csv_path)
+        csv_store.log_interaction("user_001", "배송 언제 와요?", "POLICY_QA",
+                                  {"message": "보통 2~3일 걸립니다.", "cache_key": "배송언제와요", "cache_category": "배송"})
+
+        db_store = SQLiteHistoryService(os.path.join(tmp_dir, "history.db"))
+        try:
+            assert db_store.import_csv(csv_path) == 4
+            assert len(db_store) == 4
+            # 이미 있는 id는 건너뜀
+            assert db_store.import_csv(csv_path) == 0
+            assert len(db_store) == 4
+
+            assert _all_rows(db_store) == _all_rows(csv_store)
+            migrated = db_store.get_interaction("1769594583939")
+            assert migrated["response"] == LEGACY_ROWS[0]["response"]
+            assert migrated["cache_key"] == ""
+            assert db_store.get_interaction("1769594600000")["feedback"] == "like"
+            assert db_store.import_csv(os.path.join(tmp_dir, "missing.csv")) == 0
+        finally:
+            db_store.close()
+
+
+def test_seed_only_into_empty_database():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "history.csv")
+        db_path = os.path.join(tmp_dir, "history.db")
+        _write_legacy_csv(csv_path)
+
+        store = SQLiteHistoryService(db_path, seed_csv_path=csv_path)
+        assert len(store) == 3
+        store.update_feedback("1769594583939", "dislike")
+        store.close()
+
+        # 기록이 있는 DB는 다시 가져오지 않음 (피드백 유지)
+        _write_legacy_csv(csv_path, LEGACY_ROWS + [dict(LEGACY_ROWS[0], id="1769594800000")])
+        store = SQLiteHistoryService(db_path, seed_csv_path=csv_path)
+        try:
+            assert len(store) == 3
+            assert store.get_interaction("1769594583939")["feedback"] == "dislike"
+        finally:
+            store.close()
+
+
+def test_old_schema_database_gains_columns():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "history.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE history (id TEXT PRIMARY KEY, user_id TEXT NOT NULL, timestamp TEXT NOT NULL,"
+            " query TEXT, intent TEXT, response TEXT, feedback TEXT NOT NULL DEFAULT '')"
+        )
+        conn.execute("CREATE INDEX idx_history_user_ts ON history(user_id, timestamp)")
+        conn.execute("INSERT INTO history VALUES ('1', 'user_001', '2026-01-28 19:03', 'q', 'i', 'r', '')")
+        conn.commit()
+        conn.close()
+
+        store = SQLiteHistoryService(db_path)
+        try:
+            assert set(store.get_interaction("1")) == set(HISTORY_FIELDS)
+            indexes = {row[1] for row in store._conn.execute("PRAGMA index_list(history)")}
+            assert "idx_history_user_ts_id" in indexes
+            assert "idx_history_user_ts" not in indexes
+        finally:
+            store.close()
+
+
+def test_migrate_history_tool():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "history.csv")
+        db_path = os.path.join(tmp_dir, "history.db")
+        _write_legacy_csv(csv_path)
+        command = [sys.executable, os.path.join(BACKEND_DIR, "tools", "migrate_history.py"), "--csv", csv_path, "--db", db_path]
+
+        first = subprocess.run(command, capture_output=True, text=True, encoding="utf-8")
+        assert first.returncode == 0, first.stderr
+        assert "추가: 3 / 건너뜀(이미 존재하거나 중복 id): 0" in first.stdout
+
+        second = subprocess.run(command, capture_output=True, text=True, encoding="utf-8")
+        assert second.returncode == 0, second.stderr
+        assert "추가: 0 / 건너뜀(이미 존재하거나 중복 id): 3" in second.stdout
+
+        missing = subprocess.run(command[:3] + [os.path.join(tmp_dir, "missing.csv")] + command[4:],
+                                 capture_output=True, text=True, encoding="utf-8")
+        assert missing.returncode == 1
+
+
+SAME_MINUTE = "2026-02-01 10:00"
+
+
+def _paging_rows():
+    """페이지 경계에 같은 timestamp가 걸치도록: user_001은 같은 분에 7건 + 이전 2건 + 이후 1건"""
+    rows = []
+    for n in range(7):
+        rows.append({"id": f"1770000000000-{n:09d}-a", "user_id": "user_001", "timestamp": SAME_MINUTE,
+                     "query": f"같은 시각 {n}", "intent": "POLICY_QA", "response": f"답변 {n}\n둘째 줄"})
+        rows.append({"id": f"1770000000000-{n:09d}-b", "user_id": "user_002", "timestamp": SAME_MINUTE,
+                     "query": "다른 유저", "intent": "POLICY_QA", "response": "답변"})
+    rows.append({"id": "1769990000000-000000001-a", "user_id": "user_001", "timestamp": "2026-02-01 09:58",
+                 "query": "이전 1", "intent": "OFF_TOPIC", "response": "답변"})
+    rows.append({"id": "1769990000000-000000002-a", "user_id": "user_001", "timestamp": "2026-02-01 09:59",
+                 "query": "이전 2", "intent": "OFF_TOPIC", "response": "답변"})
+    rows.append({"id": "1770000100000-000000001-a", "user_id": "user_001", "timestamp": "2026-02-01 10:01",
+                 "query": "이후", "intent": "OFF_TOPIC", "response": "답변"})
+    return rows
+
+
+def _page_through(store, user_id, limit):
+    pages, before = [], None
+    while True:
+        page = store.get_user_history_page(user_id, limit, before)
+        pages.append([row["id"] for row in page])
+        if len(page) < limit:
+            return pages
+        before = parse_history_cursor(make_history_cursor(page[-1]))
+
+
+def _stores(tmp_dir):
+    csv_store = HistoryService(os.path.join(tmp_dir, "history.csv"))
+    db_store = SQLiteHistoryService(os.path.join(tmp_dir, "history.db"))
+    rows = _paging_rows()
+    csv_store.append_interactions(rows)
+    db_store.append_interactions(rows)
+    return csv_store, db_store
+
+
+def test_page_boundaries_with_equal_timestamps():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_store, db_store = _stores(tmp_dir)
+        try:
+            expected = sorted((row for row in _paging_rows() if row["user_id"] == "user_001"),
+                              key=lambda row: (row["timestamp"], row["id"]), reverse=True)
+            expected_ids = [row["id"] for row in expected]
+
+            for store in (csv_store, db_store):
+                assert [row["id"] for row in store.get_user_history("user_001")] == expected_ids
+                # 같은 분의 기록 7건이 페이지 경계에 걸쳐도 빠지거나 겹치지 않음 (10건 = 3+3+3+1, 마지막 빈 페이지 없음)
+                pages = _page_through(store, "user_001", 3)
+                assert [len(page) for page in pages] == [3, 3, 3, 1]
+                assert sum(pages, []) == expected_ids
+                # 5건씩이면 정확히 나누어 떨어져 마지막에 빈 페이지
+                pages = _page_through(store, "user_001", 5)
+                assert [len(page) for page in pages] == [5, 5, 0]
+                # timestamp만 있는 커서는 그 시각의 기록을 모두 제외
+                assert [row["query"] for row in store.get_user_history_page("user_001", 10, (SAME_MINUTE, None))] == ["이전 2", "이전 1"]
+                assert store.get_user_history_page("user_404", 3) == []
+
+                chunks = list(store.iter_user_history("user_001", 4))
+                assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+                assert [row["id"] for chunk in chunks for row in chunk] == expected_ids
+
+            assert csv_store.get_user_history("user_001") == db_store.get_user_history("user_001")
+        finally:
+            csv_store.close()
+            db_store.close()
+
+
+def test_csv_offset_index_follows_file_changes():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "history.csv")
+        store = HistoryService(csv_path)
+        store.append_interactions(_paging_rows())
+        first_page = store.get_user_history_page("user_001", 3)
+
+        # 인덱스가 만들어진 뒤 같은 분에 추가된 기록
+        late = {"id": "1770000000000-000000099-a", "user_id": "user_001", "timestamp": SAME_MINUTE,
+                "query": "늦게 추가", "intent": "OFF_TOPIC", "response": "여러 줄\n답변"}
+        store.append_interactions([late])
+        page = store.get_user_history_page("user_001", 3)
+        assert [row["id"] for row in page] == [first_page[0]["id"], late["id"], first_page[1]["id"]]
+        assert page[1]["response"] == "여러 줄\n답변"
+
+        # 피드백 갱신(파일 다시 쓰기) 후에도 같은 위치의 행을 읽음
+        assert store.update_feedback(late["id"], "like")
+        assert store.get_user_history_page("user_001", 3)[1]["feedback"] == "like"
+
+        # 다른 프로세스가 파일에 직접 추가한 기록 (인덱스 다시 만듦)
+        other = HistoryService(csv_path)
+        other.append_interactions([dict(late, id="1770000200000-000000001-a", timestamp="2026-02-01 10:02", query="외부")])
+        assert store.get_user_history_page("user_001", 1)[0]["query"] == "외부"
+
+
+def test_writer_merges_unsaved_rows_into_pages():
+    async def scenario(store):
+        writer = HistoryWriter(store, batch_size=1000, flush_interval=60)
+        writer.start()
+        try:
+            saved_ids = [row["id"] for row in store.get_user_history("user_001")]
+            pending_id = writer.submit("user_001", "저장 전 기록", "OFF_TOPIC", {"message": "답변"})
+            assert writer._queued
+
+            page = await writer.get_user_history_page("user_001", 3)
+            assert [row["id"] for row in page] == [pending_id] + saved_ids[:2]
+            # 저장 전 기록은 커서 이후 페이지에 다시 나오지 않음
+            before = parse_history_cursor(make_history_cursor(page[-1]))
+            page = await writer.get_user_history_page("user_001", 3, before)
+            assert [row["id"] for row in page] == saved_ids[2:5]
+
+            streamed = [row["id"] async for row in writer.stream_user_history("user_001", 4)]
+            assert streamed == [pending_id] + saved_ids
+            streamed = [row["id"] async for row in writer.stream_user_history("user_001", 4, limit=5)]
+            assert streamed == [pending_id] + saved_ids[:4]
+        finally:
+            await writer.stop()
+        assert [row["id"] for row in store.get_user_history("user_001")][0] == pending_id
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_store, db_store = _stores(tmp_dir)
+        try:
+            asyncio.run(scenario(csv_store))
+            asyncio.run(scenario(db_store))
+        finally:
+            csv_store.close()
+            db_store.close()
+
+
+def test_legacy_header_upgraded_on_first_write():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "history.csv")
+        _write_legacy_csv(csv_path)
+        with open(csv_path, "rb") as f:
+            original = f.read()
+
+        # 생성과 조회만으로는 파일을 다시 쓰지 않음
+        store = HistoryService(csv_path)
+        rows = store.get_user_history("user_002")
+        assert [set(row) for row in rows] == [set(HISTORY_FIELDS)] * 2
+        assert rows[0]["cache_key"] == ""
+        assert store.get_interaction("1769594600000")["cache_category"] == ""
+        assert [set(row) for chunk in store.iter_interactions() for row in chunk] == [set(HISTORY_FIELDS)] * 3
+        with open(csv_path, "rb") as f:
+            assert f.read() == original
+
+        # 첫 추가 때 현재 헤더로 바뀌고 이전 행도 그대로 읽힘
+        store.log_interaction("user_002", "배송 언제 와요?", "POLICY_QA",
+                              {"message": "보통 2~3일 걸립니다.", "cache_key": "배송언제와요", "cache_category": "배송"})
+        with open(csv_path, encoding="utf-8", newline="") as f:
+            assert next(csv.reader(f)) == HISTORY_FIELDS
+        rows = store.get_user_history("user_002")
+        assert len(rows) == 3
+        assert {row["cache_key"] for row in rows} == {"", "배송언제와요"}
+        assert store.get_interaction("1769594583939")["response"] == LEGACY_ROWS[0]["response"]
+
+
+def test_history_endpoint_projection_and_cursor():
+    from fastapi import HTTPException
+
+    async def collect(response):
+        return [json.loads(line) async for line in response.body_iterator]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        import router
+        original_store = router.history_writer.store
+        store = HistoryService(os.path.join(tmp_dir, "history.csv"))
+        store.append_interactions(_paging_rows())
+        router.history_writer.store = store
+        try:
+            assert router._parse_fields(None) is None
+            assert router._parse_fields("id, query,") == ["id", "query"]
+            try:
+                router._parse_fields("id,password")
+                assert False, "알 수 없는 필드가 허용됨"
+            except HTTPException as e:
+                assert e.status_code == 400
+
+            result = asyncio.run(router.get_history("user_001", limit=4, before=None, fields="id,query", output_format="json"))
+            assert [set(item) for item in result["items"]] == [{"id", "query"}] * 4
+            result = asyncio.run(router.get_history("user_001", limit=4, before=result["next_before"], fields=None, output_format="json"))
+            assert set(result["items"][0]) == set(HISTORY_FIELDS)
+            result = asyncio.run(router.get_history("user_001", limit=4, before=result["next_before"], fields=None, output_format="json"))
+            assert len(result["items"]) == 2 and result["next_before"] is None
+
+            response = asyncio.run(router.get_history("user_001", limit=None, before=None, fields="timestamp", output_format="ndjson"))
+            lines = asyncio.run(collect(response))
+            assert len(lines) == 10 and all(set(line) == {"timestamp"} for line in lines)
+        finally:
+            router.history_writer.store = original_store
+
+
+if __name__ == "__main__":
+    test_csv_to_sqlite_migration_is_idempotent()
+    test_seed_only_into_empty_database()
+    test_old_schema_database_gains_columns()
+    test_migrate_history_tool()
+    test_page_boundaries_with_equal_timestamps()
+    test_csv_offset_index_follows_file_changes()
+    test_writer_merges_unsaved_rows_into_pages()
+    test_legacy_header_upgraded_on_first_write()
+    test_history_endpoint_projection_and_cursor()
+    print("history store OK")
@@ -0,0 +1,39 @@
+import sys
+import os
+
+# backend 모듈은 backend 디렉토리 기준으로 import (services.*)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from services.local_validation import FAIL, PASS, LocalValidator
+
+
+def test_legitimate_answers_pass():
+    """비속어와 글자가 겹치는 정상 답변은 통과 (임베딩 모델 없이 규칙 검사만)"""
+    validator = LocalValidator()
+    cases = [
+        ("화면이 꺼져요", "전원이 꺼져 있는 경우 전원 버튼을 길게 눌러주세요."),
+        ("앱이 자꾸 꺼져요", "앱이 꺼져버리면 최신 버전으로 업데이트한 뒤 다시 실행해주세요."),
+        ("신제품 언제 나와요?", "신제품 출시발표는 다음 달 공식 홈페이지에서 안내될 예정입니다."),
+        ("배송이 늦어요", "연휴가 닥쳐 물량이 많아 배송이 1~2일 늦어질 수 있습니다."),
+        ("병원 예약 앱 오류", "질병신고 메뉴는 앱 재설치 후 이용해주세요."),
+        ("동기화가 안돼요", "동기화 시발점이 되는 기기에서 먼저 로그인해주세요."),
+        ("배송 출발지가 어디예요?", "상품은 서울 시발역 인근 물류센터에서 출고됩니다."),
+    ]
+    for query, response in cases:
+        result = validator.validate(query, response)
+        assert result["verdict"] == PASS, (response, result)
+
+
+def test_profanity_fails():
+    validator = LocalValidator()
+    for response in ["시발 그걸 왜 몰라요", "시발, 이것도 몰라요?", "이 병신 같은 앱은 지우세요", "좆같네요"]:
+        result = validator.validate("로그인이 안돼요", response)
+        assert result["verdict"] == FAIL, (response, result)
+        assert "정책준수: 비속어/비전문적 표현" in result["issues"]
+
+
+if __name__ == "__main__":
+    test_legitimate_answers_pass()
+    test_profanity_fails()
+    print("local validation OK")
@@ -0,0 +1,314 @@
+import sys
+import os
+import csv
+import tempfile
+import time
+from datetime import datetime
+
+# backend 모듈은 backend 디렉토리 기준으로 import (services.*)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from services import order_store
+from services.journal import WriterLockHeld
+from services.order_store import ORDER_FIELDS, IndexedCSVOrderRepository, SQLiteOrderRepository
+
+ORDERS = [
+    {"order_id": "ORD-001", "item": "무선 키보드", "status": "배송중",
+     "customer_name": "김철수", "customer_id": "user_001", "order_date": "2026-10-01T10:00:00"},
+    {"order_id": "ORD-002", "item": "게이밍 마우스", "status": "배송완료",
+     "customer_name": "김철수", "customer_id": "user_001", "order_date": "2026-10-05T09:30:00"},
+    {"order_id": "ORD-003", "item": "사운드바", "status": "결제완료",
+     "customer_name": "이영희", "customer_id": "user_002", "order_date": "2026-10-03T15:00:00"},
+]
+
+
+def _write_orders(path, orders):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=ORDER_FIELDS)
+        writer.writeheader()
+        writer.writerows(orders)
+
+
+def test_csv_refresh_reloads_only_on_change():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orders_path = os.path.join(tmp_dir, "orders.csv")
+        _write_orders(orders_path, ORDERS)
+        store = IndexedCSVOrderRepository(orders_path)
+        try:
+            assert len(store) == 3
+            assert store.refresh() is False
+
+            # 다른 도구가 스냅샷을 교체한 경우 (크기가 바뀌므로 mtime 해상도와 무관하게 감지)
+            _write_orders(orders_path, ORDERS + [dict(ORDERS[0], order_id="ORD-004", item="모니터")])
+            assert store.refresh() is True
+            assert store.get("ORD-004")["item"] == "모니터"
+            assert store.refresh() is False
+
+            # 자기 자신의 쓰기는 다시 읽지 않음
+            assert store.update_status("ORD-001", "취소완료")
+            assert store.refresh() is False
+            assert store.get("ORD-001")["status"] == "취소완료"
+        finally:
+            store.close()
+
+
+def test_csv_missing_file_keeps_last_state():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orders_path = os.path.join(tmp_dir, "orders.csv")
+        _write_orders(orders_path, ORDERS)
+        store = IndexedCSVOrderRepository(orders_path)
+        try:
+            os.remove(orders_path)
+            assert store.refresh() is False
+            assert store.get("ORD-002")["status"] == "배송완료"
+        finally:
+            store.close()
+
+
+def test_sqlite_refresh_sees_other_connection_writes():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orders_path = os.path.join(tmp_dir, "orders.csv")
+        db_path = os.path.join(tmp_dir, "orders.db")
+        _write_orders(orders_path, ORDERS)
+        writer = SQLiteOrderRepository(db_path, seed_csv_path=orders_path)
+        reader = SQLiteOrderRepository(db_path, seed_csv_path=orders_path)
+        try:
+            # 이미 채워진 DB는 다시 가져오지 않음
+            assert len(reader) == 3
+            assert reader.get("ORD-003")["status"] == "결제완료"
+            assert reader.refresh() is False
+
+            assert writer.update_status("ORD-003", "취소완료")
+            # 버전이 바뀌기 전까지는 행 캐시를 그대로 사용
+            assert reader.get("ORD-003")["status"] == "결제완료"
+            assert reader.refresh() is True
+            assert reader.get("ORD-003")["status"] == "취소완료"
+            assert reader.refresh() is False
+
+            # 아무 행도 바뀌지 않은 변경은 버전을 올리지 않음
+            assert writer.update_status("ORD-999", "취소완료") is False
+            assert writer.update_statuses({"ORD-999": "취소완료"}) == []
+            assert reader.refresh() is False
+        finally:
+            writer.close()
+            reader.close()
+
+
+def _ids(orders):
+    return [order["order_id"] for order in orders]
+
+
+def _check_customer_index(store):
+    # 최신순, since는 해당 시각 포함
+    assert _ids(store.find_by_customer("user_001")) == ["ORD-002", "ORD-001"]
+    assert _ids(store.find_by_customer("user_001", since=datetime(2026, 10, 5, 9, 30))) == ["ORD-002"]
+    assert _ids(store.find_by_customer("user_001", since=datetime(2026, 10, 6))) == []
+    assert _ids(store.find_by_customer("user_001", statuses=["배송중"])) == ["ORD-001"]
+    assert _ids(store.find_by_customer("user_001", statuses=["취소완료"])) == []
+    assert store.find_by_customer("user_404") == []
+
+    # 중간 날짜의 새 주문은 정렬 위치에 들어가고, 날짜 형식이 안맞는 주문은 기간 조회에서 제외
+    store.add(dict(ORDERS[0], order_id="ORD-010", order_date="2026-10-03T00:00:00"))
+    store.add(dict(ORDERS[0], order_id="ORD-011", order_date="어제"))
+    assert _ids(store.find_by_customer("user_001")) == ["ORD-002", "ORD-010", "ORD-001"]
+    assert store.status_counts("user_001") == {"배송중": 3, "배송완료": 1}
+
+    assert store.update_statuses({"ORD-001": "취소완료", "ORD-010": "취소완료"}) == ["ORD-001", "ORD-010"]
+    assert _ids(store.find_by_customer("user_001", statuses=["취소완료"])) == ["ORD-010", "ORD-001"]
+    assert store.status_counts("user_001") == {"배송중": 1, "배송완료": 1, "취소완료": 2}
+    assert store.status_counts() == {"배송중": 1, "배송완료": 1, "취소완료": 2, "결제완료": 1}
+    assert store.status_counts("user_404") == {}
+
+
+def test_customer_index_csv():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orders_path = os.path.join(tmp_dir, "orders.csv")
+        _write_orders(orders_path, ORDERS)
+        store = IndexedCSVOrderRepository(orders_path)
+        try:
+            _check_customer_index(store)
+        finally:
+            store.close()
+
+        # 재시작 후(저널 replay)에도 같은 인덱스
+        store = IndexedCSVOrderRepository(orders_path)
+        try:
+            assert _ids(store.find_by_customer("user_001", statuses=["취소완료"])) == ["ORD-010", "ORD-001"]
+            assert store.status_counts("user_001") == {"배송중": 1, "배송완료": 1, "취소완료": 2}
+        finally:
+            store.close()
+
+
+def test_customer_index_sqlite():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orders_path = os.path.join(tmp_dir, "orders.csv")
+        _write_orders(orders_path, ORDERS)
+        store = SQLiteOrderRepository(os.path.join(tmp_dir, "orders.db"), seed_csv_path=orders_path)
+        try:
+            _check_customer_index(store)
+        finally:
+            store.close()
+
+
+def _crash(store):
+    """close() 없이 프로세스가 죽은 상황: 파일 핸들과 잠금만 사라짐"""
+    store._journal._file.close()
+    store._writer_lock.release()
+
+
+def test_journal_replay_after_crash():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orders_path = os.path.join(tmp_dir, "orders.csv")
+        journal_path = f"{orders_path}.journal"
+        _write_orders(orders_path, ORDERS)
+        store = IndexedCSVOrderRepository(orders_path)
+        assert store.update_status("ORD-001", "취소완료")
+        store.add(dict(ORDERS[2], order_id="ORD-004"))
+        _crash(store)
+
+        # 쓰기 도중 잘린 마지막 레코드
+        with open(journal_path, "ab") as f:
+            f.write(b'{"op": "status", "order_id": "ORD-002", "sta')
+
+        store = IndexedCSVOrderRepository(orders_path)
+        try:
+            assert store.get("ORD-001")["status"] == "취소완료"
+            assert store.get("ORD-004") is not None
+            assert store.get("ORD-002")["status"] == "배송완료"
+            with open(journal_path, "rb") as f:
+                assert f.read().endswith(b"\n")
+            assert store.update_status("ORD-002", "반품요청")
+        finally:
+            store.close()
+
+        store = IndexedCSVOrderRepository(orders_path)
+        try:
+            assert store.get("ORD-002")["status"] == "반품요청"
+            assert store.stats()["journal"]["entries"] == 3
+        finally:
+            store.close()
+
+
+def test_journal_groups_fsyncs():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orders_path = os.path.join(tmp_dir, "orders.csv")
+        _write_orders(orders_path, ORDERS)
+        store = IndexedCSVOrderRepository(orders_path, fsync_batch=100, fsync_interval=60)
+        try:
+            journal = store._journal
+            # 주문 추가는 fsync를 기다리지 않음
+            for n in range(3):
+                store.add(dict(ORDERS[0], order_id=f"ORD-10{n}"))
+            assert journal.stats()["fsyncs"] == 0
+            assert journal.stats()["unsynced"] == 3
+
+            # 상태 변경 확정은 앞서 쌓인 레코드까지 한 번에 fsync
+            assert store.update_status("ORD-001", "취소완료")
+            assert journal.stats()["fsyncs"] == 1
+            assert journal.stats()["unsynced"] == 0
+            journal.wait_synced(journal.appended)
+            assert journal.stats()["fsyncs"] == 1
+
+            # 일괄 변경은 레코드 하나, fsync 한 번
+            assert store.update_statuses({"ORD-002": "취소완료", "ORD-003": "취소완료"}) == ["ORD-002", "ORD-003"]
+            assert journal.stats()["fsyncs"] == 2
+            assert journal.stats()["appended"] == 5
+        finally:
+            store.close()
+
+
+def test_compaction_keeps_writes_made_while_compacting():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orders_path = os.path.join(tmp_dir, "orders.csv")
+        _write_orders(orders_path, ORDERS)
+        store = IndexedCSVOrderRepository(orders_path, compact_every=1000)
+        original_fsync_directory = order_store.fsync_directory
+
+        def write_during_compaction(path):
+            # 스냅샷 교체 후, 반영된 저널 구간을 잘라내기 전에 들어온 쓰기
+            original_fsync_directory(path)
+            store.update_status("ORD-002", "반품요청")
+            store.add(dict(ORDERS[2], order_id="ORD-005"))
+
+        try:
+            store.update_status("ORD-001", "취소완료")
+            order_store.fsync_directory = write_during_compaction
+            try:
+                store.compact()
+            finally:
+                order_store.fsync_directory = original_fsync_directory
+            assert store.compactions == 1
+            # 압축 전 레코드는 스냅샷으로 옮겨지고, 압축 중 레코드만 저널에 남음
+            assert store.stats()["journal"]["entries"] == 2
+            assert store.refresh() is False
+        finally:
+            store.close()
+
+        with open(orders_path, encoding="utf-8", newline="") as f:
+            snapshot = {row["order_id"]: row["status"] for row in csv.DictReader(f)}
+        assert snapshot["ORD-001"] == "취소완료"
+        assert snapshot["ORD-002"] == "배송완료"
+        assert "ORD-005" not in snapshot
+
+        store = IndexedCSVOrderRepository(orders_path)
+        try:
+            assert store.get("ORD-001")["status"] == "취소완료"
+            assert store.get("ORD-002")["status"] == "반품요청"
+            assert store.get("ORD-005") is not None
+        finally:
+            store.close()
+
+
+def test_background_compaction_after_compact_every():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orders_path = os.path.join(tmp_dir, "orders.csv")
+        _write_orders(orders_path, ORDERS)
+        store = IndexedCSVOrderRepository(orders_path, compact_every=5)
+        try:
+            for n in range(20):
+                store.update_status("ORD-003", f"상태{n}")
+            deadline = time.monotonic() + 5
+            while (store.compactions == 0 or store._compacting) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert store.compactions >= 1
+            assert store.stats()["journal"]["entries"] < 20
+        finally:
+            store.close()
+
+        store = IndexedCSVOrderRepository(orders_path)
+        try:
+            assert store.get("ORD-003")["status"] == "상태19"
+        finally:
+            store.close()
+
+
+def test_second_writer_is_refused():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orders_path = os.path.join(tmp_dir, "orders.csv")
+        _write_orders(orders_path, ORDERS)
+        store = IndexedCSVOrderRepository(orders_path)
+        try:
+            try:
+                IndexedCSVOrderRepository(orders_path)
+                assert False, "두 번째 쓰기 프로세스가 열림"
+            except WriterLockHeld as e:
+                assert e.owner == str(os.getpid())
+        finally:
+            store.close()
+
+        IndexedCSVOrderRepository(orders_path).close()
+
+
+if __name__ == "__main__":
+    test_csv_refresh_reloads_only_on_change()
+    test_csv_missing_file_keeps_last_state()
+    test_sqlite_refresh_sees_other_connection_writes()
+    test_customer_index_csv()
+    test_customer_index_sqlite()
+    test_journal_replay_after_crash()
+    test_journal_groups_fsyncs()
+    test_compaction_keeps_writes_made_while_compacting()
+    test_background_compaction_after_compact_every()
+    test_second_writer_is_refused()
+    print("order store OK")
@@ -0,0 +1,134 @@
+import sys
+import os
+import time
+
+# backend 모듈은 backend 디렉토리 기준으로 import (services.*)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from services import pending_transactions
+from services.pending_transactions import PendingTransactionStore
+
+
+class FakeClock:
+    """pending_transactions 모듈의 time 대신 사용하는 수동 시계"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def _with_clock(test):
+    def run():
+        clock = FakeClock()
+        original = pending_transactions.time
+        pending_transactions.time = clock
+        try:
+            test(clock)
+        finally:
+            pending_transactions.time = original
+    run.__name__ = test.__name__
+    run.__doc__ = test.__doc__
+    return run
+
+
+def _txn(store, user_id, status="pending_approval"):
+    return store.add({"transaction_id": store.new_id(), "user_id": user_id, "status": status})
+
+
+@_with_clock
+def test_find_for_user_returns_oldest_pending(clock):
+    store = PendingTransactionStore(ttl_seconds=60, sweep_interval=0)
+    first = _txn(store, "user_001")
+    second = _txn(store, "user_001")
+    other = _txn(store, "user_002")
+    _txn(store, "user_003", status="executed")
+
+    assert store.find_for_user("user_001") is first
+    assert store.find_for_user("user_002") is other
+    assert store.find_for_user("user_003") is None
+    assert store.find_for_user("user_003", status="executed") is not None
+    assert store.find_for_user("user_404") is None
+    assert store.find_for_user(None) is None
+
+    assert store.pop(first["transaction_id"]) is first
+    assert store.find_for_user("user_001") is second
+    assert store.pop(first["transaction_id"]) is None
+    assert store.stats()["users"] == 3
+    assert store.stats()["completed"] == 1
+
+
+@_with_clock
+def test_expired_transactions_are_not_returned(clock):
+    store = PendingTransactionStore(ttl_seconds=60, sweep_interval=0)
+    old = _txn(store, "user_001")
+    clock.now += 30
+    new = _txn(store, "user_001")
+
+    clock.now += 29.9
+    assert old["transaction_id"] in store
+    clock.now += 0.1
+    # TTL이 지난 순간부터 만료 (조회 시 정리)
+    assert store.get(old["transaction_id"]) is None
+    assert old["transaction_id"] not in store
+    assert store.find_for_user("user_001") is new
+    assert store.stats()["expired"] == 1
+
+    clock.now += 30
+    assert store.find_for_user("user_001") is None
+    assert len(store) == 0
+    assert store.stats()["users"] == 0
+    assert store.stats()["expired"] == 2
+
+
+@_with_clock
+def test_sweep_removes_only_expired(clock):
+    store = PendingTransactionStore(ttl_seconds=60, sweep_interval=0)
+    done = _txn(store, "user_001")
+    abandoned = _txn(store, "user_002")
+    clock.now += 50
+    fresh = _txn(store, "user_003")
+    store.pop(done["transaction_id"])
+
+    assert store.sweep() == 0
+    clock.now += 10
+    # 이미 처리된 항목은 만료로 세지 않음
+    assert store.sweep() == 1
+    assert store.get(abandoned["transaction_id"]) is None
+    assert store.get(fresh["transaction_id"]) is fresh
+    assert store.stats()["expired"] == 1
+    assert store.stats()["completed"] == 1
+
+
+@_with_clock
+def test_background_sweeper(clock):
+    store = PendingTransactionStore(ttl_seconds=60, sweep_interval=0.01)
+    try:
+        _txn(store, "user_001")
+        _txn(store, "user_002")
+        clock.now += 60
+        deadline = time.time() + 5
+        while len(store) and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(store) == 0
+        assert store.stats()["expired"] == 2
+    finally:
+        store.close()
+
+
+def test_ids_are_random():
+    store = PendingTransactionStore(sweep_interval=0)
+    ids = {store.new_id() for _ in range(100)}
+    assert len(ids) == 100
+    assert all(txn_id.startswith("TXN-") and len(txn_id) == 36 for txn_id in ids)
+
+
+if __name__ == "__main__":
+    test_find_for_user_returns_oldest_pending()
+    test_expired_transactions_are_not_returned()
+    test_sweep_removes_only_expired()
+    test_background_sweeper()
+    test_ids_are_random()
+    print("pending transactions OK")
@@ -0,0 +1,76 @@
+import sys
+import os
+
+# backend 모듈은 backend 디렉토리 기준으로 import (services.*)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import settings
+from services.query_normalizer import normalize_query
+from tools.cache_key_analysis import false_merges
+
+
+def _stemmed(query):
+    return normalize_query(query, stemming=True)
+
+
+def test_distinct_questions_keep_distinct_keys():
+    """끝 글자가 조사와 같은 단어를 잘라 다른 질문과 합치지 않음"""
+    assert _stemmed("사과 주문") != _stemmed("사이 주문")
+    assert _stemmed("포도 주문") != _stemmed("포 주문")
+    assert _stemmed("와이파이가") == "와이파이"
+    assert _stemmed("와이파이") == "와이파이"
+
+
+def test_one_particle_per_token():
+    assert _stemmed("로그인이") == "로그인"
+    assert _stemmed("화면에서는") == "화면"
+    # 조사를 뗀 뒤 남은 끝 글자를 다시 조사로 보지 않음
+    assert _stemmed("배터리가") == "배터리"
+    assert _stemmed("아이디가") == "아이디"
+
+
+def test_spacing_variants_share_a_key():
+    assert _stemmed("배송 언제 와요") == _stemmed("배송 언제와") == _stemmed("배송언제와요")
+    assert _stemmed("로그인이 안돼요") == _stemmed("로그인이 안 돼요") == _stemmed("로그인 안됨ㅠㅠ") == "로그인안되"
+
+
+def test_normalization_without_stemming():
+    assert normalize_query("로그인이 안 돼요?!", stemming=False) == "로그인이안돼요"
+    assert normalize_query("Wi-Fi 끊김 ㅠㅠ^^", stemming=False) == "wifi끊김"
+    # 이모티콘만 있는 질문은 빈 키 대신 이전 방식 키
+    assert normalize_query("ㅠㅠ", stemming=False) == "ㅠㅠ"
+
+
+def test_stemming_follows_setting():
+    original = settings.CACHE_KEY_STEMMING
+    try:
+        settings.CACHE_KEY_STEMMING = False
+        assert normalize_query("로그인이 안돼요") == "로그인이안돼요"
+        settings.CACHE_KEY_STEMMING = True
+        assert normalize_query("로그인이 안돼요") == "로그인안되"
+    finally:
+        settings.CACHE_KEY_STEMMING = original
+
+
+def test_false_merge_report():
+    """답변이 다른 질문이 한 키로 합쳐지면 잘못 합쳐진 키로 보고 (같은 답변끼리 합쳐진 키는 제외)"""
+    rows = [
+        ("사과 주문", "사과 주문 안내"),
+        ("사이 주문", "사이 주문 안내"),
+        ("로그인이 안돼요", "비밀번호 재설정 안내"),
+        ("로그인 안됨", "비밀번호 재설정 안내"),
+    ]
+    keys = {"사과 주문": "사주문", "사이 주문": "사주문", "로그인이 안돼요": "로그인안되", "로그인 안됨": "로그인안되"}
+    merges = false_merges(rows, keys.get)
+    assert [merge["queries"] for merge in merges] == [["사과주문", "사이주문"]], merges
+
+
+if __name__ == "__main__":
+    test_distinct_questions_keep_distinct_keys()
+    test_one_particle_per_token()
+    test_spacing_variants_share_a_key()
+    test_normalization_without_stemming()
+    test_stemming_follows_setting()
+    test_false_merge_report()
+    print("query normalizer OK")
@@ -0,0 +1,153 @@
+import sys
+import os
+import csv
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# backend 모듈은 backend 디렉토리 기준으로 import (services.*)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from services.order_store import ORDER_FIELDS, IndexedCSVOrderRepository
+from services.transaction import TransactionService
+
+
+def _make_service(tmp_dir):
+    orders_path = os.path.join(tmp_dir, "orders.csv")
+    with open(orders_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=ORDER_FIELDS)
+        writer.writeheader()
+        for n in range(1, 5):
+            writer.writerow({"order_id": f"ORD-00{n}", "item": f"상품{n}", "status": "배송중",
+                             "customer_name": "테스트", "customer_id": "user_001",
+                             "order_date": f"2026-10-0{n}T10:00:00"})
+    return TransactionService(order_store=IndexedCSVOrderRepository(orders_path))
+
+
+def _request_cancel(service, order_id, user_id="user_001"):
+    """process_transaction이 만드는 것과 같은 형식의 취소 승인 대기 트랜잭션"""
+    order = service.orders[order_id]
+    action = {
+        "transaction_id": service.pending_transactions.new_id(),
+        "action_type": "cancel_order",
+        "target_entity": order_id,
+        "target_item": order["item"],
+        "current_status": order["status"],
+        "new_value": "주문취소",
+        "status": "pending_approval",
+        "user_id": user_id,
+    }
+    return service.pending_transactions.add(action)["transaction_id"]
+
+
+def _statuses(result):
+    return [(r["transaction_id"], r["status"]) for r in result["results"]]
+
+
+def test_batch_approval_commits_once():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = _make_service(tmp_dir)
+        try:
+            first = _request_cancel(service, "ORD-001")
+            second = _request_cancel(service, "ORD-002")
+
+            result = service.execute_transactions([second, first, second])
+            # 중복 ID는 한 번만, 결과는 요청 순서대로
+            assert _statuses(result) == [(second, "success"), (first, "success")]
+            assert (result["status"], result["succeeded"], result["failed"]) == ("success", 2, 0)
+            assert service.orders["ORD-001"]["status"] == "주문취소"
+            assert service.orders["ORD-002"]["status"] == "주문취소"
+            # 일괄 변경은 저널 레코드 하나
+            assert service.orders.stats()["journal"]["appended"] == 1
+            assert len(service.pending_transactions) == 0
+        finally:
+            service.close()
+
+
+def test_batch_approval_reports_each_failure():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = _make_service(tmp_dir)
+        try:
+            ok = _request_cancel(service, "ORD-001")
+            same_order = _request_cancel(service, "ORD-001")
+            stale = _request_cancel(service, "ORD-003")
+            # 승인 요청 이후 주문 상태가 바뀜
+            service.orders.update_status("ORD-003", "배송완료")
+
+            result = service.execute_transactions([ok, "TXN-unknown", same_order, stale])
+            assert _statuses(result) == [
+                (ok, "success"), ("TXN-unknown", "error"), (same_order, "error"), (stale, "error"),
+            ]
+            assert (result["status"], result["succeeded"], result["failed"]) == ("partial", 1, 3)
+            assert "현재: 배송완료" in result["results"][3]["message"]
+            assert service.orders["ORD-003"]["status"] == "배송완료"
+            # 실패한 트랜잭션도 다시 승인할 수 없도록 제거
+            assert len(service.pending_transactions) == 0
+
+            result = service.execute_transactions([ok])
+            assert (result["status"], result["succeeded"], result["failed"]) == ("error", 0, 1)
+        finally:
+            service.close()
+
+
+def test_batch_rejection():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = _make_service(tmp_dir)
+        try:
+            first = _request_cancel(service, "ORD-001")
+            second = _request_cancel(service, "ORD-002")
+
+            result = service.reject_transactions([first, "TXN-unknown", first])
+            assert _statuses(result) == [(first, "cancelled"), ("TXN-unknown", "error")]
+            assert (result["status"], result["succeeded"], result["failed"]) == ("partial", 1, 1)
+            assert service.orders["ORD-001"]["status"] == "배송중"
+            assert service.pending_transactions.get(second) is not None
+
+            result = service.reject_transactions([second])
+            assert (result["status"], result["succeeded"], result["failed"]) == ("success", 1, 0)
+        finally:
+            service.close()
+
+
+def test_concurrent_approvals_commit_once():
+    """같은 트랜잭션(또는 같은 주문의 다른 트랜잭션)을 여러 스레드가 동시에 승인해도 한 번만 성공"""
+    def approve_together(approve, transaction_ids):
+        barrier = threading.Barrier(len(transaction_ids))
+
+        def run(transaction_id):
+            barrier.wait()
+            return approve(transaction_id)
+
+        with ThreadPoolExecutor(max_workers=len(transaction_ids)) as pool:
+            return list(pool.map(run, transaction_ids))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = _make_service(tmp_dir)
+        try:
+            txn_id = _request_cancel(service, "ORD-001")
+            results = approve_together(service.execute_transaction, [txn_id] * 8)
+            assert sorted(r["status"] for r in results) == ["error"] * 7 + ["success"]
+
+            same_order = [_request_cancel(service, "ORD-002") for _ in range(4)]
+            results = approve_together(service.execute_transaction, same_order)
+            assert sorted(r["status"] for r in results) == ["error"] * 3 + ["success"]
+
+            txn_id = _request_cancel(service, "ORD-003")
+            results = approve_together(lambda t: service.execute_transactions([t]), [txn_id] * 4)
+            assert sorted(r["succeeded"] for r in results) == [0, 0, 0, 1]
+
+            # 상태 변경은 주문마다 한 번씩만 기록
+            assert service.orders.stats()["journal"]["appended"] == 3
+            assert len(service.pending_transactions) == 0
+            assert service.pending_transactions.stats()["completed"] == 6
+        finally:
+            service.close()
+
+
+if __name__ == "__main__":
+    test_batch_approval_commits_once()
+    test_batch_approval_reports_each_failure()
+    test_batch_rejection()
+    test_concurrent_approvals_commit_once()
+    print("transactions OK")